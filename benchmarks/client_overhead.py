@@ -0,0 +1,209 @@
+"""
+Benchmark of the per-call overhead of a generated client.
+
+Run from the repository root, with the package installed (pip install -e .):
+
+    python -m benchmarks.client_overhead
+
+A small SDK is generated into a temporary directory and its handlers are called
+against an in-memory httpx transport, so only the client side is measured. The
+same requests are then sent with httpx directly, the difference is the overhead
+of the generated code.
+"""
+
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict
+
+import click
+import httpx
+
+from borea_python.content_loader import LoadedDocument
+from borea_python.generator import SDKGenerator
+from borea_python.models.borea_config_models import BoreaConfig
+from borea_python.openapi_parser import OpenAPIParser
+
+BASE_URL = "https://api.example.com/v1"
+SPEC: Dict[str, Any] = {
+    "openapi": "3.0.0",
+    "info": {"title": "Overhead API", "version": "1.0.0"},
+    "servers": [{"url": BASE_URL}],
+    "tags": [{"name": "items", "description": "Items"}],
+    "paths": {
+        "/items/{item_id}": {
+            "get": {
+                "operationId": "get_item",
+                "tags": ["items"],
+                "parameters": [
+                    {
+                        "name": "item_id",
+                        "in": "path",
+                        "required": True,
+                        "schema": {"type": "integer"},
+                    },
+                    {"name": "limit", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "X-Trace", "in": "header", "schema": {"type": "string"}},
+                ],
+                "responses": {
+                    "200": {
+                        "description": "The item",
+                        "content": {"application/json": {"schema": {"type": "object"}}},
+                    }
+                },
+            }
+        }
+    },
+}
+RESPONSE_BODY = b'{"id": 1}'
+
+
+def respond(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, content=RESPONSE_BODY)
+
+
+async def respond_async(request: httpx.Request) -> httpx.Response:
+    return respond(request)
+
+
+def generate_sdk(output_dir: Path) -> None:
+    """Generate the sync and async clients of the benchmark spec."""
+    document = LoadedDocument("overhead.json", "memory", json.dumps(SPEC), SPEC)
+    metadata = OpenAPIParser(document.source, document=document).parse()
+    generator = SDKGenerator(
+        metadata=metadata,
+        output_dir=output_dir,
+        models_dir=output_dir / "models",
+        generate_tests=False,
+        generate_x_code_samples=False,
+        borea_config=BoreaConfig(),
+        document=document,
+        format_code=False,
+        incremental=False,
+        client="both",
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator.generate()
+
+
+def time_calls(
+    calls_by_name: Dict[str, Callable[[int], Any]], calls: int, repeat: int
+) -> Dict[str, float]:
+    """
+    Time functions in alternating rounds, so drift of the machine affects all alike.
+
+    Args:
+        calls_by_name: The functions to time, by name
+        calls: Number of calls of a function per round
+        repeat: Number of rounds
+
+    Returns:
+        Dict[str, float]: The fastest time of one call of every function, in
+            microseconds
+    """
+    best = {name: float("inf") for name in calls_by_name}
+    for round_number in range(repeat + 1):
+        for name, call in calls_by_name.items():
+            start = time.perf_counter()
+            for i in range(calls):
+                call(i)
+            # The first round warms up
+            if round_number:
+                best[name] = min(best[name], time.perf_counter() - start)
+    return {name: seconds / calls * 1e6 for name, seconds in best.items()}
+
+
+def time_async_calls(
+    calls_by_name: Dict[str, Callable[[int], Awaitable[Any]]], calls: int, repeat: int
+) -> Dict[str, float]:
+    """Like time_calls, for coroutine functions."""
+
+    async def run() -> Dict[str, float]:
+        best = {name: float("inf") for name in calls_by_name}
+        for round_number in range(repeat + 1):
+            for name, call in calls_by_name.items():
+                start = time.perf_counter()
+                for i in range(calls):
+                    await call(i)
+                if round_number:
+                    best[name] = min(best[name], time.perf_counter() - start)
+        return {name: seconds / calls * 1e6 for name, seconds in best.items()}
+
+    return asyncio.run(run())
+
+
+@click.command()
+@click.option("--calls", type=int, default=2000, show_default=True)
+@click.option("--repeat", type=int, default=20, show_default=True)
+def main(calls: int, repeat: int) -> None:
+    """Measure the per-call overhead of a generated client over raw httpx."""
+    with tempfile.TemporaryDirectory(prefix="borea-overhead-") as temp_dir:
+        generate_sdk(Path(temp_dir) / "overhead_api")
+        sys.path.insert(0, temp_dir)
+        try:
+            sync_module = importlib.import_module("overhead_api.src.overhead_api")
+            async_module = importlib.import_module(
+                "overhead_api.src.overhead_api_async"
+            )
+        finally:
+            sys.path.remove(temp_dir)
+
+        url = BASE_URL + "/items/1"
+        params = {"limit": 10}
+        headers = {"X-Trace": "abc"}
+
+        client = httpx.Client(transport=httpx.MockTransport(respond))
+        sdk = sync_module.OverheadAPI(transport=httpx.MockTransport(respond))
+        results = time_calls(
+            {
+                "httpx": lambda i: client.get(
+                    url, params=params, headers=headers
+                ).json(),
+                "generated": lambda i: sdk.items.get_item(
+                    item_id=1, limit=10, x_trace="abc"
+                ),
+            },
+            calls,
+            repeat,
+        )
+        client.close()
+        sdk.close()
+
+        async_client = httpx.AsyncClient(transport=httpx.MockTransport(respond_async))
+        async_sdk = async_module.AsyncOverheadAPI(
+            transport=httpx.MockTransport(respond_async)
+        )
+
+        async def get_async(i: int) -> Any:
+            response = await async_client.get(url, params=params, headers=headers)
+            return response.json()
+
+        results.update(
+            time_async_calls(
+                {
+                    "httpx async": get_async,
+                    "generated async": lambda i: async_sdk.items.get_item(
+                        item_id=1, limit=10, x_trace="abc"
+                    ),
+                },
+                calls,
+                repeat,
+            )
+        )
+        asyncio.run(async_client.aclose())
+        asyncio.run(async_sdk.close())
+
+    click.echo(f"{'client':<20}{'us/call':>10}{'overhead':>12}")
+    for name, micros in results.items():
+        baseline = results["httpx async" if "async" in name else "httpx"]
+        click.echo(f"{name:<20}{micros:>10.1f}{micros - baseline:>+12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Benchmarks for the generator.
+
+Run from the repository root, with the package installed (pip install -e .):
+
+    python -m benchmarks.run --scale small --check
+
+Timings are normalized by a calibration workload before they are compared with
+the stored baseline, so baselines recorded on one machine are usable on another.
+"""
+
+import contextlib
+import io
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import click
+
+from borea_python.content_loader import LoadedDocument
+from borea_python.generate_method_metadata import GenerateMethodMetadata
+from borea_python.generator import SDKGenerator
+from borea_python.metadata_cache import MetadataCache
+from borea_python.models.borea_config_models import BoreaConfig
+from borea_python.models.openapi_models import OpenAPIMetadata
+from borea_python.models.tag_class_models import OperationMetadata
+from borea_python.openapi_parser import OpenAPIParser
+
+from .spec_synthesizer import SCALES, SpecScale, SpecSynthesizer
+
+DEFAULT_BASELINE = str(Path(__file__).resolve().parent / "baseline.json")
+
+
+def calibrate() -> None:
+    """A fixed pure Python workload, used to normalize timings between machines."""
+    data = {f"key{i}": [i, str(i), {"value": i * 2}] for i in range(2000)}
+    for _ in range(20):
+        json.loads(json.dumps(data))
+        sorted(data, key=lambda key: key[::-1])
+
+
+class Benchmark:
+    """A timed workload over a synthesized spec."""
+
+    def __init__(self, name: str, func: Callable[[], None], operations: int):
+        self.name = name
+        self.func = func
+        self.operations = operations
+
+    def run(self, repeat: int) -> Dict[str, Any]:
+        """
+        Run the workload.
+
+        Args:
+            repeat: Number of timed runs, the fastest one is reported
+
+        Returns:
+            Dict[str, Any]: Seconds, operations per second and peak memory
+        """
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.func()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+
+        # Memory is measured in a separate run, tracemalloc slows down the workload
+        tracemalloc.start()
+        try:
+            self.func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "seconds": round(best, 6),
+            "ops_per_second": round(self.operations / best, 2) if best else None,
+            "peak_memory_kb": peak // 1024,
+        }
+
+
+def build_benchmarks(scale: SpecScale) -> List[Benchmark]:
+    """Create the benchmarks of a synthesized spec."""
+    synthesizer = SpecSynthesizer(scale)
+    data = synthesizer.synthesize()
+    document = LoadedDocument(
+        "benchmark.json", "memory", json.dumps(data, indent=2), data
+    )
+    metadata: OpenAPIMetadata = OpenAPIParser(
+        document.source, document=document
+    ).parse()
+    operations = len(metadata.operations)
+    generator = SDKGenerator(
+        metadata=metadata,
+        output_dir=Path(tempfile.gettempdir()) / "borea-benchmark-render",
+        models_dir=Path(tempfile.gettempdir()) / "borea-benchmark-render" / "models",
+        generate_tests=False,
+        generate_x_code_samples=False,
+        borea_config=BoreaConfig(),
+        format_code=False,
+    )
+
+    def parse() -> None:
+        OpenAPIParser(document.source, document=document).parse()
+
+    cached_metadata = MetadataCache.dumps(metadata)
+
+    def cache_load() -> None:
+        MetadataCache.loads(cached_metadata)
+
+    def resolve_method_params() -> None:
+        for operation in metadata.operations:
+            GenerateMethodMetadata.resolve_method_params(
+                operation.parameters, operation.request_body
+            )
+
+    def render() -> None:
+        for operation in metadata.operations:
+            generator._generate_handler_class(
+                operation=operation,
+                parent_class_name="BenchmarkAPI",
+                parent_filename="benchmark_api",
+                is_operation_without_tag=not operation.tag,
+                operation_metadata=OperationMetadata(
+                    handler_dir=operation.operation_id,
+                    handler_filename=operation.operation_id,
+                    handler_class_name=operation.operation_id.title(),
+                ),
+                models_dir="models",
+                models_filename="models",
+            )
+
+    def generate() -> None:
+        with tempfile.TemporaryDirectory(prefix="borea-benchmark-") as temp_dir:
+            output_dir = Path(temp_dir) / "benchmark_api"
+            sdk_generator = SDKGenerator(
+                metadata=metadata.model_copy(deep=True),
+                output_dir=output_dir,
+                models_dir=output_dir / "models",
+                generate_tests=False,
+                generate_x_code_samples=False,
+                borea_config=BoreaConfig(),
+                document=document,
+                format_code=False,
+            )
+            with contextlib.redirect_stdout(io.StringIO()):
+                sdk_generator.generate()
+
+    return [
+        Benchmark("parse", parse, operations),
+        Benchmark("cache_load", cache_load, operations),
+        Benchmark("resolve_method_params", resolve_method_params, operations),
+        Benchmark("render", render, operations),
+        Benchmark("generate", generate, operations),
+    ]
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    Args:
+        results: Results of this run
+        baseline: Stored results of the same scale
+        tolerance: Allowed relative slowdown or memory growth
+
+    Returns:
+        List[str]: Descriptions of the regressions
+    """
+    regressions = []
+    calibration = results["calibration_seconds"]
+    baseline_calibration = baseline["calibration_seconds"]
+    for name, result in results["benchmarks"].items():
+        expected = baseline["benchmarks"].get(name)
+        if expected is None:
+            regressions.append(f"{name}: not in the baseline, record a new baseline")
+            continue
+        ratio = (result["seconds"] / calibration) / (
+            expected["seconds"] / baseline_calibration
+        )
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: {ratio:.2f}x slower than the baseline")
+        memory_ratio = result["peak_memory_kb"] / max(1, expected["peak_memory_kb"])
+        if memory_ratio > 1 + tolerance:
+            regressions.append(
+                f"{name}: {memory_ratio:.2f}x the peak memory of the baseline"
+            )
+    # A warm run loads the metadata cache instead of parsing, it has to be faster
+    benchmarks = results["benchmarks"]
+    if benchmarks["cache_load"]["seconds"] >= benchmarks["parse"]["seconds"]:
+        regressions.append(
+            "cache_load: loading the metadata cache is not faster than parse"
+        )
+    return regressions
+
+
+@click.command()
+@click.option(
+    "--scale",
+    type=click.Choice(sorted(SCALES)),
+    default="small",
+    show_default=True,
+    help="Preset size of the synthesized spec",
+)
+@click.option("--operations", type=int, help="Override the number of operations")
+@click.option("--tags", type=int, help="Override the number of tags")
+@click.option("--schemas", type=int, help="Override the number of component schemas")
+@click.option("--ref-depth", type=int, help="Override the length of $ref chains")
+@click.option("--cycles", type=int, help="Override the number of cyclic chains")
+@click.option("--fan-out", type=int, help="Override the allOf/oneOf fan-out")
+@click.option("--parameters", type=int, help="Override the parameters per operation")
+@click.option("--repeat", type=int, default=3, show_default=True)
+@click.option(
+    "--baseline",
+    type=str,
+    default=DEFAULT_BASELINE,
+    show_default=True,
+    help="Path to the stored baselines",
+)
+@click.option(
+    "--check",
+    is_flag=True,
+    default=False,
+    help="Fail if a benchmark regressed compared to the baseline",
+)
+@click.option(
+    "--update-baseline",
+    is_flag=True,
+    default=False,
+    help="Store the results as the baseline of the scale",
+)
+@click.option(
+    "--tolerance",
+    type=float,
+    default=0.5,
+    show_default=True,
+    help="Allowed relative slowdown or memory growth",
+)
+@click.option("--output", type=str, help="Write the results as JSON to this path")
+def main(
+    scale: str,
+    operations: Optional[int],
+    tags: Optional[int],
+    schemas: Optional[int],
+    ref_depth: Optional[int],
+    cycles: Optional[int],
+    fan_out: Optional[int],
+    parameters: Optional[int],
+    repeat: int,
+    baseline: str,
+    check: bool,
+    update_baseline: bool,
+    tolerance: float,
+    output: Optional[str],
+) -> None:
+    """Benchmark parsing, method metadata, rendering and generation."""
+    overrides = {
+        "operations": operations,
+        "tags": tags,
+        "schemas": schemas,
+        "refDepth": ref_depth,
+        "cycles": cycles,
+        "fanOut": fan_out,
+        "parameters": parameters,
+    }
+    spec_scale = SCALES[scale].model_copy(
+        update={key: value for key, value in overrides.items() if value is not None}
+    )
+
+    calibration = Benchmark("calibration", calibrate, 1).run(repeat)["seconds"]
+    results: Dict[str, Any] = {
+        "scale": spec_scale.model_dump(),
+        "calibration_seconds": calibration,
+        "benchmarks": {},
+    }
+    click.echo(f"{'benchmark':<24}{'seconds':>10}{'ops/s':>12}{'peak KiB':>12}")
+    for benchmark in build_benchmarks(spec_scale):
+        result = benchmark.run(repeat)
+        results["benchmarks"][benchmark.name] = result
+        click.echo(
+            f"{benchmark.name:<24}{result['seconds']:>10.4f}"
+            f"{result['ops_per_second']:>12.1f}{result['peak_memory_kb']:>12}"
+        )
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    baselines: Dict[str, Any] = {}
+    if Path(baseline).exists():
+        with open(baseline, "r") as f:
+            baselines = json.load(f)
+
+    if update_baseline:
+        baselines[scale] = results
+        with open(baseline, "w") as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        click.echo(f"Updated the {scale} baseline in {baseline}")
+        return
+
+    if not check:
+        return
+    stored = baselines.get(scale)
+    if stored is None or stored["scale"] != results["scale"]:
+        raise click.ClickException(f"No baseline for this spec scale in {baseline}")
+    regressions = compare(results, stored, tolerance)
+    if regressions:
+        raise click.ClickException(
+            "Benchmark regressions:\n  " + "\n  ".join(regressions)
+        )
+    click.echo("No regressions")
+
+
+if __name__ == "__main__":
+    main()
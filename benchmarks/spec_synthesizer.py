@@ -0,0 +1,226 @@
+"""Module for synthesizing OpenAPI specs of a configurable scale."""
+
+import json
+import random
+from typing import Any, Dict, List
+
+from pydantic import BaseModel
+
+HTTP_METHODS = ["get", "post", "put", "patch", "delete"]
+PRIMITIVE_TYPES = ["string", "integer", "number", "boolean"]
+
+
+class SpecScale(BaseModel):
+    """The size and shape of a synthesized spec."""
+
+    operations: int = 50
+    tags: int = 5
+    schemas: int = 40
+    refDepth: int = 4
+    cycles: int = 2
+    fanOut: int = 3
+    parameters: int = 4
+    seed: int = 0
+
+
+SCALES: Dict[str, SpecScale] = {
+    "small": SpecScale(),
+    "medium": SpecScale(
+        operations=250,
+        tags=10,
+        schemas=200,
+        refDepth=6,
+        cycles=5,
+        fanOut=3,
+        parameters=6,
+    ),
+    "large": SpecScale(
+        operations=1000,
+        tags=25,
+        schemas=800,
+        refDepth=8,
+        cycles=10,
+        fanOut=3,
+        parameters=8,
+    ),
+}
+
+
+class SpecSynthesizer:
+    """
+    Synthesizes a deterministic OpenAPI spec.
+
+    Component schemas are laid out in chains of refDepth schemas, where every
+    schema references the next one. The last schema of the first `cycles` chains
+    references the head of its chain. Every third schema is an allOf of fanOut
+    other schemas and every third schema has a oneOf property of fanOut schemas.
+    """
+
+    def __init__(self, scale: SpecScale):
+        """
+        Initialize the SpecSynthesizer.
+
+        Args:
+            scale: The size and shape of the spec
+        """
+        self.scale = scale
+        self.random = random.Random(scale.seed)
+
+    @staticmethod
+    def schema_name(index: int) -> str:
+        return f"Schema{index}"
+
+    @staticmethod
+    def ref(name: str, section: str = "schemas") -> Dict[str, str]:
+        return {"$ref": f"#/components/{section}/{name}"}
+
+    def _pick_schemas(self, index: int, count: int) -> List[str]:
+        """Pick count schemas other than index."""
+        candidates = [i for i in range(self.scale.schemas) if i != index]
+        count = min(count, len(candidates))
+        return [self.schema_name(i) for i in self.random.sample(candidates, count)]
+
+    def _schema(self, index: int) -> Dict[str, Any]:
+        scale = self.scale
+        properties: Dict[str, Any] = {
+            "id": {"type": "integer", "description": "Identifier"},
+            "name": {"type": "string", "description": f"Name of {index}"},
+            "tags": {"type": "array", "items": {"type": "string"}},
+        }
+        chain_depth = max(1, scale.refDepth)
+        position = index % chain_depth
+        chain = index // chain_depth
+        is_chain_end = position == chain_depth - 1 or index == scale.schemas - 1
+        if not is_chain_end:
+            properties["child"] = self.ref(self.schema_name(index + 1))
+        elif chain < scale.cycles and position > 0:
+            properties["root"] = self.ref(self.schema_name(index - position))
+        if index % 3 == 1 and scale.fanOut > 0:
+            properties["variant"] = {
+                "oneOf": [
+                    self.ref(name) for name in self._pick_schemas(index, scale.fanOut)
+                ]
+            }
+
+        schema: Dict[str, Any] = {
+            "type": "object",
+            "description": f"Synthesized schema {index}",
+            "required": ["id"],
+            "properties": properties,
+        }
+        if index % 3 == 0 and scale.fanOut > 0:
+            # Compose with schemas that come later, so allOf does not form cycles
+            later = [self.schema_name(i) for i in range(index + 1, scale.schemas)]
+            parents = later[: scale.fanOut]
+            if parents:
+                schema = {
+                    "description": schema["description"],
+                    "allOf": [self.ref(name) for name in parents]
+                    + [{"type": "object", "properties": properties}],
+                }
+        return schema
+
+    def _parameters(self, operation_index: int, has_path_param: bool) -> List[Any]:
+        parameters: List[Any] = []
+        if has_path_param:
+            parameters.append(
+                {
+                    "name": "item_id",
+                    "in": "path",
+                    "required": True,
+                    "schema": {"type": "string"},
+                }
+            )
+        for i in range(self.scale.parameters):
+            if i == 0:
+                parameters.append(self.ref("RequestId", "parameters"))
+                continue
+            location = "header" if i % 4 == 3 else "query"
+            parameters.append(
+                {
+                    "name": f"param-{i}" if location == "header" else f"param_{i}",
+                    "in": location,
+                    "required": i % 2 == 0,
+                    "description": f"Parameter {i} of operation {operation_index}",
+                    "schema": {"type": PRIMITIVE_TYPES[i % len(PRIMITIVE_TYPES)]},
+                }
+            )
+        return parameters
+
+    def _operation(
+        self, index: int, method: str, has_path_param: bool
+    ) -> Dict[str, Any]:
+        scale = self.scale
+        schema_ref = self.ref(self.schema_name(index % max(1, scale.schemas)))
+        operation: Dict[str, Any] = {
+            "operationId": f"operation_{index}",
+            "summary": f"Operation {index}",
+            "description": f"Synthesized {method.upper()} operation {index}",
+            "tags": [f"tag{index % max(1, scale.tags)}"] if scale.tags else [],
+            "parameters": self._parameters(index, has_path_param),
+            "responses": {
+                "200": {
+                    "description": "Success",
+                    "content": {"application/json": {"schema": schema_ref}},
+                }
+            },
+        }
+        if method in ("post", "put", "patch") and scale.schemas:
+            operation["requestBody"] = {
+                "required": True,
+                "content": {"application/json": {"schema": schema_ref}},
+            }
+        return operation
+
+    def synthesize(self) -> Dict[str, Any]:
+        """
+        Synthesize the spec.
+
+        Returns:
+            Dict[str, Any]: The OpenAPI spec
+        """
+        scale = self.scale
+        schemas = {self.schema_name(i): self._schema(i) for i in range(scale.schemas)}
+
+        paths: Dict[str, Dict[str, Any]] = {}
+        for index in range(scale.operations):
+            method = HTTP_METHODS[index % len(HTTP_METHODS)]
+            resource = index // len(HTTP_METHODS)
+            has_path_param = (
+                method in ("get", "put", "patch", "delete") and index % 2 == 1
+            )
+            path = f"/resource{resource}" + ("/{item_id}" if has_path_param else "")
+            paths.setdefault(path, {})[method] = self._operation(
+                index, method, has_path_param
+            )
+
+        return {
+            "openapi": "3.0.3",
+            "info": {
+                "title": "Benchmark API",
+                "version": "1.0.0",
+                "description": "Synthesized benchmark spec",
+            },
+            "servers": [{"url": "https://api.example.com"}],
+            "tags": [
+                {"name": f"tag{i}", "description": f"Tag {i}"}
+                for i in range(scale.tags)
+            ],
+            "paths": paths,
+            "components": {
+                "schemas": schemas,
+                "parameters": {
+                    "RequestId": {
+                        "name": "X-Request-Id",
+                        "in": "header",
+                        "required": False,
+                        "description": "Request identifier",
+                        "schema": {"type": "string"},
+                    }
+                },
+            },
+        }
+
+    def synthesize_json(self) -> str:
+        """Synthesize the spec as JSON text."""
+        return json.dumps(self.synthesize(), indent=2)
@@ -0,0 +1,294 @@
+"""Module for generating several SDKs in one process."""
+
+import contextvars
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import click
+from jinja2 import Environment
+
+from .config_parser import ConfigError, ConfigParser
+from .content_loader import ContentLoader
+from .generator import SDKGenerator
+from .helpers import Helpers
+from .http_fetcher import DEFAULT_RETRIES, DEFAULT_TIMEOUT, HttpFetcher
+from .metadata_cache import DEFAULT_CACHE_DIR, MetadataCache
+from .model_generator import ModelGenerator
+from .models.borea_config_models import BatchConfigJSON, BatchTargetJSON, BoreaConfig
+from .openapi_parser import OpenAPIParser
+from .output_cache import OutputCache
+from .spec_bundler import SpecBundler
+
+
+class BatchResult:
+    """Outcome of generating one SDK of a batch."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.output_dir: Optional[str] = None
+        self.seconds = 0.0
+        self.files_written = 0
+        self.files_unchanged = 0
+        self.files_removed = 0
+        self.error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _TargetOutput(io.TextIOBase):
+    """
+    Stdout replacement collecting the output of the target of the current context.
+
+    SDKs generated concurrently would interleave their output, so every target
+    collects its output and prints it as one block when it is done. The buffer is
+    a context variable, so output of the generation phases of a target, which run
+    in their own threads, ends up in the buffer of the target too.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.target_buffer: contextvars.ContextVar[
+            Optional[io.StringIO]
+        ] = contextvars.ContextVar("borea_target_output", default=None)
+
+    def write(self, s: str) -> int:
+        return (self.target_buffer.get() or self.stream).write(s)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class BatchGenerator:
+    """
+    Generates the SDKs of a batch configuration in one process.
+
+    Targets are generated by a bounded pool of threads that share the compiled
+    Jinja templates, the model generators and the parse cache. Model generation
+    is serialized by the ModelGenerator, the other phases run concurrently.
+    """
+
+    def __init__(
+        self,
+        batch_config: BatchConfigJSON,
+        workers: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        use_cache: bool = True,
+        incremental: bool = True,
+        env: Optional[Environment] = None,
+        offline: bool = False,
+        http_timeout: float = DEFAULT_TIMEOUT,
+        http_retries: int = DEFAULT_RETRIES,
+    ):
+        """
+        Initialize the BatchGenerator.
+
+        Args:
+            batch_config: The batch configuration
+            workers: Maximum number of SDKs generated at the same time,
+                defaults to the workers of the batch configuration
+            cache_dir: Cache directory overriding the ones of the configuration
+            use_cache: Use the parse and model caches
+            incremental: Keep files whose inputs did not change since the previous run
+            env: Jinja environment shared by all targets
+            offline: Use cached copies of remote specs, never fetch them
+            http_timeout: Seconds to wait for a server when fetching a URL
+            http_retries: Retries after network and server errors
+        """
+        self.batch_config = batch_config
+        self.workers = max(1, workers or batch_config.workers)
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.incremental = incremental
+        self.env = env or SDKGenerator.create_environment()
+        self.offline = offline
+        self.http_timeout = http_timeout
+        self.http_retries = http_retries
+        self.model_generators: Dict[Optional[str], ModelGenerator] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def target_name(target: BatchTargetJSON, index: int) -> str:
+        """Return the name of a target, falling back to its output or spec."""
+        if target.name:
+            return target.name
+        if target.output.clientSDK:
+            return Path(target.output.clientSDK).name
+        if target.input.openapi:
+            return Path(target.input.openapi[0]).stem
+        return f"target{index + 1}"
+
+    def _validate(self, names: List[str]) -> None:
+        """Check that targets have unique names and output directories."""
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ConfigError(f"Duplicate batch target names: {', '.join(duplicates)}")
+        outputs = [
+            os.path.normpath(target.output.clientSDK)
+            for target in self.batch_config.targets
+            if target.output.clientSDK
+        ]
+        duplicates = sorted({output for output in outputs if outputs.count(output) > 1})
+        if duplicates:
+            raise ConfigError(
+                f"Batch targets share output directories: {', '.join(duplicates)}"
+            )
+
+    def _model_generator(self, cache_dir: Optional[str]) -> ModelGenerator:
+        with self._lock:
+            if cache_dir not in self.model_generators:
+                self.model_generators[cache_dir] = ModelGenerator(cache_dir=cache_dir)
+            return self.model_generators[cache_dir]
+
+    def _generate_target(self, target: BatchTargetJSON, result: BatchResult) -> None:
+        """Load, parse and generate the SDK of a target."""
+        cache_dir = (
+            self.cache_dir
+            or target.cacheDir
+            or self.batch_config.cacheDir
+            or DEFAULT_CACHE_DIR
+        )
+        fetcher = HttpFetcher(
+            cache_dir=cache_dir if self.use_cache else None,
+            timeout=self.http_timeout,
+            retries=self.http_retries,
+            offline=self.offline,
+        )
+        borea_config: BoreaConfig = ConfigParser.parse_config(target, fetcher)
+        spec_input = borea_config.input.openapi or "openapi.json"
+        metadata_cache = MetadataCache(cache_dir) if self.use_cache else None
+
+        content_loader = ContentLoader(fetcher)
+        bundler = SpecBundler(content_loader)
+        document = bundler.bundle(content_loader.load_document(spec_input))
+        click.echo(f"Loaded {spec_input}: {document.summary()}")
+        if bundler.sources:
+            click.echo(f"Bundled {len(bundler.sources)} referenced documents")
+        metadata = OpenAPIParser.parse_with_cache(document, metadata_cache)
+
+        sdk_output_path = Path(
+            borea_config.output.clientSDK
+            or Helpers.clean_file_name(metadata.info.title)
+        )
+        result.output_dir = str(sdk_output_path)
+        generator = SDKGenerator(
+            metadata=metadata,
+            output_dir=sdk_output_path,
+            models_dir=sdk_output_path / (borea_config.output.models or "models"),
+            generate_tests=borea_config.output.tests,
+            generate_x_code_samples=borea_config.output.xCodeSamples,
+            borea_config=borea_config,
+            jobs=borea_config.jobs,
+            document=document,
+            format_code=borea_config.output.format,
+            env=self.env,
+            model_generator=self._model_generator(
+                cache_dir if self.use_cache else None
+            ),
+            incremental=self.incremental,
+            output_cache=(
+                OutputCache(borea_config.outputCache)
+                if borea_config.outputCache
+                else None
+            ),
+            client=borea_config.output.client,
+        )
+        generator.generate()
+        result.files_written = len(generator.file_writer.written)
+        result.files_unchanged = len(generator.file_writer.skipped)
+        result.files_removed = len(generator.file_writer.removed)
+
+    def _run_target(
+        self, target: BatchTargetJSON, name: str, output: _TargetOutput
+    ) -> BatchResult:
+        result = BatchResult(name)
+        buffer = io.StringIO()
+        token = output.target_buffer.set(buffer)
+        start = time.perf_counter()
+        try:
+            self._generate_target(target, result)
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+        finally:
+            result.seconds = time.perf_counter() - start
+            output.target_buffer.reset(token)
+
+        status = "done" if result.ok else f"failed: {result.error}"
+        output_text = buffer.getvalue() + f"{status}\nfinished in {result.seconds:.2f}s"
+        with self._lock:
+            for line in output_text.splitlines():
+                click.echo(f"[{name}] {line}")
+        return result
+
+    def run(self) -> List[BatchResult]:
+        """
+        Generate all targets.
+
+        Returns:
+            List[BatchResult]: Results in the order of the targets
+
+        Raises:
+            ConfigError: If target names or output directories are not unique
+        """
+        targets = self.batch_config.targets
+        names = [self.target_name(target, i) for i, target in enumerate(targets)]
+        self._validate(names)
+        if not targets:
+            return []
+
+        output = _TargetOutput(sys.stdout)
+        previous_stdout = sys.stdout
+        sys.stdout = output
+        try:
+            with ThreadPoolExecutor(
+                max_workers=min(self.workers, len(targets))
+            ) as executor:
+                futures = [
+                    executor.submit(self._run_target, target, name, output)
+                    for target, name in zip(targets, names)
+                ]
+                return [future.result() for future in futures]
+        finally:
+            sys.stdout = previous_stdout
+
+    @staticmethod
+    def summary_table(results: List[BatchResult]) -> str:
+        """
+        Format the results as a table with one row per SDK.
+
+        Args:
+            results: Results of a batch run
+
+        Returns:
+            str: The table
+        """
+        name_width = max([len("SDK")] + [len(result.name) for result in results])
+        lines = [
+            f"{'SDK':<{name_width}}  {'status':<7}{'seconds':>9}"
+            f"{'written':>9}{'unchanged':>11}{'removed':>9}"
+        ]
+        for result in results:
+            if result.ok:
+                lines.append(
+                    f"{result.name:<{name_width}}  {'ok':<7}{result.seconds:>9.2f}"
+                    f"{result.files_written:>9}{result.files_unchanged:>11}"
+                    f"{result.files_removed:>9}"
+                )
+            else:
+                lines.append(
+                    f"{result.name:<{name_width}}  {'failed':<7}{result.seconds:>9.2f}"
+                    f"{'-':>9}{'-':>11}{'-':>9}"
+                )
+        total = sum(result.seconds for result in results)
+        failed = sum(not result.ok for result in results)
+        lines.append(
+            f"{len(results)} SDKs, {failed} failed, {total:.2f}s of generation time"
+        )
+        return "\n".join(lines)
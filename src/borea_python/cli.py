@@ -1,14 +1,28 @@
+import contextlib
 import json
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 import click
 
+from .batch_generator import BatchGenerator
 from .config_parser import ConfigParser
+from .content_loader import ContentLoader
+from .file_watcher import FileWatcher
 from .generator import SDKGenerator
 from .helpers import Helpers
+from .http_fetcher import DEFAULT_RETRIES, DEFAULT_TIMEOUT, HttpFetcher
+from .metadata_cache import DEFAULT_CACHE_DIR, MetadataCache
+from .model_generator import ModelGenerator
 from .models.borea_config_models import BoreaConfig
+from .models.openapi_models import OpenAPIMetadata
 from .openapi_parser import OpenAPIParser
+from .output_cache import OutputCache
+from .profiler import GenerationProfiler
+from .shards import ShardError, ShardSet, parse_shard
+from .spec_bundler import BundleError, SpecBundler
+from .spec_pruner import OperationFilter, SpecPruner
 
 
 @click.group(invoke_without_command=True)
@@ -43,6 +57,7 @@ def init() -> None:
             "models": "models",
             "tests": False,
             "xCodeSamples": False,
+            "format": True,
         },
         "ignores": [],
     }
@@ -54,6 +69,15 @@ def init() -> None:
     click.echo(f"Created borea.config.json with default settings.")
 
 
+def _parse_shard_option(ctx, param, value: Optional[str]) -> Optional[Tuple[int, int]]:
+    if value is None:
+        return None
+    try:
+        return parse_shard(value)
+    except ShardError as e:
+        raise click.BadParameter(str(e))
+
+
 @cli.command(name="generate")
 @click.option(
     "--openapi-input",
@@ -91,6 +115,139 @@ def init() -> None:
     help="Path to borea.config.json",
     type=str,
 )
+@click.option(
+    "--jobs",
+    "-j",
+    help="Number of worker processes used to render handlers",
+    type=int,
+)
+@click.option(
+    "--cache-dir",
+    help=f"Directory for cached parse results (default: {DEFAULT_CACHE_DIR})",
+    type=str,
+)
+@click.option(
+    "--no-cache",
+    help="Fetch and parse the OpenAPI specification without using the caches",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--offline",
+    help="Use cached copies of remote specifications and configs, never fetch them",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--http-timeout",
+    help="Seconds to wait for a server when fetching a URL",
+    type=float,
+    default=DEFAULT_TIMEOUT,
+    show_default=True,
+)
+@click.option(
+    "--http-retries",
+    help="Retries after network and server errors when fetching a URL",
+    type=int,
+    default=DEFAULT_RETRIES,
+    show_default=True,
+)
+@click.option(
+    "--format/--no-format",
+    "format_code",
+    help="Run ruff over the generated files (default: true)",
+    default=None,
+)
+@click.option(
+    "--client",
+    help="Generate the sync client, the async client or both (default: sync)",
+    type=click.Choice(["sync", "async", "both"]),
+    default=None,
+)
+@click.option(
+    "--full",
+    help="Regenerate all files, ignoring the snapshot of the previous run",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--output-cache",
+    help="Directory caching complete generated SDKs, can be shared between machines",
+    type=str,
+)
+@click.option(
+    "--output-cache-link",
+    help="Restore SDKs from the output cache as hard links instead of copies",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--tag",
+    help="Only generate operations with this tag, can be repeated",
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--operation-id",
+    help="Only generate the operation with this ID, can be repeated",
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--include-paths",
+    help="Only generate operations whose path matches this glob pattern, can be repeated",
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--profile",
+    help="Write a JSON report with the time, memory and files of every phase to this path",
+    type=str,
+)
+@click.option(
+    "--profile-stats",
+    help="Write cProfile statistics of all phases in pstats format to this path",
+    type=str,
+)
+@click.option(
+    "--profile-top",
+    help="Number of slowest operations listed in the profile report",
+    type=int,
+    default=10,
+    show_default=True,
+)
+@click.option(
+    "--watch",
+    help="Regenerate the SDK when the OpenAPI specification or config changes",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--watch-interval",
+    help="Seconds between checks for changes in watch mode",
+    type=float,
+    default=0.2,
+    show_default=True,
+)
+@click.option(
+    "--shard",
+    help="Only render the handlers of shard i of N, for example 1/4, see the merge command",
+    type=str,
+    callback=_parse_shard_option,
+)
+@click.option(
+    "--merge-shards",
+    help="Take the handlers from these shard output directories",
+    multiple=True,
+    type=str,
+    hidden=True,
+)
+@click.option(
+    "--stream",
+    help="Parse, render and write one operation at a time to bound peak memory on huge specs",
+    is_flag=True,
+    default=False,
+)
 def generate(
     openapi_input: Optional[str],
     sdk_output: Optional[str],
@@ -98,11 +255,39 @@ def generate(
     tests: Optional[bool],
     x_code_samples: Optional[bool],
     config: Optional[str],
+    jobs: Optional[int],
+    cache_dir: Optional[str],
+    no_cache: bool,
+    offline: bool,
+    http_timeout: float,
+    http_retries: int,
+    format_code: Optional[bool],
+    client: Optional[str],
+    full: bool,
+    output_cache: Optional[str],
+    output_cache_link: bool,
+    tag: Tuple[str, ...],
+    operation_id: Tuple[str, ...],
+    include_paths: Tuple[str, ...],
+    profile: Optional[str],
+    profile_stats: Optional[str],
+    profile_top: int,
+    watch: bool,
+    watch_interval: float,
+    shard: Optional[Tuple[int, int]],
+    merge_shards: Tuple[str, ...],
+    stream: bool,
 ):
     """Generate a Python SDK from an OpenAPI specification.
 
     The OpenAPI specification can be provided as a local file path or a URL.
     For URLs, both JSON and YAML formats are supported.
+
+    Filtering by tag, operation ID or path only generates the selected operations
+    and the schemas they reference.
+
+    Files whose inputs did not change since the previous run into the same output
+    directory are kept, use --full to regenerate all files.
     """
     # Default values
     default_config = "borea.config.json"
@@ -111,39 +296,400 @@ def generate(
     default_models_dir = "models"
     default_tests = False
     default_x_code_samples = False
+    default_jobs = 1
 
-    # Load borea config
-    borea_config: BoreaConfig = ConfigParser.from_source(config, default_config)
+    if shard is not None and merge_shards:
+        raise click.UsageError("--shard can not be combined with merging shards")
+    if stream and (shard is not None or merge_shards):
+        raise click.UsageError("--stream can not be combined with shards")
+    if offline and no_cache:
+        raise click.UsageError("--offline needs the cache, remove --no-cache")
 
-    # Use defaults if CLI args OR config values are not provided
-    openapi_input = openapi_input or borea_config.input.openapi or default_input
-    parser = OpenAPIParser(openapi_input)
-    metadata = parser.parse()
+    config_source = config or default_config
+    # State kept between runs in watch mode
+    env = SDKGenerator.create_environment()
+    model_generators: Dict[Optional[str], ModelGenerator] = {}
+    parsed_metadata: Dict[str, OpenAPIMetadata] = {}
 
-    default_sdk_output = Helpers.clean_file_name(metadata.info.title)
-    sdk_output_path = Path(
-        sdk_output or borea_config.output.clientSDK or default_sdk_output
-    )
-    models_output_path = Path(
-        sdk_output_path
-        / (models_output or borea_config.output.models or default_models_dir)
+    def run_generation() -> List[str]:
+        """Generate the SDK once and return the local input files to watch."""
+        profiler = None
+        if profile or profile_stats:
+            profiler = GenerationProfiler(
+                top_n=profile_top, collect_stats=profile_stats is not None
+            )
+
+        def profile_phase(name: str):
+            if profiler is None:
+                return contextlib.nullcontext()
+            return profiler.phase(name)
+
+        def http_fetcher(fetcher_cache_dir: str) -> HttpFetcher:
+            return HttpFetcher(
+                cache_dir=None if no_cache else fetcher_cache_dir,
+                timeout=http_timeout,
+                retries=http_retries,
+                offline=offline,
+            )
+
+        # Load borea config
+        borea_config: BoreaConfig = ConfigParser.from_source(
+            config, default_config, http_fetcher(cache_dir or DEFAULT_CACHE_DIR)
+        )
+
+        # Use defaults if CLI args OR config values are not provided
+        spec_input = openapi_input or borea_config.input.openapi or default_input
+        spec_cache_dir = cache_dir or borea_config.cacheDir or DEFAULT_CACHE_DIR
+        metadata_cache = None if no_cache else MetadataCache(spec_cache_dir)
+        with profile_phase("load"):
+            content_loader = ContentLoader(http_fetcher(spec_cache_dir))
+            document = content_loader.load_document(spec_input)
+            is_remote_spec = document.source_type == "url"
+            # Specs split over several files are bundled into one document
+            bundler = SpecBundler(content_loader)
+            try:
+                document = bundler.bundle(document)
+            except BundleError as e:
+                raise click.ClickException(str(e))
+        click.echo(f"Loaded {spec_input}: {document.summary()}")
+        if bundler.sources:
+            click.echo(f"Bundled {len(bundler.sources)} referenced documents")
+        operation_filter = OperationFilter(
+            list(tag), list(operation_id), list(include_paths)
+        )
+        with profile_phase("parse"):
+            if not operation_filter.is_empty:
+                document = SpecPruner(document.data, operation_filter).prune_document(
+                    document
+                )
+            parser = None
+            if stream:
+                # Operations are parsed by the handlers phase, they are not cached
+                parser = OpenAPIParser(document.source, document=document)
+                metadata = parser.metadata([])
+            else:
+                metadata_key = MetadataCache.cache_key(document)
+                if metadata_key not in parsed_metadata:
+                    parsed_metadata.clear()
+                    parsed_metadata[metadata_key] = OpenAPIParser.parse_with_cache(
+                        document, metadata_cache
+                    )
+                # Generation modifies the metadata, keep the parsed metadata intact
+                metadata = parsed_metadata[metadata_key].model_copy(deep=True)
+
+        default_sdk_output = Helpers.clean_file_name(metadata.info.title)
+        sdk_output_path = Path(
+            sdk_output or borea_config.output.clientSDK or default_sdk_output
+        )
+        models_output_path = Path(
+            sdk_output_path
+            / (models_output or borea_config.output.models or default_models_dir)
+        )
+        generate_tests = tests or borea_config.output.tests or default_tests
+        generate_x_code_samples = (
+            x_code_samples or borea_config.output.xCodeSamples or default_x_code_samples
+        )
+        generator_jobs = jobs or borea_config.jobs or default_jobs
+        generator_format_code = format_code
+        if generator_format_code is None:
+            generator_format_code = borea_config.output.format
+        generator_client = client or borea_config.output.client
+        shard_set = None
+        if merge_shards:
+            try:
+                shard_set = ShardSet(list(merge_shards))
+            except ShardError as e:
+                raise click.ClickException(str(e))
+        output_cache_dir = output_cache or borea_config.outputCache
+        models_cache_dir = None if no_cache else spec_cache_dir
+        if models_cache_dir not in model_generators:
+            model_generators[models_cache_dir] = ModelGenerator(
+                cache_dir=models_cache_dir
+            )
+
+        generator = SDKGenerator(
+            metadata=metadata,
+            output_dir=sdk_output_path,
+            models_dir=models_output_path,
+            generate_tests=generate_tests,
+            generate_x_code_samples=generate_x_code_samples,
+            borea_config=borea_config,
+            jobs=generator_jobs,
+            document=document,
+            format_code=generator_format_code,
+            profiler=profiler,
+            env=env,
+            model_generator=model_generators[models_cache_dir],
+            incremental=not full,
+            shard=shard,
+            shard_set=shard_set,
+            output_cache=(
+                OutputCache(output_cache_dir, link=output_cache_link)
+                if output_cache_dir
+                else None
+            ),
+            parser=parser,
+            client=generator_client,
+        )
+        try:
+            generator.generate()
+        except ShardError as e:
+            raise click.ClickException(str(e))
+
+        if profiler is not None:
+            if profile:
+                profiler.write_report(profile)
+                click.echo(f"Wrote profile report to: {profile}")
+            if profile_stats and profiler.dump_stats(profile_stats):
+                click.echo(f"Wrote profile statistics to: {profile_stats}")
+
+        click.echo(f"Successfully generated SDK in: {sdk_output_path}")
+
+        watched_paths = [config_source]
+        if not is_remote_spec:
+            watched_paths.append(spec_input)
+            watched_paths.extend(bundler.sources)
+        return watched_paths
+
+    watched_paths = run_generation()
+    if not watch:
+        return
+
+    watcher = FileWatcher(watched_paths, interval=watch_interval)
+    click.echo(f"Watching for changes: {', '.join(watcher.paths)}")
+    try:
+        while True:
+            changed = watcher.wait_for_change()
+            click.echo(f"Changed: {', '.join(changed)}")
+            start = time.perf_counter()
+            try:
+                watched_paths = run_generation()
+            except Exception as e:
+                # Keep watching, the next save may fix the spec or config
+                click.echo(f"Error: {e}")
+                continue
+            click.echo(f"Regenerated in {time.perf_counter() - start:.2f}s")
+            if watched_paths != watcher.paths:
+                watcher = FileWatcher(watched_paths, interval=watch_interval)
+    except KeyboardInterrupt:
+        click.echo("Stopped watching")
+
+
+@cli.command(name="merge")
+@click.argument("shard_dirs", nargs=-1, required=True, type=str)
+@click.option(
+    "--openapi-input",
+    "-i",
+    help="Path to OpenAPI specification file or URL",
+    type=str,
+)
+@click.option(
+    "--sdk-output",
+    "-o",
+    help="Output directory for the generated SDK",
+    type=str,
+)
+@click.option(
+    "--models-output",
+    "-m",
+    help="Output directory for the generated models",
+    type=str,
+)
+@click.option(
+    "--tests",
+    "-t",
+    help="Generate tests",
+    default=None,
+)
+@click.option(
+    "--x-code-samples",
+    "-x",
+    help="Generate x-code-samples",
+    default=None,
+)
+@click.option(
+    "--config",
+    "-c",
+    help="Path to borea.config.json",
+    type=str,
+)
+@click.option(
+    "--cache-dir",
+    help=f"Directory for cached parse results (default: {DEFAULT_CACHE_DIR})",
+    type=str,
+)
+@click.option(
+    "--no-cache",
+    help="Fetch and parse the OpenAPI specification without using the caches",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--offline",
+    help="Use cached copies of remote specifications and configs, never fetch them",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--http-timeout",
+    help="Seconds to wait for a server when fetching a URL",
+    type=float,
+    default=DEFAULT_TIMEOUT,
+    show_default=True,
+)
+@click.option(
+    "--http-retries",
+    help="Retries after network and server errors when fetching a URL",
+    type=int,
+    default=DEFAULT_RETRIES,
+    show_default=True,
+)
+@click.option(
+    "--format/--no-format",
+    "format_code",
+    help="Run ruff over the generated files (default: true)",
+    default=None,
+)
+@click.option(
+    "--client",
+    help="Generate the sync client, the async client or both (default: sync)",
+    type=click.Choice(["sync", "async", "both"]),
+    default=None,
+)
+@click.option(
+    "--full",
+    help="Regenerate all files, ignoring the snapshot of the previous run",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--tag",
+    help="Only generate operations with this tag, can be repeated",
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--operation-id",
+    help="Only generate the operation with this ID, can be repeated",
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--include-paths",
+    help="Only generate operations whose path matches this glob pattern, can be repeated",
+    multiple=True,
+    type=str,
+)
+@click.pass_context
+def merge(ctx, shard_dirs: Tuple[str, ...], **options) -> None:
+    """Assemble the SDK from the output directories of generate --shard runs.
+
+    The handlers are taken from the shards, the tag classes, the SDK class, the
+    models and openapi.json are generated once. Pass the same specification and
+    options as to the shards, the result is identical to a run without shards.
+    """
+    ctx.invoke(generate, merge_shards=shard_dirs, **options)
+
+
+@cli.command(name="batch")
+@click.option(
+    "--config",
+    "-c",
+    help="Path to the batch configuration listing the SDKs to generate",
+    type=str,
+    default="borea.batch.json",
+    show_default=True,
+)
+@click.option(
+    "--workers",
+    "-w",
+    help="Maximum number of SDKs generated at the same time (default: workers of the batch configuration)",
+    type=int,
+)
+@click.option(
+    "--cache-dir",
+    help=f"Directory for cached parse results (default: {DEFAULT_CACHE_DIR})",
+    type=str,
+)
+@click.option(
+    "--no-cache",
+    help="Fetch and parse the OpenAPI specifications without using the caches",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--offline",
+    help="Use cached copies of remote specifications and configs, never fetch them",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--http-timeout",
+    help="Seconds to wait for a server when fetching a URL",
+    type=float,
+    default=DEFAULT_TIMEOUT,
+    show_default=True,
+)
+@click.option(
+    "--http-retries",
+    help="Retries after network and server errors when fetching a URL",
+    type=int,
+    default=DEFAULT_RETRIES,
+    show_default=True,
+)
+@click.option(
+    "--full",
+    help="Regenerate all files, ignoring the snapshots of the previous runs",
+    is_flag=True,
+    default=False,
+)
+def batch(
+    config: str,
+    workers: Optional[int],
+    cache_dir: Optional[str],
+    no_cache: bool,
+    offline: bool,
+    http_timeout: float,
+    http_retries: int,
+    full: bool,
+):
+    """Generate several Python SDKs in one process.
+
+    The batch configuration lists the SDKs as targets, every target has the
+    fields of borea.config.json and an optional name. The SDKs share the
+    compiled templates and caches and are generated concurrently.
+    """
+    if offline and no_cache:
+        raise click.UsageError("--offline needs the cache, remove --no-cache")
+    batch_config = ConfigParser.load_batch_config(
+        config,
+        HttpFetcher(
+            cache_dir=None if no_cache else cache_dir or DEFAULT_CACHE_DIR,
+            timeout=http_timeout,
+            retries=http_retries,
+            offline=offline,
+        ),
     )
-    tests = tests or borea_config.output.tests or default_tests
-    x_code_samples = (
-        x_code_samples or borea_config.output.xCodeSamples or default_x_code_samples
+    generator = BatchGenerator(
+        batch_config,
+        workers=workers,
+        cache_dir=cache_dir,
+        use_cache=not no_cache,
+        incremental=not full,
+        offline=offline,
+        http_timeout=http_timeout,
+        http_retries=http_retries,
     )
-
-    generator = SDKGenerator(
-        metadata=metadata,
-        output_dir=sdk_output_path,
-        models_dir=models_output_path,
-        generate_tests=tests,
-        generate_x_code_samples=x_code_samples,
-        borea_config=borea_config,
+    click.echo(
+        f"Generating {len(batch_config.targets)} SDKs with {generator.workers} workers"
     )
-    generator.generate()
-
-    click.echo(f"Successfully generated SDK in: {sdk_output_path}")
+    results = generator.run()
+    click.echo(BatchGenerator.summary_table(results))
+    failed = [result for result in results if not result.ok]
+    if failed:
+        raise click.ClickException(
+            "Failed to generate: " + ", ".join(result.name for result in failed)
+        )
 
 
 if __name__ == "__main__":
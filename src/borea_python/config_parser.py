@@ -3,7 +3,9 @@ from typing import List, Optional
 import click
 
 from .content_loader import ContentLoader, ContentLoadError
+from .http_fetcher import HttpFetcher
 from .models.borea_config_models import (
+    BatchConfigJSON,
     BoreaConfig,
     BoreaConfigJSON,
     InputConfig,
@@ -27,13 +29,16 @@ class ConfigParser:
         self.content_loader = ContentLoader()
 
     @staticmethod
-    def resolve_path(paths: List[str], purpose: str) -> str:
+    def resolve_path(
+        paths: List[str], purpose: str, fetcher: Optional[HttpFetcher] = None
+    ) -> str:
         """
         Try to resolve a path from a list of possible paths.
 
         Args:
             paths: List of paths to try (can be file paths or URLs)
             purpose: Description of what this path is for (used in error messages)
+            fetcher: Fetcher of URLs, cached URLs are resolved without a request
 
         Returns:
             str: The first working path
@@ -42,8 +47,19 @@ class ConfigParser:
             ConfigError: If no paths work
         """
         validator = PathValidator()
+        fetcher = fetcher or HttpFetcher()
         for path in paths:
-            is_valid, path_type, error = validator.validate(path)
+            if fetcher.is_cached(path):
+                return path
+            if fetcher.offline:
+                is_valid, path_type, error = validator.validate(
+                    path, check_reachable=False
+                )
+                is_valid = is_valid and path_type == "file"
+            else:
+                is_valid, path_type, error = validator.validate(
+                    path, timeout=fetcher.timeout
+                )
             if is_valid:
                 return path
 
@@ -58,12 +74,15 @@ class ConfigParser:
         return BoreaConfig()
 
     @classmethod
-    def parse_input_config(cls, input: InputConfigJSON) -> InputConfig:
+    def parse_input_config(
+        cls, input: InputConfigJSON, fetcher: Optional[HttpFetcher] = None
+    ) -> InputConfig:
         """
         Parse and validate an InputConfigJSON, resolving all List[str] fields.
 
         Args:
             input: The InputConfigJSON to parse
+            fetcher: Fetcher of URLs
 
         Returns:
             InputConfig: A new input config with resolved path
@@ -71,7 +90,9 @@ class ConfigParser:
         Raises:
             ConfigError: If all paths cannot be resolved
         """
-        return InputConfig(openapi=cls.resolve_path(input.openapi, "OpenAPI spec"))
+        return InputConfig(
+            openapi=cls.resolve_path(input.openapi, "OpenAPI spec", fetcher)
+        )
 
     @classmethod
     def parse_output_config(cls, output: OutputConfig) -> OutputConfig:
@@ -87,12 +108,15 @@ class ConfigParser:
         return OutputConfig(**output.model_dump())
 
     @classmethod
-    def parse_config(cls, config: BoreaConfigJSON) -> BoreaConfig:
+    def parse_config(
+        cls, config: BoreaConfigJSON, fetcher: Optional[HttpFetcher] = None
+    ) -> BoreaConfig:
         """
         Parse and validate a BoreaConfig, resolving all paths.
 
         Args:
             config: The BoreaConfig to parse
+            fetcher: Fetcher of URLs
 
         Returns:
             BoreaConfig: A new config with resolved paths
@@ -101,9 +125,12 @@ class ConfigParser:
             ConfigError: If any required paths cannot be resolved
         """
         return BoreaConfig(
-            input=cls.parse_input_config(config.input),
+            input=cls.parse_input_config(config.input, fetcher),
             output=cls.parse_output_config(config.output),
             ignores=config.ignores,  # Keep ignores as is since they're glob patterns
+            jobs=config.jobs,
+            cacheDir=config.cacheDir,
+            outputCache=config.outputCache,
         )
 
     @staticmethod
@@ -115,7 +142,10 @@ class ConfigParser:
 
     @classmethod
     def load_config_from_source(
-        cls, source: str, is_default: bool = False
+        cls,
+        source: str,
+        is_default: bool = False,
+        fetcher: Optional[HttpFetcher] = None,
     ) -> Optional[dict]:
         """
         Load configuration data from either a local file or URL.
@@ -123,6 +153,7 @@ class ConfigParser:
         Args:
             source: Path to local file or URL
             is_default: Whether this is loading the default config file
+            fetcher: Fetcher of URLs
 
         Returns:
             Optional[dict]: Loaded configuration data, or None if source doesn't exist and is_default=True
@@ -131,7 +162,7 @@ class ConfigParser:
             ConfigError: If the config cannot be loaded/parsed, or if a non-default config doesn't exist
         """
         try:
-            content_loader = ContentLoader()
+            content_loader = ContentLoader(fetcher)
             return content_loader.load_json(source)
         except ContentLoadError as e:
             if is_default:
@@ -142,7 +173,12 @@ class ConfigParser:
             raise ConfigError(f"Error loading config from {source}: {str(e)}")
 
     @classmethod
-    def from_source(cls, source: str, default_source: str) -> BoreaConfig:
+    def from_source(
+        cls,
+        source: str,
+        default_source: str,
+        fetcher: Optional[HttpFetcher] = None,
+    ) -> BoreaConfig:
         """
         Create a BoreaConfig from either a local file or URL.
         If the user provided source it loads it or fails to.
@@ -151,6 +187,7 @@ class ConfigParser:
         Args:
             source: Path to local file or URL containing the configuration
             default_source: Path to default config file
+            fetcher: Fetcher of URLs
 
         Returns:
             BoreaConfig: Parsed and validated configuration
@@ -160,16 +197,44 @@ class ConfigParser:
         """
         source = source or default_source
         is_default = bool(source)
-        config_data = cls.load_config_from_source(source, is_default=is_default)
+        config_data = cls.load_config_from_source(
+            source, is_default=is_default, fetcher=fetcher
+        )
 
         if config_data is not None:
             try:
                 # First validate against BoreaConfigJSON model
                 json_config = BoreaConfigJSON.model_validate(config_data)
                 # Then parse and convert to BoreaConfig model
-                parsed_config: BoreaConfig = cls.parse_config(json_config)
+                parsed_config: BoreaConfig = cls.parse_config(json_config, fetcher)
                 return parsed_config
             except Exception as e:
                 raise ConfigError(f"Failed to validate config: {str(e)}")
 
         return cls.get_default_config()
+
+    @classmethod
+    def load_batch_config(
+        cls, source: str, fetcher: Optional[HttpFetcher] = None
+    ) -> BatchConfigJSON:
+        """
+        Load a batch configuration from either a local file or URL.
+
+        Paths of the targets are resolved when each target is generated, so one
+        unreachable spec does not fail the whole batch.
+
+        Args:
+            source: Path to local file or URL containing the batch configuration
+            fetcher: Fetcher of URLs
+
+        Returns:
+            BatchConfigJSON: Validated batch configuration
+
+        Raises:
+            ConfigError: If the batch configuration cannot be loaded or validated
+        """
+        config_data = cls.load_config_from_source(source, fetcher=fetcher)
+        try:
+            return BatchConfigJSON.model_validate(config_data)
+        except Exception as e:
+            raise ConfigError(f"Failed to validate batch config: {str(e)}")
@@ -1,13 +1,21 @@
 """Module for handling content loading from URLs and files."""
 
 import json
-from typing import Any, Dict
-from urllib.request import urlopen
+import os
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlparse
 
 import yaml
 
+from .http_fetcher import HttpFetcher
 from .path_validator import PathValidator
 
+# The libyaml based loader is an order of magnitude faster than the pure Python one
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+JSON_EXTENSIONS = {".json"}
+
 
 class ContentLoadError(Exception):
     """Exception raised for content loading errors."""
@@ -15,41 +23,188 @@ class ContentLoadError(Exception):
     pass
 
 
+class LoadedDocument:
+    """A structured document (JSON or YAML) that was fetched and parsed once."""
+
+    def __init__(
+        self,
+        source: str,
+        source_type: str,
+        content: Union[str, bytes],
+        data: Any,
+        content_format: Optional[str] = None,
+        load_seconds: float = 0.0,
+        parse_seconds: float = 0.0,
+    ):
+        """
+        Initialize the LoadedDocument.
+
+        Args:
+            source: URL or file path the document was loaded from
+            source_type: Type of the source ('url', 'file', or 'memory' for
+                documents derived from a loaded document)
+            content: The raw text of the document, or its UTF-8 bytes which are
+                decoded when the text is first needed
+            data: The parsed data structure
+            content_format: Format the document was parsed as ('json' or 'yaml')
+            load_seconds: Time spent reading the document
+            parse_seconds: Time spent parsing the document
+        """
+        self.source = source
+        self.source_type = source_type
+        self._content = content
+        self.data = data
+        self.content_format = content_format
+        self.load_seconds = load_seconds
+        self.parse_seconds = parse_seconds
+
+    @property
+    def content(self) -> str:
+        """The raw text of the document, with universal newlines."""
+        if isinstance(self._content, bytes):
+            self._content = (
+                self._content.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+            )
+        return self._content
+
+    def summary(self) -> str:
+        """Describe the format, size and load and parse times of the document."""
+        size = len(self._content) / (1024 * 1024)
+        return (
+            f"{self.content_format or 'unknown'}, {size:.1f} MB, "
+            f"read in {self.load_seconds:.2f}s, parsed in {self.parse_seconds:.2f}s"
+        )
+
+
 class ContentLoader:
     """Class to handle loading content from URLs or files and writing data to files."""
 
-    def __init__(self):
-        """Initialize the ContentLoader with a PathValidator."""
+    def __init__(self, fetcher: Optional[HttpFetcher] = None):
+        """
+        Initialize the ContentLoader with a PathValidator.
+
+        Args:
+            fetcher: Fetcher of URLs, defaults to one without a cache
+        """
         self.validator = PathValidator()
+        self.fetcher = fetcher or HttpFetcher()
 
-    def load_content(self, path: str, encoding: str = "utf-8") -> str:
+    def load_bytes(self, path: str) -> Tuple[bytes, Optional[str]]:
         """
-        Load content from a URL or file path.
+        Load the raw bytes of a URL or file path.
+
+        Files are read with a single binary read, the parsers accept bytes, so
+        the content does not have to be decoded to parse it.
 
         Args:
             path: URL or file path to load content from
-            encoding: Character encoding to use when reading content (default: utf-8)
 
         Returns:
-            str: The loaded content
+            Tuple[bytes, Optional[str]]: The content and, for URLs, its content type
 
         Raises:
             ContentLoadError: If the content cannot be loaded
         """
-        is_valid, path_type, error = self.validator.validate(path)
+        # The request itself checks if a URL is reachable
+        is_valid, path_type, error = self.validator.validate(
+            path, check_reachable=False
+        )
         if not is_valid:
             raise ContentLoadError(f"Invalid path: {error}")
 
         try:
             if path_type == "url":
-                with urlopen(path, timeout=5) as response:
-                    return response.read().decode(encoding)
+                return self.fetcher.fetch(path)
             else:  # path_type == "file"
-                with open(path, "r", encoding=encoding) as f:
-                    return f.read()
+                with open(path, "rb") as f:
+                    return f.read(), None
         except Exception as e:
             raise ContentLoadError(f"Failed to load content from {path}: {str(e)}")
 
+    def load_content(self, path: str, encoding: str = "utf-8") -> str:
+        """
+        Load content from a URL or file path.
+
+        Args:
+            path: URL or file path to load content from
+            encoding: Character encoding to use when reading content (default: utf-8)
+
+        Returns:
+            str: The loaded content
+
+        Raises:
+            ContentLoadError: If the content cannot be loaded
+        """
+        content, _ = self.load_bytes(path)
+        try:
+            text = content.decode(encoding)
+        except UnicodeDecodeError as e:
+            raise ContentLoadError(f"Failed to load content from {path}: {str(e)}")
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    @staticmethod
+    def sniff_format(
+        path: str, content: Union[str, bytes], content_type: Optional[str] = None
+    ) -> str:
+        """
+        Guess the format of a document without parsing it.
+
+        Content starting with an object or array is JSON, a YAML document that
+        starts like that would almost always be valid JSON too. Otherwise the
+        extension of the path and the content type of a URL decide, so only
+        documents labeled as JSON are tried as JSON first.
+
+        Args:
+            path: URL or file path of the document
+            content: The content of the document
+            content_type: Content type of a URL, if known
+
+        Returns:
+            str: 'json' or 'yaml'
+        """
+        head = content[:1024].lstrip()
+        if isinstance(head, bytes):
+            head = head.lstrip(b"\xef\xbb\xbf").decode("utf-8", "ignore")
+        if head[:1] in ("{", "["):
+            return "json"
+        extension = os.path.splitext(urlparse(path).path)[1].lower()
+        if extension in JSON_EXTENSIONS or (content_type and "json" in content_type):
+            return "json"
+        return "yaml"
+
+    def load_document(self, path: str) -> LoadedDocument:
+        """
+        Load and parse structured data (JSON or YAML) from a URL or file path,
+        keeping the raw content so later stages do not have to fetch it again.
+
+        Args:
+            path: URL or file path to load data from
+
+        Returns:
+            LoadedDocument: The raw content and the parsed data structure
+
+        Raises:
+            ContentLoadError: If the content cannot be loaded or parsed as JSON/YAML
+        """
+        _, path_type, _ = self.validator.validate(path, check_reachable=False)
+        start = time.perf_counter()
+        content, content_type = self.load_bytes(path)
+        load_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        content_format = self.sniff_format(path, content, content_type)
+        data, content_format = self._parse_structured_content(
+            content, path, content_format
+        )
+        return LoadedDocument(
+            source=path,
+            source_type=path_type,
+            content=content,
+            data=data,
+            content_format=content_format,
+            load_seconds=load_seconds,
+            parse_seconds=time.perf_counter() - start,
+        )
+
     def load_structured_data(self, path: str) -> Dict[str, Any]:
         """
         Load and parse structured data (JSON or YAML) from a URL or file path.
@@ -63,19 +218,43 @@ class ContentLoader:
         Raises:
             ContentLoadError: If the content cannot be loaded or parsed as JSON/YAML
         """
-        content = self.load_content(path)
+        content, content_type = self.load_bytes(path)
+        content_format = self.sniff_format(path, content, content_type)
+        data, _ = self._parse_structured_content(content, path, content_format)
+        return data
 
-        # Try JSON first
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            # If JSON fails, try YAML
+    def _parse_structured_content(
+        self, content: Union[str, bytes], path: str, content_format: str = "json"
+    ) -> Tuple[Any, str]:
+        """
+        Parse content in the sniffed format, falling back to YAML.
+
+        YAML is a superset of JSON, so YAML content is parsed by the YAML loader
+        only. JSON content that fails to parse, for example a mislabeled YAML
+        file, is parsed as YAML.
+
+        Args:
+            content: The content to parse
+            path: URL or file path the content was loaded from (used in error messages)
+            content_format: The sniffed format, 'json' or 'yaml'
+
+        Returns:
+            Tuple[Any, str]: The parsed data structure and the format it was parsed as
+
+        Raises:
+            ContentLoadError: If the content cannot be parsed as JSON/YAML
+        """
+        if content_format == "json":
             try:
-                return yaml.safe_load(content)
-            except yaml.YAMLError as e:
-                raise ContentLoadError(
-                    f"Content from {path} is neither valid JSON nor YAML: {str(e)}"
-                )
+                return json.loads(content), "json"
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                pass
+        try:
+            return yaml.load(content, Loader=YamlLoader), "yaml"
+        except yaml.YAMLError as e:
+            raise ContentLoadError(
+                f"Content from {path} is neither valid JSON nor YAML: {str(e)}"
+            )
 
     def load_json(self, path: str) -> Dict[str, Any]:
         """
@@ -111,6 +290,6 @@ class ContentLoader:
         """
         content = self.load_content(path)
         try:
-            return yaml.safe_load(content)
+            return yaml.load(content, Loader=YamlLoader)
         except yaml.YAMLError as e:
             raise ContentLoadError(f"Invalid YAML in {path}: {str(e)}")
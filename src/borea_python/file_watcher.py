@@ -0,0 +1,74 @@
+"""Module for watching input files for changes."""
+
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+FileState = Optional[Tuple[int, int]]
+
+
+class FileWatcher:
+    """
+    Watches files by polling their modification time and size.
+
+    Polling needs no extra dependencies and works the same on every platform.
+    Files that do not exist yet are watched too, creating them counts as a change.
+    """
+
+    def __init__(self, paths: List[str], interval: float = 0.2):
+        """
+        Initialize the FileWatcher.
+
+        Args:
+            paths: Paths of the files to watch
+            interval: Seconds between polls
+        """
+        self.paths = list(dict.fromkeys(paths))
+        self.interval = interval
+        self.states: Dict[str, FileState] = self.poll()
+
+    @staticmethod
+    def _state(path: str) -> FileState:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self) -> Dict[str, FileState]:
+        """Return the current state of all watched files."""
+        return {path: self._state(path) for path in self.paths}
+
+    def changed(self) -> List[str]:
+        """
+        Return the files that changed since the last call and remember their state.
+
+        Returns:
+            List[str]: Paths of the changed files
+        """
+        states = self.poll()
+        changed = [path for path in self.paths if states[path] != self.states[path]]
+        self.states = states
+        return changed
+
+    def wait_for_change(self) -> List[str]:
+        """
+        Block until at least one watched file changed.
+
+        Editors often write a file in several steps, so polling continues until
+        the files did not change for one interval.
+
+        Returns:
+            List[str]: Paths of the changed files
+        """
+        while True:
+            time.sleep(self.interval)
+            changed = self.changed()
+            if not changed:
+                continue
+            while True:
+                time.sleep(self.interval)
+                more = self.changed()
+                if not more:
+                    return changed
+                changed = list(dict.fromkeys(changed + more))
@@ -1,21 +1,142 @@
 import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import click
 
+from .content_loader import LoadedDocument
+from .model_generator import ModelGenerator
+
+MANIFEST_DIR = ".borea"
+MANIFEST_FILE = "manifest.json"
+
 
 class ConfigurableFileWriter:
     """A file writer that respects ignore patterns specified in a config file."""
 
-    def __init__(self, ignores: List[str] = None):
+    def __init__(
+        self,
+        ignores: List[str] = None,
+        manifest_root: Optional[str] = None,
+        hash_salt: str = "",
+    ):
         """
         Initialize the file writer with ignore patterns.
 
         Args:
             ignores: List of ignore patterns
+            manifest_root: Optional output root directory. When set, a hash manifest
+                is kept in <manifest_root>/.borea/manifest.json, unchanged files are
+                not rewritten and stale files from the previous run can be pruned.
+                Files edited since the previous run are written again.
+            hash_salt: Mixed into the manifest hashes, for what happens to files
+                after they are written. Files hashed with another salt are
+                written again.
         """
         self.ignore_patterns: List[str] = ignores or []
+        self.hash_salt = hash_salt
+        self.manifest_root: Optional[Path] = (
+            Path(manifest_root) if manifest_root is not None else None
+        )
+        previous = self._load_manifest()
+        self.previous_manifest: Dict[str, str] = previous.get("files", {})
+        # Size and modification time of the files on disk at the end of the previous run
+        self.previous_stats: Dict[str, List[int]] = previous.get("stats", {})
+        self.manifest: Dict[str, str] = {}
+        self.written: List[str] = []
+        self.skipped: List[str] = []
+        self.removed: List[str] = []
+        # Called with the path, size in bytes and whether a file was written or unchanged
+        self.on_write: Optional[Callable[[str, int, bool], None]] = None
+        # Files are written from concurrent generation phases
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> Optional[Path]:
+        if self.manifest_root is None:
+            return None
+        return self.manifest_root / MANIFEST_DIR / MANIFEST_FILE
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Load the hash manifest of the previous run, if there is one."""
+        manifest_path = self.manifest_path
+        if manifest_path is None or not manifest_path.exists():
+            return {}
+        try:
+            with open(manifest_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            click.echo(f"Ignoring unreadable manifest {manifest_path}: {e}")
+            return {}
+
+    def _manifest_key(self, path: str) -> str:
+        """Return the manifest key of a path, relative to the manifest root if possible."""
+        path: Path = Path(path)
+        try:
+            return path.relative_to(self.manifest_root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def _path_of_key(self, key: str) -> Path:
+        """Return the path of a manifest key, see _manifest_key."""
+        if Path(key).is_absolute():
+            return Path(key)
+        return self.manifest_root / key
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[List[int]]:
+        """Return the size and modification time of a file, None if it is missing."""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _is_untouched(self, path: str, key: str) -> bool:
+        """Check if a file is still on disk as the previous run left it."""
+        stats = self.previous_stats.get(key)
+        return stats is not None and self._stat(Path(path)) == stats
+
+    def _hash_content(self, content: str) -> str:
+        digest = hashlib.sha256(self.hash_salt.encode("utf-8"))
+        digest.update(content.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _is_unchanged(self, path: str, key: str, content_hash: str) -> bool:
+        """
+        Check if a file already has the given content.
+
+        The manifest is consulted first, so files reformatted after they were
+        written still count as unchanged, as long as they were not modified
+        since. Files without a manifest entry are compared with their content on
+        disk.
+        """
+        path: Path = Path(path)
+        if not path.is_file():
+            return False
+        if key in self.previous_manifest:
+            return self.previous_manifest[key] == content_hash and self._is_untouched(
+                str(path), key
+            )
+        try:
+            with open(path, "r") as f:
+                return self._hash_content(f.read()) == content_hash
+        except (OSError, UnicodeDecodeError):
+            return False
 
     def should_ignore(self, path: str) -> bool:
         """
@@ -29,10 +150,7 @@ class ConfigurableFileWriter:
             bool: True if the path should be ignored, False otherwise
         """
         path = str(Path(path))  # Normalize path separators
-        return any(
-            fnmatch.fnmatch(name=path, pattern=pattern)
-            for pattern in self.ignore_patterns
-        )
+        return any(fnmatch.fnmatch(path, pattern) for pattern in self.ignore_patterns)
 
     def create_directory(self, path: str) -> bool:
         """
@@ -84,24 +202,197 @@ class ConfigurableFileWriter:
         if not self.create_directory(str(parent)):
             return False
 
+        if self.manifest_root is not None and mode == "w":
+            key = self._manifest_key(path)
+            content_hash = self._hash_content(content)
+            with self._lock:
+                self.manifest[key] = content_hash
+            if self._is_unchanged(path, key, content_hash):
+                with self._lock:
+                    self.skipped.append(path)
+                self._notify_write(path, content, written=False)
+                return True
+
+        # Files restored from the output cache may be read-only hard links into
+        # the cache
+        if Path(path).is_file() and (
+            os.stat(path).st_nlink > 1 or not os.access(path, os.W_OK)
+        ):
+            os.unlink(path)
+
         # Write the file
         with open(path, mode) as f:
             f.write(content)
+        with self._lock:
+            self.written.append(path)
+        self._notify_write(path, content, written=True)
+        return True
+
+    def keep(self, path: str) -> bool:
+        """
+        Keep a file of the previous run as it is, without generating it again.
+
+        The file stays in the manifest, so it is not pruned as stale.
+
+        Args:
+            path: The path of the file
+
+        Returns:
+            bool: False if the file has to be generated, because it is ignored,
+                missing, modified or was not written by the previous run
+        """
+        if self.manifest_root is None or self.should_ignore(path):
+            return False
+        key = self._manifest_key(path)
+        content_hash = self.previous_manifest.get(key)
+        if content_hash is None or not self._is_untouched(path, key):
+            return False
+        with self._lock:
+            self.manifest[key] = content_hash
+            self.skipped.append(path)
+        if self.on_write is not None:
+            self.on_write(path, Path(path).stat().st_size, False)
+        return True
+
+    def restore(
+        self, path: str, source: Path, content_hash: str, link: bool = False
+    ) -> bool:
+        """
+        Place a file generated by an earlier run, for example from the output cache.
+
+        Args:
+            path: The path of the file
+            source: The file to copy or link
+            content_hash: Manifest hash of the file
+            link: Hard link the source instead of copying it, where possible
+
+        Returns:
+            bool: True if the file was placed or already up to date, False if
+                it is ignored or the source is missing
+        """
+        if self.should_ignore(path):
+            click.echo(f"Skipping ignored path: {path}")
+            return False
+        if not source.is_file() or not self.create_directory(str(Path(path).parent)):
+            return False
+
+        key = self._manifest_key(path)
+        with self._lock:
+            self.manifest[key] = content_hash
+        size = source.stat().st_size
+        if self.previous_manifest.get(key) == content_hash and self._is_untouched(
+            path, key
+        ):
+            with self._lock:
+                self.skipped.append(path)
+            if self.on_write is not None:
+                self.on_write(path, size, False)
+            return True
+
+        if os.path.lexists(path):
+            os.unlink(path)
+        try:
+            if not link:
+                raise OSError("copy requested")
+            os.link(source, path)
+        except OSError:
+            shutil.copyfile(source, path)
+        with self._lock:
+            self.written.append(path)
+        if self.on_write is not None:
+            self.on_write(path, size, True)
         return True
 
+    def _notify_write(self, path: str, content: str, written: bool) -> None:
+        if self.on_write is not None:
+            self.on_write(path, len(content.encode("utf-8")), written)
+
+    def prune_stale_files(self) -> List[str]:
+        """
+        Remove files written by the previous run that were not written by this run.
+
+        Ignored paths are never removed. Directories left empty are removed too.
+
+        Returns:
+            List[str]: The removed file paths
+        """
+        if self.manifest_root is None:
+            return []
+
+        for key in sorted(set(self.previous_manifest) - set(self.manifest)):
+            path = self._path_of_key(key)
+            if self.should_ignore(str(path)) or not path.is_file():
+                continue
+            path.unlink()
+            self.removed.append(str(path))
+            self._remove_empty_parents(path.parent)
+        return self.removed
+
+    def _remove_empty_parents(self, directory: Path) -> None:
+        """Remove empty directories up to, but excluding, the manifest root."""
+        root = self.manifest_root.resolve()
+        directory = directory.resolve()
+        while directory != root and root in directory.parents:
+            if self.should_ignore(str(directory)) or any(directory.iterdir()):
+                return
+            directory.rmdir()
+            directory = directory.parent
+
+    def save_manifest(self) -> None:
+        """
+        Store the hashes of all files of this run for the next run.
+
+        The size and modification time of every file are stored too, once the
+        files are final (formatted), so files edited later are detected.
+        """
+        manifest_path = self.manifest_path
+        if manifest_path is None:
+            return
+        stats = {}
+        for key in sorted(self.manifest):
+            stat = self._stat(self._path_of_key(key))
+            if stat is not None:
+                stats[key] = stat
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(manifest_path, "w") as f:
+            json.dump(
+                {"files": dict(sorted(self.manifest.items())), "stats": stats},
+                f,
+                indent=2,
+            )
+
+    def finalize(self) -> str:
+        """
+        Prune stale files, save the manifest and summarize the run.
+
+        Returns:
+            str: Summary of written, skipped and removed files
+        """
+        self.prune_stale_files()
+        self.save_manifest()
+        return (
+            f"{len(self.written)} written, {len(self.skipped)} unchanged, "
+            f"{len(self.removed)} removed"
+        )
+
     def generate_python_models(
-        self, models_dir: str, models_file: str, openapi_input: str
+        self,
+        models_dir: str,
+        models_file: str,
+        document: LoadedDocument,
+        model_generator: ModelGenerator,
     ) -> bool:
         """
-        Generate Python models using datamodel-codegen.
+        Generate Python models using datamodel-code-generator.
 
         Args:
             models_dir: Directory where models should be generated
-            models_file_path: Path to the generated models file
-            openapi_input: Path or URL to the OpenAPI spec
+            models_file: Name of the generated models file
+            document: The loaded OpenAPI spec
+            model_generator: Generator producing the models code
 
         Returns:
-            bool: True if models were generated, False if ignored
+            bool: True if models were generated, False if ignored or failed
         """
         if self.should_ignore(models_dir):
             click.echo(f"Skipping model generation: {models_dir} is ignored")
@@ -117,42 +408,10 @@ class ConfigurableFileWriter:
 
         self.write(str(Path(models_dir) / "__init__.py"), "")
 
-        import subprocess
-
-        cmd = [
-            "datamodel-codegen",
-            "--input-file-type",
-            "openapi",
-            "--input",
-            str(openapi_input),
-            "--output",
-            str(models_file_path),
-            "--use-standard-collections",
-            "--use-schema-description",
-            "--field-constraints",
-            "--strict-nullable",
-            "--wrap-string-literal",
-            "--enum-field-as-literal",
-            "one",
-            "--use-double-quotes",
-            "--use-default-kwarg",
-            "--use-annotated",
-            "--use-field-description",
-            "--output-model-type",
-            "pydantic_v2.BaseModel",
-            "--disable-timestamp",
-        ]
-
-        # Add --url flag if input is a URL
-        if openapi_input.startswith(("http://", "https://")):
-            cmd.extend(["--url", str(openapi_input)])
-
-        try:
-            subprocess.run(cmd, check=True)
-            return True
-        except subprocess.CalledProcessError as e:
-            click.echo(f"Error generating models: {e}")
+        models_code = model_generator.generate(document)
+        if models_code is None:
             return False
+        return self.write(str(models_file_path), models_code)
 
     @classmethod
     def from_click_context(
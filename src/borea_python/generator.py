@@ -1,17 +1,38 @@
+import copy
+import itertools
 import json
+import multiprocessing
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import click
 from jinja2 import Environment, FileSystemLoader
 
-from .content_loader import ContentLoader
-from .file_writer import ConfigurableFileWriter
+from .content_loader import ContentLoader, LoadedDocument
+from .file_writer import MANIFEST_DIR, ConfigurableFileWriter
 from .generate_method_metadata import GenerateMethodMetadata
 from .helpers import Helpers
+from .model_generator import ModelGenerator
 from .models.borea_config_models import BoreaConfig
 from .models.handler_class_models import (
     HandlerClassPyJinja,
+    MethodParameter,
 )
 from .models.openapi_models import (
     OpenAPIMetadata,
@@ -24,8 +45,60 @@ from .models.sdk_class_models import (
     SdkClassPyJinja,
 )
 from .models.tag_class_models import OperationMetadata, TagClassPyJinja
+from .openapi_parser import OpenAPIParser
+from .phase_scheduler import PhaseScheduler, PhaseTiming
+from .output_cache import OutputCache
+from .profiler import GenerationProfiler
+from .ref_graph import RefGraph
+from .shards import ShardError, ShardManifest, ShardSet, shard_of
+from .spec_snapshot import (
+    COMPONENTS,
+    OPERATIONS,
+    SDK,
+    SETTINGS,
+    SNAPSHOT_FILE,
+    TAGS,
+    SnapshotDiff,
+    SpecSnapshot,
+)
 from .x_code_sample_generator import XCodeSampleGenerator
 
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+
+# Names the handler template may import from typing, in import order
+TYPING_IMPORTS = [
+    "Any",
+    "AsyncIterator",
+    "Dict",
+    "Iterator",
+    "List",
+    "Optional",
+    "Union",
+    "TYPE_CHECKING",
+]
+
+# Render arguments (None if the file is unchanged) and path of every handler file
+# of an operation, and the path of its test
+PlannedHandler = Tuple[List[Tuple[Optional[Dict[str, Any]], str]], Optional[str]]
+
+ASYNC_FILE_SUFFIX = "_async"
+# Client variants generated for each client setting, False is sync and True async
+CLIENT_VARIANTS = {"sync": [False], "async": [True], "both": [False, True]}
+
+# Generator instance shared by the handler rendering worker processes
+_worker_generator: Optional["SDKGenerator"] = None
+
+
+def _init_handler_worker(generator: "SDKGenerator") -> None:
+    """Store the generator in a worker process so it is only pickled once."""
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _render_handler_in_worker(handler_kwargs: Dict[str, Any]) -> Tuple[str, float]:
+    """Render a handler class in a worker process."""
+    return _worker_generator._render_handler(handler_kwargs)
+
 
 class SDKGenerator:
     def __init__(
@@ -36,15 +109,81 @@ class SDKGenerator:
         generate_tests: bool,
         generate_x_code_samples: bool,
         borea_config: BoreaConfig,
+        jobs: int = 1,
+        document: Optional[LoadedDocument] = None,
+        cache_dir: Optional[str] = None,
+        format_code: bool = True,
+        profiler: Optional[GenerationProfiler] = None,
+        env: Optional[Environment] = None,
+        model_generator: Optional[ModelGenerator] = None,
+        incremental: bool = True,
+        shard: Optional[Tuple[int, int]] = None,
+        shard_set: Optional[ShardSet] = None,
+        output_cache: Optional[OutputCache] = None,
+        parser: Optional[OpenAPIParser] = None,
+        client: str = "sync",
     ):
         self.metadata = metadata
+        self.document = document
         self.output_dir = output_dir
         self.models_dir = models_dir
         self.generate_tests = generate_tests
         self.generate_x_code_samples = generate_x_code_samples
-        self.template_dir = Path(__file__).parent / "templates"
-        self.env = Environment(loader=FileSystemLoader(str(self.template_dir)))
-        self.file_writer = ConfigurableFileWriter(ignores=borea_config.ignores)
+        self.jobs = max(1, jobs)
+        self.format_code = format_code
+        self.incremental = incremental
+        self.snapshot_path = Path(output_dir) / MANIFEST_DIR / SNAPSHOT_FILE
+        # Index and count of the shard of handlers to render, see generate
+        self.shard = shard
+        # Shards providing the rendered handlers when merging
+        self.shard_set = shard_set
+        self.output_cache = output_cache
+        # Parser streaming the operations, instead of the operations of the metadata
+        self.parser = parser
+        # Generate the sync client, the async client or both
+        self.client = client
+        self.client_variants = CLIENT_VARIANTS[client]
+        # A shared environment keeps compiled templates between runs
+        self.env = env or self.create_environment()
+        self.file_writer = ConfigurableFileWriter(
+            ignores=borea_config.ignores,
+            manifest_root=str(output_dir),
+            # Hashes are taken before ruff runs, formatted files differ on disk
+            hash_salt="ruff" if format_code else "",
+        )
+        self.model_generator = model_generator or ModelGenerator(cache_dir=cache_dir)
+        self.phase_timings: Dict[str, PhaseTiming] = {}
+        self.profiler = profiler
+        if profiler is not None:
+            self.file_writer.on_write = profiler.record_write
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The Jinja environment is not picklable, workers create their own
+        state = self.__dict__.copy()
+        del state["env"]
+        # Workers only render, measurements are taken in the main process
+        state["profiler"] = None
+        state["file_writer"] = None
+        state["parser"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.env = self.create_environment()
+
+    @staticmethod
+    def create_environment() -> Environment:
+        """Create the Jinja environment of the generator templates."""
+        return Environment(loader=FileSystemLoader(str(TEMPLATE_DIR)))
+
+    @staticmethod
+    def _client_file_suffix(is_async: bool) -> str:
+        return ASYNC_FILE_SUFFIX if is_async else ""
+
+    @staticmethod
+    def _client_key(key: str, is_async: bool) -> str:
+        """Return the snapshot key of a file of a client variant."""
+        return f"async:{key}" if is_async else key
 
     @classmethod
     def _get_tag_formats(self, tag: str) -> Tuple[str, str, str]:
@@ -53,14 +192,21 @@ class SDKGenerator:
         tag_filename = tag_dir
         return tag_dir, tag_class_name, tag_filename
 
+    def _load_document(self) -> LoadedDocument:
+        """Return the loaded OpenAPI document, loading it if it was not passed in."""
+        if self.document is None:
+            content_loader = ContentLoader()
+            self.document = content_loader.load_document(self.metadata.openapi_input)
+        return self.document
+
     def _generate_models(self, models_dir: str, models_filename: str, file_ext: str):
         """Generate Pydantic models using datamodel-code-generator"""
-        openapi_input = self.metadata.openapi_input
         models_file = models_filename + file_ext
         self.file_writer.generate_python_models(
             models_dir=models_dir,
             models_file=models_file,
-            openapi_input=openapi_input,
+            document=self._load_document(),
+            model_generator=self.model_generator,
         )
 
     def _generate_handler_class(
@@ -72,6 +218,7 @@ class SDKGenerator:
         operation_metadata: OperationMetadata,
         models_dir: str,
         models_filename: str,
+        is_async: bool = False,
     ) -> str:
         """Generate the handler for a specific path / operation in OpenAPI"""
         op = operation
@@ -99,16 +246,58 @@ class SDKGenerator:
                 model_filename = Helpers.clean_schema_name(param.schema_type)
                 model_filenames.append(model_filename)
 
+        # JSON responses of a schema are parsed into its type
+        return_type = "Any"
+        response_validator = None
+        response = op.response
+        if response and response.is_json and response.type_is_schema:
+            return_type, is_model, models = self._schema_type(response.type)
+            model_filenames.extend(m for m in models if m not in model_filenames)
+            if response.is_array:
+                return_type = f"List[{return_type}]"
+            if is_model and not response.is_array:
+                response_validator = f"{return_type}.model_validate_json"
+            else:
+                response_validator = "_RESPONSE_ADAPTER.validate_json"
+
+        # Streamed responses get a second method yielding records or chunks
+        stream_kind = response.stream_kind if response else None
+        stream_type = None
+        stream_validator = None
+        if stream_kind == "bytes":
+            stream_type = "bytes"
+        elif stream_kind == "records":
+            stream_type = "Any"
+            if response.stream_type_is_schema:
+                stream_type, is_model, models = self._schema_type(response.stream_type)
+                model_filenames.extend(m for m in models if m not in model_filenames)
+                stream_validator = (
+                    f"{stream_type}.model_validate_json"
+                    if is_model
+                    else "_RECORD_ADAPTER.validate_json"
+                )
+        used_types = return_type
+        if stream_type is not None:
+            iterator = "AsyncIterator" if is_async else "Iterator"
+            used_types += f" {iterator}[{stream_type}]"
+            if stream_kind == "bytes":
+                # Type of the chunk_size parameter
+                used_types += " Optional[int]"
+
         handler_metadata = HandlerClassPyJinja(
             models_dir=models_dir,
             models_filename=models_filename,
             model_filenames=model_filenames,
+            typing_imports=self._get_typing_imports(
+                required_method_params, optional_method_params, used_types
+            ),
             parent_class_name=parent_class_name,
             parent_filename=parent_filename,
             is_operation_without_tag=is_operation_without_tag,
             class_name=operation_metadata.handler_class_name,
             method_name=operation_metadata.handler_filename,
             description=op.description,
+            summary=op.summary,
             required_method_params=required_method_params,
             optional_method_params=optional_method_params,
             http_method=op.method.upper(),
@@ -116,12 +305,121 @@ class SDKGenerator:
             http_params=http_params,
             request_body=request_body,
             nested_schema=schema,
+            return_type=return_type,
+            response_validator=response_validator,
+            stream_kind=stream_kind,
+            stream_type=stream_type,
+            stream_validator=stream_validator,
+            is_async=is_async,
         ).model_dump()
 
         return self._render_code(
             "handler_class.py.jinja", template_metadata=handler_metadata
         )
 
+    def _schema_type(self, schema_name: str) -> Tuple[str, bool, List[str]]:
+        """
+        Return the Python type JSON of a component schema is parsed into.
+
+        Only object schemas are generated as pydantic models, enums are generated
+        as Enum classes. Other schemas are generated as root models, their JSON is
+        parsed into the root type, so callers get the value itself.
+
+        Args:
+            schema_name: Name of the component schema
+
+        Returns:
+            Tuple[str, bool, List[str]]: The type, whether it is a pydantic model
+                with model_validate_json and the models the type uses
+        """
+        model = Helpers.clean_schema_name(schema_name)
+        schema = self.metadata.components.schemas.get(schema_name, {})
+        if "enum" in schema:
+            return model, False, [model]
+        if (
+            "properties" in schema
+            or "allOf" in schema
+            or (schema.get("type") == "object" and "additionalProperties" not in schema)
+        ):
+            return model, True, [model]
+        root_type = Helpers.format_type(schema)[0]
+        used_names = set(re.findall(r"\w+", root_type))
+        models = [
+            Helpers.clean_schema_name(name)
+            for name in RefGraph.collect_refs(schema)
+            if Helpers.clean_schema_name(name) in used_names
+        ]
+        return root_type, False, models
+
+    @staticmethod
+    def _get_typing_imports(
+        required_method_params: List[MethodParameter],
+        optional_method_params: List[MethodParameter],
+        return_types: str = "Any",
+    ) -> List[str]:
+        """Return the typing names used by a handler, so no unused imports are emitted"""
+        param_types = " ".join(
+            param.type for param in required_method_params + optional_method_params
+        )
+        used_names = set(re.findall(r"\w+", f"{param_types} {return_types}"))
+        if optional_method_params:
+            used_names.add("Optional")
+        used_names.add("TYPE_CHECKING")
+        return [name for name in TYPING_IMPORTS if name in used_names]
+
+    def _render_handler(self, handler_kwargs: Dict[str, Any]) -> Tuple[str, float]:
+        """Render a handler class, returning the code and the render time in seconds"""
+        start = time.perf_counter()
+        code = self._generate_handler_class(**handler_kwargs)
+        return code, time.perf_counter() - start
+
+    def _render_handlers(
+        self, handler_kwargs: Iterable[Dict[str, Any]]
+    ) -> Iterable[Tuple[str, float]]:
+        """
+        Render handler classes, in worker processes when more than one job is configured.
+
+        Results are returned in the same order as handler_kwargs, so the output
+        does not depend on the number of jobs. A list is rendered in chunks, other
+        iterables are consumed lazily with a bounded number of handlers in flight.
+        """
+        if self.jobs <= 1 or (
+            isinstance(handler_kwargs, list) and len(handler_kwargs) <= 1
+        ):
+            return (self._render_handler(kwargs) for kwargs in handler_kwargs)
+        return self._render_handlers_in_pool(handler_kwargs)
+
+    def _render_handlers_in_pool(
+        self, handler_kwargs: Iterable[Dict[str, Any]]
+    ) -> Iterator[Tuple[str, float]]:
+        # The pool is started from a phase scheduler thread, forking a process
+        # with other threads running can copy their held locks into the workers
+        start_method = (
+            "forkserver"
+            if "forkserver" in multiprocessing.get_all_start_methods()
+            else "spawn"
+        )
+        with ProcessPoolExecutor(
+            max_workers=self.jobs,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_handler_worker,
+            initargs=(self,),
+        ) as executor:
+            if isinstance(handler_kwargs, list):
+                chunksize = max(1, len(handler_kwargs) // (self.jobs * 4))
+                yield from executor.map(
+                    _render_handler_in_worker, handler_kwargs, chunksize=chunksize
+                )
+                return
+
+            pending: Deque[Future] = deque()
+            for kwargs in handler_kwargs:
+                pending.append(executor.submit(_render_handler_in_worker, kwargs))
+                if len(pending) >= self.jobs * 4:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
     def _generate_tag_class(
         self,
         parent_class_name: str,
@@ -131,6 +429,7 @@ class SDKGenerator:
         operation_metadata: List[OperationMetadata],
         models_dir: str,
         models_filename: str,
+        is_async: bool = False,
     ) -> str:
         template_metadata = TagClassPyJinja(
             models_dir=models_dir,
@@ -140,6 +439,7 @@ class SDKGenerator:
             class_name=tag_class_name,
             description=tag_description,
             operation_metadata=operation_metadata,
+            is_async=is_async,
         ).model_dump()
 
         return self._render_code(
@@ -153,6 +453,7 @@ class SDKGenerator:
         operations_without_tags: List[OperationMetadata],
         models_dir: str,
         models_filename: str,
+        is_async: bool = False,
     ) -> str:
         """Generate the base class for methods of tag in OpenAPI"""
         base_url = self.metadata.servers and self.metadata.servers[0].url or ""
@@ -167,16 +468,17 @@ class SDKGenerator:
             http_headers=http_headers,
             tags=tag_metadata,
             operation_metadata=operations_without_tags,
+            is_async=is_async,
         ).model_dump()
 
         return self._render_code(
             "sdk_class.py.jinja", template_metadata=template_metadata
         )
 
-    def _generate_schema_files(self, models_filename: str, file_ext: str) -> None:
+    def _generate_schema_files(
+        self, models_filename: str, file_ext: str, keep_unchanged: bool = False
+    ) -> None:
         """Generate individual schema files for each component in the models_output directory."""
-        self._create_directory(str(self.models_dir))
-
         schemas = {
             **self.metadata.components.schemas,
             # **self.metadata.components.securitySchemes,
@@ -185,6 +487,8 @@ class SDKGenerator:
         for schema_name, schema_data in schemas.items():
             file_name = Helpers.clean_schema_name(schema_name) + file_ext
             file_path = self.models_dir / file_name
+            if keep_unchanged and self.file_writer.keep(str(file_path)):
+                continue
             description = schema_data.get("description", "")
             description = Helpers.format_description(description)
 
@@ -202,11 +506,8 @@ class SDKGenerator:
 
     def _generate_requirements(self) -> str:
         """Generate requirements.txt with required dependencies using a template"""
-        from datetime import datetime
-
         template_metadata = {
             "package_name": self.metadata.info.title,
-            "generation_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         }
 
         return self._render_code(
@@ -244,7 +545,8 @@ class SDKGenerator:
         file_ext: str,
     ) -> Dict[str, Any]:
         code_sample_generator = XCodeSampleGenerator(
-            openapi_content=openapi_content,
+            # Code samples are added in place, keep the loaded document intact
+            openapi_content=copy.deepcopy(openapi_content),
             handler_file_paths_by_operation_id=handler_file_paths_by_operation_id,
             file_ext=file_ext,
         )
@@ -276,29 +578,90 @@ class SDKGenerator:
 
     def _write_and_format(self, file_path: str, file_content: str) -> None:
         self.file_writer.write(file_path, file_content)
-        # Helpers.run_ruff_on_path(file_path)
+
+    def _format_written_files(
+        self, src_dir: Path, skip: Optional[Set[str]] = None
+    ) -> None:
+        """Run ruff once over the Python files under src_dir written by this run"""
+        skip = skip or set()
+        paths = [
+            path
+            for path in list(self.file_writer.written)
+            if path.endswith(".py")
+            and src_dir in Path(path).parents
+            and path not in skip
+        ]
+        if not paths:
+            return
+        failures = Helpers.run_ruff_on_files(paths)
+        if failures:
+            click.echo(f"ruff could not fix {len(failures)} file(s):")
+            for path, problems in sorted(failures.items()):
+                click.echo(f"  {path}")
+                for problem in problems:
+                    click.echo(f"    {problem}")
 
     def generate(self) -> None:
-        """Generate the SDK."""
+        """
+        Generate the SDK.
+
+        Directories and the metadata of all files are prepared up front. The files
+        are then generated by phases that run concurrently where they do not
+        depend on each other.
+        """
         # Shared SDK class / file vars
         file_ext = ".py"
         parent_class_name = Helpers.clean_capitalize(self.metadata.info.title)
         sdk_class_filename = Helpers.clean_file_name(self.metadata.info.title)
-
-        # Create output directories
-        self.file_writer.create_directory(str(self.output_dir) or sdk_class_filename)
-
-        # Generate models
         models_dir_name = str(self.models_dir).split("/")[-1]
         models_filename = "models"
-        self._generate_models(
-            models_dir=str(self.models_dir),
-            models_filename=models_filename,
-            file_ext=file_ext,
+        settings = [
+            Helpers.generator_version(),
+            parent_class_name,
+            sdk_class_filename,
+            models_dir_name,
+            models_filename,
+            self.generate_tests,
+            self.generate_x_code_samples,
+            self.format_code,
+            self.client,
+        ]
+        # Outputs generated into different directories are the same
+        is_models_dir_in_output = self.output_dir in self.models_dir.parents
+        models_location = (
+            self.models_dir.relative_to(self.output_dir).as_posix()
+            if is_models_dir_in_output
+            else str(self.models_dir)
         )
 
-        # Generate schema files
-        self._generate_schema_files(models_filename=models_filename, file_ext=file_ext)
+        # Restore the output of an earlier run with the same inputs. Only complete
+        # SDKs with the models inside of the output directory are cached.
+        output_cache_key = None
+        if (
+            self.output_cache is not None
+            and self.shard is None
+            and self.shard_set is None
+            and is_models_dir_in_output
+        ):
+            output_cache_key = OutputCache.cache_key(
+                self._load_document().content,
+                settings + [models_location, self.file_writer.ignore_patterns],
+                TEMPLATE_DIR,
+                self.format_code,
+            )
+            if self.output_cache.restore(
+                output_cache_key, self.file_writer, self.output_dir
+            ):
+                file_summary = self.file_writer.finalize()
+                click.echo("Restored the SDK from the output cache")
+                click.echo(f"Files: {file_summary}")
+                return
+
+        # Create output directories
+        self.file_writer.create_directory(str(self.output_dir) or sdk_class_filename)
+
+        # Create models directory
+        self._create_directory(str(self.models_dir))
 
         # Generate src directory if needed
         src_dir = self.output_dir / "src"
@@ -309,10 +672,34 @@ class SDKGenerator:
         if self.generate_tests:
             self._create_directory(str(test_dir))
 
-        # Generate handlers (tag/<operation_id>/<operation_id>.py)
+        # Compare the inputs of the files with the previous run, unchanged files are kept
+        snapshot = SpecSnapshot()
+        snapshot.add(SETTINGS, "generator", settings + [models_location])
+        # The components are hashed as they are in the document, not as parsed, so
+        # the hash is the same whether the operations are parsed up front or streamed
+        snapshot.add(
+            COMPONENTS, "components", ModelGenerator.models_input(self._load_document())
+        )
+        previous_snapshot = (
+            SpecSnapshot.load(self.snapshot_path) if self.incremental else None
+        )
+        snapshot_diff = SnapshotDiff(
+            previous_snapshot, snapshot, full=not self.incremental
+        )
+
+        def is_unchanged(section: str, key: str, path: Path) -> bool:
+            return not snapshot_diff.is_changed(section, key) and self.file_writer.keep(
+                str(path)
+            )
+
+        # Plan handlers (tag/<operation_id>/<operation_id>.py)
         handler_file_paths_by_operation_id: Dict[str, str] = {}
         operation_metadata_by_tag: Dict[str, List[OperationMetadata]] = {}
-        for op in self.metadata.operations:
+        shard_files: List[str] = []
+        shard_operation_ids: List[str] = []
+
+        def plan_handler(op: Operation) -> Optional[PlannedHandler]:
+            """Record the metadata of an operation and plan the files of its handler."""
             operation_id = op.operation_id
             tag_name = op.tag
             tag_dir, tag_class_name, tag_filename = self._get_tag_formats(tag_name)
@@ -322,101 +709,282 @@ class SDKGenerator:
             handler_dir = handler_filename
             handler_file_dir_path = tag_dir_path / handler_dir
             self._create_directory(str(handler_file_dir_path))
-            handler_file = handler_filename + file_ext
-            handler_file_path = handler_file_dir_path / handler_file
             handler_class_name = Helpers.clean_capitalize(handler_filename)
             operation_metadata = OperationMetadata(
                 handler_dir=handler_dir,
                 handler_filename=handler_filename,
                 handler_class_name=handler_class_name,
+                has_stream=bool(op.response and op.response.stream_kind),
             )
-            operation_handler_content = self._generate_handler_class(
-                operation=op,
-                parent_class_name=parent_class_name,
-                parent_filename=sdk_class_filename,
-                is_operation_without_tag=is_operation_without_tag,
-                operation_metadata=operation_metadata,
-                models_dir=models_dir_name,
-                models_filename=models_filename,
-            )
-            handler_file_paths_by_operation_id[op.operation_id] = str(handler_file_path)
-            self._write_and_format(str(handler_file_path), operation_handler_content)
+            handler_file_paths = [
+                handler_file_dir_path
+                / (handler_filename + self._client_file_suffix(is_async) + file_ext)
+                for is_async in self.client_variants
+            ]
+            # Only x-codeSamples need the handler file of every operation
+            if self.generate_x_code_samples:
+                handler_file_paths_by_operation_id[operation_id] = str(
+                    handler_file_paths[0]
+                )
             if tag_name not in operation_metadata_by_tag:
                 operation_metadata_by_tag[tag_name] = []
             operation_metadata_by_tag[tag_name].append(operation_metadata)
+            handler_keys = [
+                handler_file_path.relative_to(self.output_dir).as_posix()
+                for handler_file_path in handler_file_paths
+            ]
+            for handler_key in handler_keys:
+                snapshot.add(OPERATIONS, handler_key, op.spec_hash or op)
+            is_in_shard = (
+                self.shard is None
+                or shard_of(operation_id, self.shard[1]) == self.shard[0]
+            )
+            if not is_in_shard:
+                return None
+            shard_files.extend(handler_keys)
+            shard_operation_ids.append(operation_id)
+            handlers = []
+            for is_async, handler_key, handler_file_path in zip(
+                self.client_variants, handler_keys, handler_file_paths
+            ):
+                kwargs = None
+                if not is_unchanged(OPERATIONS, handler_key, handler_file_path):
+                    kwargs = dict(
+                        # Rendering cleans the parameters of the operation in place
+                        operation=op.model_copy(deep=True) if handlers else op,
+                        parent_class_name=parent_class_name,
+                        parent_filename=sdk_class_filename,
+                        is_operation_without_tag=is_operation_without_tag,
+                        operation_metadata=operation_metadata,
+                        models_dir=models_dir_name,
+                        models_filename=models_filename,
+                        is_async=is_async,
+                    )
+                handlers.append((kwargs, str(handler_file_path)))
 
             # TODO: not implemented
             # Generate tests
+            handler_test_file_path = None
             if self.generate_tests:
                 tag_test_dir_path = test_dir / tag_dir
                 handler_test_file_dir_path = tag_test_dir_path / handler_filename
                 self._create_directory(str(handler_test_file_dir_path))
                 handler_test_file = handler_filename + "_test" + file_ext
-                handler_test_file_path = handler_test_file_dir_path / handler_test_file
-                test_content = ""
-                # test_content = self._generate_tests(tag, operations)
-                self._write_and_format(str(handler_test_file_path), test_content)
+                handler_test_file_path = str(
+                    handler_test_file_dir_path / handler_test_file
+                )
+            return handlers, handler_test_file_path
 
+        # Streamed operations are planned while the handlers phase consumes them
+        planned_handlers: List[PlannedHandler] = []
+        fingerprint = None
+        if self.parser is None:
+            for op in self.metadata.operations:
+                planned_handler = plan_handler(op)
+                if planned_handler is not None:
+                    planned_handlers.append(planned_handler)
+
+            # Shards and the merge of the shards have to render the same handlers
+            fingerprint = SpecSnapshot.hash_value(
+                [settings, snapshot.sections.get(OPERATIONS, {})]
+            )
+            if self.shard_set is not None and self.shard_set.fingerprint != fingerprint:
+                raise ShardError(
+                    "The shards were generated from a different spec or settings"
+                )
+
+        tag_kwargs: List[Dict[str, Any]] = []
+        tag_file_paths: List[str] = []
         tag_metadata: List[OpenAPITagMetadata] = []
-        for tag in self.metadata.tags:
-            tag_name = tag.name
-            if tag_name not in operation_metadata_by_tag:
-                continue
-            tag_description = tag.description
-            tag_dir, tag_class_name, tag_filename = self._get_tag_formats(tag_name)
-            operation_metadata = operation_metadata_by_tag[tag_name]
-            tag_dir_path = src_dir / tag_dir
-            tag_test_dir_path = test_dir / tag_dir
-            self._create_directory(str(tag_dir_path))
-            tag_file = tag_filename + file_ext
-            tag_file_path = tag_dir_path / tag_file
-            tag_class_content = self._generate_tag_class(
-                parent_class_name=parent_class_name,
-                sdk_class_filename=sdk_class_filename,
-                tag_class_name=tag_class_name,
-                tag_description=tag_description,
-                operation_metadata=operation_metadata,
-                models_dir=models_dir_name,
+        sdk_class_file_paths = {
+            is_async: src_dir
+            / (sdk_class_filename + self._client_file_suffix(is_async) + file_ext)
+            for is_async in self.client_variants
+        }
+        sdk_plan: Dict[str, Any] = {}
+
+        def plan_tags_and_sdk() -> None:
+            """Plan the tag classes and the SDK class, once all operations are known."""
+            # Plan tag classes (tag/<tag>.py)
+            for tag in self.metadata.tags:
+                tag_name = tag.name
+                if tag_name not in operation_metadata_by_tag:
+                    continue
+                tag_description = tag.description
+                tag_dir, tag_class_name, tag_filename = self._get_tag_formats(tag_name)
+                operation_metadata = operation_metadata_by_tag[tag_name]
+                tag_dir_path = src_dir / tag_dir
+                tag_test_dir_path = test_dir / tag_dir
+                self._create_directory(str(tag_dir_path))
+                for is_async in self.client_variants:
+                    tag_file = tag_filename + self._client_file_suffix(is_async)
+                    tag_file_path = tag_dir_path / (tag_file + file_ext)
+                    kwargs = dict(
+                        parent_class_name=parent_class_name,
+                        sdk_class_filename=sdk_class_filename,
+                        tag_class_name=tag_class_name,
+                        tag_description=tag_description,
+                        operation_metadata=operation_metadata,
+                        models_dir=models_dir_name,
+                        models_filename=models_filename,
+                        is_async=is_async,
+                    )
+                    tag_key = self._client_key(tag_name, is_async)
+                    snapshot.add(TAGS, tag_key, kwargs)
+                    if not is_unchanged(TAGS, tag_key, tag_file_path):
+                        tag_kwargs.append(kwargs)
+                        tag_file_paths.append(str(tag_file_path))
+                tag_metadata.append(
+                    OpenAPITagMetadata(
+                        tag=tag_name,
+                        tag_description=tag_description,
+                        tag_dir=tag_dir,
+                        tag_filename=tag_filename,
+                        tag_class_name=tag_class_name,
+                        tag_prop_name=tag_dir,
+                    )
+                )
+
+                if self.generate_tests:
+                    self._create_directory(str(tag_test_dir_path))
+
+            # Plan the SDK class (<sdk>.py)
+            operations_without_tags: List[
+                OperationMetadata
+            ] = operation_metadata_by_tag.get("", [])
+            sdk_plan["operations_without_tags"] = operations_without_tags
+            sdk_plan["changed"] = []
+            for is_async in self.client_variants:
+                sdk_key = self._client_key("sdk", is_async)
+                snapshot.add(
+                    SDK,
+                    sdk_key,
+                    [
+                        self.metadata.info,
+                        self.metadata.servers,
+                        self.metadata.headers,
+                        tag_metadata,
+                        operations_without_tags,
+                    ],
+                )
+                if not is_unchanged(SDK, sdk_key, sdk_class_file_paths[is_async]):
+                    sdk_plan["changed"].append(is_async)
+
+        if self.parser is None:
+            plan_tags_and_sdk()
+
+        # Models and schema files are generated from the components
+        components_changed = snapshot_diff.is_changed(COMPONENTS, "components")
+        models_file_path = self.models_dir / (models_filename + file_ext)
+
+        if self.parser is None:
+            click.echo(f"Changes: {snapshot_diff.summary()}")
+
+        def generate_models() -> None:
+            if not components_changed and self.file_writer.keep(str(models_file_path)):
+                return
+            self._generate_models(
+                models_dir=str(self.models_dir),
                 models_filename=models_filename,
+                file_ext=file_ext,
             )
-            self._write_and_format(str(tag_file_path), tag_class_content)
-            tag_metadata.append(
-                OpenAPITagMetadata(
-                    tag=tag_name,
-                    tag_description=tag_description,
-                    tag_dir=tag_dir,
-                    tag_filename=tag_filename,
-                    tag_class_name=tag_class_name,
-                    tag_prop_name=tag_dir,
-                )
+
+        def generate_schemas() -> None:
+            self._generate_schema_files(
+                models_filename=models_filename,
+                file_ext=file_ext,
+                keep_unchanged=not components_changed,
             )
 
-            if self.generate_tests:
-                self._create_directory(str(tag_test_dir_path))
+        merged_file_paths: Set[str] = set()
 
-        # Generate base client
-        operations_without_tags: List[
-            OperationMetadata
-        ] = operation_metadata_by_tag.get("", [])
-        sdk_class_content = self._generate_sdk_class(
-            parent_class_name=parent_class_name,
-            tag_metadata=tag_metadata,
-            operations_without_tags=operations_without_tags,
-            models_dir=models_dir_name,
-            models_filename=models_filename,
-        )
-        sdk_class_file = sdk_class_filename + file_ext
-        sdk_class_file_path = src_dir / sdk_class_file
-        self._write_and_format(str(sdk_class_file_path), sdk_class_content)
+        def handlers_to_render(
+            handlers: Iterable[PlannedHandler],
+        ) -> Iterator[Tuple[Dict[str, Any], str]]:
+            for handler_files, handler_test_file_path in handlers:
+                if handler_test_file_path is not None:
+                    test_content = ""
+                    # test_content = self._generate_tests(tag, operations)
+                    self._write_and_format(handler_test_file_path, test_content)
+                for kwargs, handler_file_path in handler_files:
+                    if kwargs is not None:
+                        yield kwargs, handler_file_path
 
-        # TODO: fix models so ruff check --fix doesn't remove imports
-        Helpers.run_ruff_on_path(str(src_dir))
+        def generate_handlers() -> None:
+            if self.parser is None:
+                handlers = list(handlers_to_render(planned_handlers))
+                handler_kwargs = [kwargs for kwargs, _ in handlers]
+            else:
+                # Every operation is parsed, rendered and written before the next
+                # one is parsed, only the metadata of the tag classes is kept
+                streamed_handlers = (
+                    planned_handler
+                    for planned_handler in map(
+                        plan_handler, self.parser.iter_operations()
+                    )
+                    if planned_handler is not None
+                )
+                handlers, pending_kwargs = itertools.tee(
+                    handlers_to_render(streamed_handlers)
+                )
+                handler_kwargs = (kwargs for kwargs, _ in pending_kwargs)
 
-        # TODO: move to pyproject.toml for easy SDK PyPi packaging
-        # Generate requirements.txt
-        requirements_path = self.output_dir / "requirements.txt"
-        requirements_content = self._generate_requirements()
-        self.file_writer.write(str(requirements_path), requirements_content)
+            if self.shard_set is not None:
+                # Handlers were rendered and formatted by the shards
+                for _, handler_file_path in handlers:
+                    handler_key = (
+                        Path(handler_file_path).relative_to(self.output_dir).as_posix()
+                    )
+                    self.file_writer.write(
+                        handler_file_path, self.shard_set.read(handler_key)
+                    )
+                    merged_file_paths.add(handler_file_path)
+            else:
+                rendered_handlers = self._render_handlers(handler_kwargs)
+                for (kwargs, handler_file_path), rendered_handler in zip(
+                    handlers, rendered_handlers
+                ):
+                    operation_handler_content, render_time = rendered_handler
+                    self._write_and_format(handler_file_path, operation_handler_content)
+                    if self.profiler is not None:
+                        self.profiler.record_operation(
+                            kwargs["operation"].operation_id, render_time
+                        )
+
+            if self.parser is not None:
+                # All operations are parsed, their headers and tags are known now
+                self.metadata.headers = self.parser.headers()
+                plan_tags_and_sdk()
+
+        def generate_tags() -> None:
+            for tag_file_path, kwargs in zip(tag_file_paths, tag_kwargs):
+                tag_class_content = self._generate_tag_class(**kwargs)
+                self._write_and_format(tag_file_path, tag_class_content)
+
+        def generate_sdk_class() -> None:
+            for is_async in sdk_plan["changed"]:
+                sdk_class_content = self._generate_sdk_class(
+                    parent_class_name=parent_class_name,
+                    tag_metadata=tag_metadata,
+                    operations_without_tags=sdk_plan["operations_without_tags"],
+                    models_dir=models_dir_name,
+                    models_filename=models_filename,
+                    is_async=is_async,
+                )
+                self._write_and_format(
+                    str(sdk_class_file_paths[is_async]), sdk_class_content
+                )
+
+        def format_code() -> None:
+            # Templates emit formatted code, ruff only cleans up what they cannot know.
+            # Models are left alone, ruff check --fix would remove their re-exports.
+            self._format_written_files(src_dir, skip=merged_file_paths)
+
+        def generate_requirements() -> None:
+            # TODO: move to pyproject.toml for easy SDK PyPi packaging
+            requirements_path = self.output_dir / "requirements.txt"
+            requirements_content = self._generate_requirements()
+            self.file_writer.write(str(requirements_path), requirements_content)
 
         # TODO: needs to be re-implemented
         # Generate README
@@ -424,19 +992,70 @@ class SDKGenerator:
         # readme_content = self._generate_readme(operations_by_tag)
         # self.file_writer.write(str(readme_path), readme_content)
 
-        # TODO: ask costumers if they want openapi.json ALWAYS output OR ONLY if it is being generated
-        # Load OpenAPI content
-        openapi_file = self.output_dir / "openapi.json"
-        content_loader = ContentLoader()
-        openapi_content = content_loader.load_structured_data(
-            self.metadata.openapi_input
-        )
-        # Add x-codeSamples to OpenAPI content
-        if self.generate_x_code_samples:
-            openapi_content = self._generate_x_code_samples(
-                openapi_content=openapi_content,
-                handler_file_paths_by_operation_id=handler_file_paths_by_operation_id,
-                file_ext=file_ext,
+        def generate_openapi() -> None:
+            # TODO: ask costumers if they want openapi.json ALWAYS output OR ONLY if it is being generated
+            openapi_file = self.output_dir / "openapi.json"
+            openapi_content = self._load_document().data
+            # Add x-codeSamples to OpenAPI content
+            if self.generate_x_code_samples:
+                openapi_content = self._generate_x_code_samples(
+                    openapi_content=openapi_content,
+                    handler_file_paths_by_operation_id=handler_file_paths_by_operation_id,
+                    file_ext=file_ext,
+                )
+            # Write OpenAPI content to file
+            self.file_writer.write(
+                str(openapi_file), json.dumps(openapi_content, indent=2)
+            )
+
+        # cProfile can only profile one phase at a time
+        collect_stats = self.profiler is not None and self.profiler.collect_stats
+        scheduler = PhaseScheduler(max_workers=1 if collect_stats else None)
+
+        def add_phase(name: str, func: Callable[[], None], depends_on=()) -> None:
+            if self.profiler is not None:
+                func = self.profiler.wrap(name, func)
+            scheduler.add(name, func, depends_on=depends_on)
+
+        if self.shard is not None:
+            # A shard only renders its handlers, the merge generates everything else
+            add_phase("handlers", generate_handlers)
+            if self.format_code:
+                add_phase("format", format_code, depends_on=["handlers"])
+        else:
+            add_phase("models", generate_models)
+            add_phase("schemas", generate_schemas)
+            add_phase("handlers", generate_handlers)
+            # Streamed tag classes and SDK class are planned by the handlers phase
+            depends_on = ["handlers"] if self.parser is not None else []
+            add_phase("tags", generate_tags, depends_on=depends_on)
+            add_phase("sdk", generate_sdk_class, depends_on=depends_on)
+            code_phases = ["handlers", "tags", "sdk"]
+            if self.format_code:
+                add_phase("format", format_code, depends_on=code_phases)
+                code_phases = ["format"]
+            add_phase("requirements", generate_requirements)
+            # x-codeSamples are read from the generated, formatted handler files
+            add_phase(
+                "openapi",
+                generate_openapi,
+                depends_on=code_phases if self.generate_x_code_samples else [],
+            )
+        self.phase_timings = scheduler.run()
+
+        # Remove files of operations that no longer exist and store hashes
+        file_summary = self.file_writer.finalize()
+        snapshot.save(self.snapshot_path)
+        if self.parser is not None:
+            click.echo(f"Changes: {snapshot_diff.summary()}")
+        if self.shard is not None:
+            index, count = self.shard
+            ShardManifest(index, count, fingerprint, shard_files).save(self.output_dir)
+            click.echo(
+                f"Shard {index}/{count}: {len(shard_operation_ids)} of "
+                f"{len(self.metadata.operations)} operations"
             )
-        # Write OpenAPI content to file
-        self.file_writer.write(str(openapi_file), json.dumps(openapi_content, indent=2))
+        if output_cache_key is not None:
+            self.output_cache.store(output_cache_key, self.file_writer, self.output_dir)
+        click.echo(f"Files: {file_summary}")
+        click.echo(f"Phases: {scheduler.summary()}")
@@ -1,5 +1,8 @@
+import hashlib
 import re
-from typing import Dict, Union
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Union
 
 import click
 
@@ -139,23 +142,89 @@ class Helpers:
         return [resolved_type, schema_type, type_is_schema]
 
     @staticmethod
-    def run_ruff_on_path(path: str):
-        import subprocess
+    @lru_cache(maxsize=None)
+    def generator_version() -> str:
+        """
+        Return the version of the generator, used to invalidate caches.
 
-        def ruff(*args: str):
-            subprocess.run(
-                ["ruff", *args],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
+        Source checkouts that are not installed use a hash of the package files instead.
+        """
+        from importlib.metadata import PackageNotFoundError, version
 
         try:
-            # TODO: get generated code good enough to be fixed
-            # Run ruff check (linting)
-            ruff("check", "--fix", path)
+            return version("borea_python")
+        except PackageNotFoundError:
+            pass
+
+        package_dir = Path(__file__).parent
+        digest = hashlib.sha256()
+        for path in sorted(package_dir.rglob("*")):
+            if path.is_file() and path.suffix in (".py", ".jinja"):
+                digest.update(path.relative_to(package_dir).as_posix().encode())
+                digest.update(path.read_bytes())
+        return f"source-{digest.hexdigest()[:16]}"
+
+    @staticmethod
+    def run_ruff_on_files(
+        paths: List[str], chunk_size: int = 500
+    ) -> Dict[str, List[str]]:
+        """
+        Run ruff check --fix and ruff format once over the given files.
+
+        Files are passed to ruff in chunks to stay below command line length limits.
+
+        Args:
+            paths: The Python files to fix and format
+            chunk_size: Maximum number of files per ruff invocation
+
+        Returns:
+            Dict[str, List[str]]: Problems ruff could not fix, by absolute file path
+        """
+        import json
+        import os
+        import subprocess
 
-            # Run ruff format (formatting)
-            ruff("format", path)
+        failures: Dict[str, List[str]] = {}
 
-        except subprocess.CalledProcessError as e:
-            click.echo(f"Error running ruff: {e}")
+        def add_failure(path: str, message: str):
+            failures.setdefault(os.path.abspath(path), []).append(message)
+
+        for i in range(0, len(paths), chunk_size):
+            chunk = paths[i : i + chunk_size]
+            try:
+                check = subprocess.run(
+                    ["ruff", "check", "--fix", "--output-format", "json", *chunk],
+                    capture_output=True,
+                    text=True,
+                )
+                format_ = subprocess.run(
+                    ["ruff", "format", *chunk],
+                    capture_output=True,
+                    text=True,
+                )
+            except OSError as e:
+                click.echo(f"Skipping formatting, could not run ruff: {e}")
+                return failures
+
+            try:
+                diagnostics = json.loads(check.stdout or "[]")
+            except ValueError:
+                diagnostics = []
+                if check.returncode != 0:
+                    click.echo(f"Error running ruff check: {check.stderr.strip()}")
+            for diagnostic in diagnostics:
+                location = diagnostic.get("location") or {}
+                add_failure(
+                    diagnostic["filename"],
+                    f"{location.get('row')}:{location.get('column')}: "
+                    f"{diagnostic['code']} {diagnostic['message']}",
+                )
+
+            # Syntax errors are already reported by ruff check
+            for line in format_.stderr.splitlines():
+                match = re.match(
+                    r"error: Failed to format (.+?)(?::\d+:\d+)?: (.*)", line
+                )
+                if match:
+                    add_failure(match.group(1), f"format: {match.group(2)}")
+        return failures
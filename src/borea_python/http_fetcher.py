@@ -0,0 +1,184 @@
+"""Module for fetching remote documents with a conditional HTTP cache."""
+
+import hashlib
+import json
+import os
+import time
+from email.message import Message
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import click
+
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_RETRIES = 2
+
+
+class FetchError(Exception):
+    """Exception raised when a URL can not be fetched."""
+
+    pass
+
+
+class HttpFetcher:
+    """
+    Fetches URLs with a timeout and retries, caching the responses on disk.
+
+    A cached response is stored with its ETag and Last-Modified headers and is
+    revalidated with a conditional request, so fetching an unchanged document
+    costs a 304 response instead of a download. In offline mode, or when the
+    server can not be reached, the cached copy is used.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        offline: bool = False,
+    ):
+        """
+        Initialize the HttpFetcher.
+
+        Args:
+            cache_dir: Directory of the cache, responses are not cached if None
+            timeout: Seconds to wait for the server to respond
+            retries: Number of retries after network errors and server errors
+            offline: Only use cached responses, never access the network
+        """
+        self.cache_dir = Path(cache_dir) / "http" if cache_dir else None
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.offline = offline
+
+    def _entry_paths(self, url: str) -> Tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def load_cached(self, url: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """
+        Load the cached response of a URL.
+
+        Args:
+            url: The URL
+
+        Returns:
+            Optional[Tuple[Dict[str, Any], bytes]]: The response headers and body,
+                or None if the URL is not cached
+        """
+        if self.cache_dir is None:
+            return None
+        entry_path, body_path = self._entry_paths(url)
+        try:
+            with open(entry_path, "r") as f:
+                entry = json.load(f)
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        # Entries are written in two steps, a concurrent run may have replaced the body
+        if (
+            entry.get("url") != url
+            or entry.get("sha256") != hashlib.sha256(body).hexdigest()
+        ):
+            return None
+        return entry, body
+
+    def is_cached(self, url: str) -> bool:
+        return self.load_cached(url) is not None
+
+    def _store(self, url: str, body: bytes, headers: Message) -> None:
+        entry = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "lastModified": headers.get("Last-Modified"),
+            "contentType": headers.get_content_type(),
+            "sha256": hashlib.sha256(body).hexdigest(),
+        }
+        entry_path, body_path = self._entry_paths(url)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_suffix = f".{os.getpid()}.tmp"
+            temp_body_path = body_path.with_suffix(temp_suffix)
+            temp_body_path.write_bytes(body)
+            os.replace(temp_body_path, body_path)
+            temp_entry_path = entry_path.with_suffix(temp_suffix)
+            with open(temp_entry_path, "w") as f:
+                json.dump(entry, f, indent=2)
+            os.replace(temp_entry_path, entry_path)
+        except OSError as e:
+            click.echo(f"Could not cache {url} in {self.cache_dir}: {e}")
+
+    def _request(
+        self, url: str, request_headers: Dict[str, str]
+    ) -> Tuple[int, bytes, Message]:
+        """Send a GET request, retrying network errors and server errors."""
+        for attempt in range(self.retries + 1):
+            try:
+                request = Request(url, headers=request_headers)
+                with urlopen(request, timeout=self.timeout) as response:
+                    return response.status, response.read(), response.headers
+            except HTTPError as e:
+                if e.code == 304:
+                    return e.code, b"", e.headers
+                is_retryable = e.code >= 500 or e.code == 429
+                if not is_retryable or attempt == self.retries:
+                    raise
+            except OSError:
+                # URLError, timeouts and connection resets
+                if attempt == self.retries:
+                    raise
+            time.sleep(min(0.5 * 2**attempt, 4.0))
+        raise FetchError(f"Failed to fetch {url}")
+
+    def fetch(self, url: str) -> Tuple[bytes, Optional[str]]:
+        """
+        Fetch a URL, revalidating or falling back to the cached response.
+
+        Args:
+            url: The URL
+
+        Returns:
+            Tuple[bytes, Optional[str]]: The body and its content type
+
+        Raises:
+            FetchError: If the URL is not cached in offline mode
+            OSError: If the URL can not be fetched and is not cached
+        """
+        cached = self.load_cached(url)
+        if self.offline:
+            if cached is None:
+                raise FetchError(f"{url} is not cached, it can not be fetched offline")
+            entry, body = cached
+            return body, entry.get("contentType")
+
+        request_headers = {}
+        if cached is not None:
+            entry, _ = cached
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("lastModified"):
+                request_headers["If-Modified-Since"] = entry["lastModified"]
+
+        try:
+            status, body, headers = self._request(url, request_headers)
+        except OSError as e:
+            # A client error is an answer, network and server errors and rate
+            # limits are not
+            is_client_error = (
+                isinstance(e, HTTPError) and e.code < 500 and e.code != 429
+            )
+            if cached is None or is_client_error:
+                raise
+            click.echo(f"Warning: could not fetch {url} ({e}), using the cached copy")
+            status = 304
+
+        if status == 304:
+            if cached is None:
+                raise FetchError(f"{url} returned 304 Not Modified for a new request")
+            entry, body = cached
+            return body, entry.get("contentType")
+        if self.cache_dir is not None:
+            self._store(url, body, headers)
+        return body, headers.get_content_type()
@@ -0,0 +1,244 @@
+"""Module for caching parsed OpenAPI metadata on disk."""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Type
+
+import click
+from pydantic import BaseModel
+
+from .content_loader import LoadedDocument
+from .helpers import Helpers
+from .models.openapi_models import (
+    Component,
+    HttpHeader,
+    HttpParameter,
+    Info,
+    OpenAPIMetadata,
+    OpenAPITag,
+    Operation,
+    ResponseMetadata,
+    SchemaMetadata,
+    Server,
+)
+
+DEFAULT_CACHE_DIR = ".borea/cache"
+IR_VERSION = 1
+# Models that can appear in serialized metadata, by name
+IR_MODELS: Dict[str, Type[BaseModel]] = {
+    model.__name__: model
+    for model in (
+        Component,
+        HttpHeader,
+        HttpParameter,
+        Info,
+        OpenAPIMetadata,
+        OpenAPITag,
+        Operation,
+        ResponseMetadata,
+        SchemaMetadata,
+        Server,
+    )
+}
+# Keys with a meaning in serialized metadata, dicts using them are written as
+# {"$dict": [[key, value], ...]}
+IR_KEYS = ("$def", "$define", "$model", "$dict")
+
+
+class _Encoder:
+    """
+    Converts metadata to JSON values, storing objects shared by several parents once.
+
+    Models are written as {"$model": name, "fields": {...}}. An object that is
+    referenced more than once is defined once in "$defs" as
+    {"$define": index, "value": ...} and replaced by {"$def": index} wherever it
+    is used. Definitions come after the definitions they use, so the JSON can be
+    decoded in a single pass, see _Decoder.
+    """
+
+    def __init__(self, root: Any):
+        self.references: Dict[int, int] = {}
+        self._count(root)
+        self.defs: List[Any] = []
+        self.def_indexes: Dict[int, int] = {}
+
+    def _count(self, value: Any) -> None:
+        stack = [value]
+        while stack:
+            value = stack.pop()
+            if not isinstance(value, (BaseModel, dict, list)):
+                continue
+            key = id(value)
+            self.references[key] = self.references.get(key, 0) + 1
+            if self.references[key] > 1:
+                continue
+            if isinstance(value, BaseModel):
+                stack.extend(value.__dict__.values())
+            elif isinstance(value, dict):
+                stack.extend(value.values())
+            else:
+                stack.extend(value)
+
+    def encode(self, value: Any) -> Any:
+        if not isinstance(value, (BaseModel, dict, list)):
+            return value
+        key = id(value)
+        if self.references.get(key, 0) <= 1:
+            return self._encode_object(value)
+        if key not in self.def_indexes:
+            encoded = self._encode_object(value)
+            self.def_indexes[key] = len(self.defs)
+            self.defs.append({"$define": self.def_indexes[key], "value": encoded})
+        return {"$def": self.def_indexes[key]}
+
+    def _encode_object(self, value: Any) -> Any:
+        if isinstance(value, BaseModel):
+            return {
+                "$model": type(value).__name__,
+                "fields": {
+                    name: self.encode(field) for name, field in value.__dict__.items()
+                },
+            }
+        if isinstance(value, dict):
+            if any(name in value for name in IR_KEYS):
+                return {
+                    "$dict": [[name, self.encode(item)] for name, item in value.items()]
+                }
+            return {name: self.encode(item) for name, item in value.items()}
+        return [self.encode(item) for item in value]
+
+
+class _Decoder:
+    """
+    Converts JSON written by _Encoder back to metadata while it is parsed.
+
+    JSON objects are decoded innermost first, in the order of the text, so the
+    definitions an object uses are always decoded before it.
+    """
+
+    def __init__(self):
+        self.defs: Dict[int, Any] = {}
+
+    def object_hook(self, value: Dict[str, Any]) -> Any:
+        if "$def" in value:
+            return self.defs[value["$def"]]
+        if "$model" in value:
+            model = IR_MODELS.get(value["$model"])
+            if model is None:
+                raise ValueError(f"unknown model {value['$model']!r}")
+            return model.model_construct(**value["fields"])
+        if "$define" in value:
+            self.defs[value["$define"]] = value["value"]
+            return value["value"]
+        if "$dict" in value:
+            return dict(value["$dict"])
+        return value
+
+
+class MetadataCache:
+    """
+    Cache of parsed OpenAPIMetadata, keyed on the spec content, the parser filters
+    and the generator version. Warm runs load the metadata instead of parsing the spec.
+
+    The metadata is stored as JSON, the same format as the IR files of the
+    parser command. Schemas shared by operations are stored once, see dumps.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory where cache files are stored
+        """
+        self.cache_dir = Path(cache_dir) / "metadata"
+
+    @staticmethod
+    def cache_key(document: LoadedDocument, filter_key: str = "") -> str:
+        """
+        Compute the cache key of the metadata parsed from a document.
+
+        Args:
+            document: The loaded OpenAPI document
+            filter_key: String identifying the operation filter of the parser
+
+        Returns:
+            str: Hex digest identifying the parsed metadata
+        """
+        digest = hashlib.sha256()
+        for part in (Helpers.generator_version(), filter_key, document.content):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def dumps(metadata: OpenAPIMetadata) -> str:
+        """
+        Serialize metadata to JSON.
+
+        Objects shared by several operations, like the nested types of a
+        referenced schema, are written once to "$defs" and referenced as
+        {"$def": index}. Models are written as {"$model": name, "fields": {...}}.
+        """
+        encoder = _Encoder(metadata)
+        encoded = encoder.encode(metadata)
+        return json.dumps(
+            {"version": IR_VERSION, "$defs": encoder.defs, "metadata": encoded},
+            separators=(",", ":"),
+        )
+
+    @staticmethod
+    def loads(content: str) -> OpenAPIMetadata:
+        """Deserialize metadata serialized with dumps."""
+        data = json.loads(content, object_hook=_Decoder().object_hook)
+        if not isinstance(data, dict) or data.get("version") != IR_VERSION:
+            raise ValueError("not parsed OpenAPI metadata of this version")
+        metadata = data["metadata"]
+        if not isinstance(metadata, OpenAPIMetadata):
+            raise ValueError("not parsed OpenAPI metadata")
+        return metadata
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def load(self, key: str) -> Optional[OpenAPIMetadata]:
+        """
+        Load cached metadata.
+
+        Args:
+            key: Cache key returned by cache_key
+
+        Returns:
+            Optional[OpenAPIMetadata]: The cached metadata, or None on a cache miss
+        """
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return self.loads(f.read())
+        except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+            click.echo(f"Ignoring unreadable metadata cache {path}: {e}")
+            return None
+
+    def store(self, key: str, metadata: OpenAPIMetadata) -> None:
+        """
+        Store metadata in the cache. The file is replaced atomically so
+        concurrent runs never read a partially written file.
+
+        Args:
+            key: Cache key returned by cache_key
+            metadata: The parsed metadata
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.dumps(metadata))
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
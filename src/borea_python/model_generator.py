@@ -0,0 +1,223 @@
+"""Module for generating pydantic models from an OpenAPI document."""
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import click
+
+from .content_loader import LoadedDocument
+from .helpers import Helpers
+from .ref_graph import RefGraph
+
+# datamodel-code-generator keeps module level state, only run one generation at a time
+_generate_lock = threading.Lock()
+
+
+class ModelGenerator:
+    """
+    Generates pydantic models with datamodel-code-generator.
+
+    The library is called in-process with the already parsed document. The
+    datamodel-codegen CLI is used as a fallback when the library cannot be
+    imported or fails. Generated models can be cached by the spec content.
+    """
+
+    # datamodel-codegen CLI flags and the equivalent library options
+    CLI_ARGS: List[str] = [
+        "--input-file-type",
+        "openapi",
+        "--openapi-scopes",
+        "schemas",
+        "--use-standard-collections",
+        "--use-schema-description",
+        "--field-constraints",
+        "--strict-nullable",
+        "--wrap-string-literal",
+        "--enum-field-as-literal",
+        "one",
+        "--use-double-quotes",
+        "--use-default-kwarg",
+        "--use-annotated",
+        "--use-field-description",
+        "--output-model-type",
+        "pydantic_v2.BaseModel",
+        "--disable-timestamp",
+    ]
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Initialize the ModelGenerator.
+
+        Args:
+            cache_dir: Optional directory to cache generated models in
+        """
+        self.cache_dir: Optional[Path] = (
+            Path(cache_dir) / "models" if cache_dir is not None else None
+        )
+        # Code generated for the last cache key, for generators reused between runs
+        self.generated: Dict[str, str] = {}
+
+    @staticmethod
+    def _input_filename(document: LoadedDocument) -> str:
+        """Return the file name of the document, it ends up in the generated header."""
+        return os.path.basename(urlparse(document.source).path) or "openapi"
+
+    @staticmethod
+    def _has_external_refs(document: LoadedDocument) -> bool:
+        """Check if the document references other files, i.e. it was not bundled."""
+        return any(
+            not ref.startswith("#")
+            for ref in RefGraph.collect_ref_values(document.data)
+        )
+
+    @classmethod
+    def _library_options(cls) -> Dict[str, Any]:
+        from datamodel_code_generator import (
+            DataModelType,
+            InputFileType,
+            LiteralType,
+            OpenAPIScope,
+        )
+
+        return dict(
+            input_file_type=InputFileType.OpenAPI,
+            openapi_scopes=[OpenAPIScope.Schemas],
+            output_model_type=DataModelType.PydanticV2BaseModel,
+            use_standard_collections=True,
+            use_schema_description=True,
+            field_constraints=True,
+            strict_nullable=True,
+            wrap_string_literal=True,
+            enum_field_as_literal=LiteralType.One,
+            use_double_quotes=True,
+            use_default_kwarg=True,
+            use_annotated=True,
+            use_field_description=True,
+            disable_timestamp=True,
+        )
+
+    @staticmethod
+    def models_input(document: LoadedDocument) -> str:
+        """
+        Return the part of the document the models are generated from.
+
+        Only component schemas are generated, so the models do not change when
+        only the paths of the spec change.
+        """
+        if not isinstance(document.data, dict):
+            return document.content
+        data = {key: value for key, value in document.data.items() if key != "paths"}
+        return json.dumps(data, sort_keys=True)
+
+    def _cache_key(self, document: LoadedDocument) -> str:
+        from importlib.metadata import PackageNotFoundError, version
+
+        try:
+            codegen_version = version("datamodel-code-generator")
+        except PackageNotFoundError:
+            codegen_version = ""
+        digest = hashlib.sha256()
+        for part in (
+            Helpers.generator_version(),
+            codegen_version,
+            self._input_filename(document),
+            self.models_input(document),
+        ):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def generate(self, document: LoadedDocument) -> Optional[str]:
+        """
+        Generate the models module of an OpenAPI document.
+
+        Args:
+            document: The loaded OpenAPI document
+
+        Returns:
+            Optional[str]: The generated code, or None if generation failed
+        """
+        key = self._cache_key(document)
+        if key in self.generated:
+            return self.generated[key]
+
+        cache_path = None
+        if self.cache_dir is not None:
+            cache_path = self.cache_dir / f"{key}.py"
+            if cache_path.exists():
+                models_code = cache_path.read_text(encoding="utf-8")
+                self.generated = {key: models_code}
+                return models_code
+
+        with tempfile.TemporaryDirectory(prefix="borea-") as temp_dir:
+            output_file = Path(temp_dir) / "models.py"
+            try:
+                self._generate_in_process(document, output_file)
+            except Exception as e:
+                click.echo(f"Falling back to datamodel-codegen CLI: {e}")
+                if not self._generate_in_subprocess(document, output_file, temp_dir):
+                    return None
+            models_code = output_file.read_text(encoding="utf-8")
+
+        if cache_path is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_text(models_code, encoding="utf-8")
+            os.replace(temp_path, cache_path)
+        self.generated = {key: models_code}
+        return models_code
+
+    def _generate_in_process(self, document: LoadedDocument, output_file: Path) -> None:
+        """Generate models by calling the datamodel-code-generator library."""
+        from datamodel_code_generator import generate
+
+        # The parsed document is passed, so the spec is not read and parsed again.
+        # Only specs still referencing other files are read by path, so their
+        # relative references keep working.
+        if document.source_type == "file" and self._has_external_refs(document):
+            input_ = Path(document.source)
+        elif isinstance(document.data, dict):
+            input_ = document.data
+        else:
+            input_ = document.content
+        with _generate_lock:
+            generate(
+                input_,
+                input_filename=self._input_filename(document),
+                output=output_file,
+                **self._library_options(),
+            )
+
+    def _generate_in_subprocess(
+        self, document: LoadedDocument, output_file: Path, temp_dir: str
+    ) -> bool:
+        """Generate models with the datamodel-codegen CLI."""
+        if document.source_type == "file":
+            input_file = document.source
+        else:
+            # Keep the file name of the input, it ends up in the generated header
+            input_file = str(Path(temp_dir) / self._input_filename(document))
+            with open(input_file, "w", encoding="utf-8") as f:
+                f.write(document.content)
+
+        cmd = [
+            "datamodel-codegen",
+            "--input",
+            input_file,
+            "--output",
+            str(output_file),
+            *self.CLI_ARGS,
+        ]
+        try:
+            subprocess.run(cmd, check=True)
+            return True
+        except (OSError, subprocess.CalledProcessError) as e:
+            click.echo(f"Error generating models: {e}")
+            return False
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -22,6 +22,8 @@ class OutputConfig(BaseModel):
     models: Optional[str] = None
     tests: bool = False
     xCodeSamples: bool = False
+    format: bool = True
+    client: Literal["sync", "async", "both"] = "sync"
 
 
 class BoreaConfigJSON(BaseModel):
@@ -30,6 +32,9 @@ class BoreaConfigJSON(BaseModel):
     input: InputConfigJSON = Field(default_factory=InputConfigJSON)
     output: OutputConfig = Field(default_factory=OutputConfig)
     ignores: List[str] = Field(default_factory=list)
+    jobs: int = 1
+    cacheDir: Optional[str] = None
+    outputCache: Optional[str] = None
 
 
 class BoreaConfig(BaseModel):
@@ -38,3 +43,20 @@ class BoreaConfig(BaseModel):
     input: InputConfig = Field(default_factory=InputConfig)
     output: OutputConfig = Field(default_factory=OutputConfig)
     ignores: List[str] = Field(default_factory=list)
+    jobs: int = 1
+    cacheDir: Optional[str] = None
+    outputCache: Optional[str] = None
+
+
+class BatchTargetJSON(BoreaConfigJSON):
+    """Configuration of one SDK generated in a batch. JSON version."""
+
+    name: Optional[str] = None
+
+
+class BatchConfigJSON(BaseModel):
+    """Configuration for generating several SDKs in one process. JSON version."""
+
+    targets: List[BatchTargetJSON] = Field(default_factory=list)
+    workers: int = 4
+    cacheDir: Optional[str] = None
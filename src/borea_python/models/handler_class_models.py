@@ -23,12 +23,14 @@ class HandlerClassPyJinja(BaseModel):
     models_dir: str
     models_filename: str
     model_filenames: List[str]
+    typing_imports: List[str]
     parent_class_name: str
     parent_filename: str
     is_operation_without_tag: bool
     class_name: str
     method_name: str
     description: str
+    summary: str = ""
     required_method_params: List[MethodParameter]
     optional_method_params: List[MethodParameter]
     http_method: Literal["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"]
@@ -36,3 +38,9 @@ class HandlerClassPyJinja(BaseModel):
     http_params: List[HttpParameter] = Field(default_factory=[])
     request_body: Optional[SchemaMetadata] = None
     nested_schema: Optional[Dict[str, Any]] = None
+    return_type: str = "Any"
+    response_validator: Optional[str] = None
+    stream_kind: Optional[Literal["records", "bytes"]] = None
+    stream_type: Optional[str] = None
+    stream_validator: Optional[str] = None
+    is_async: bool = False
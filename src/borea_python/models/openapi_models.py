@@ -3,6 +3,15 @@ from typing import Any, Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field
 
+# Media types of responses that are streamed, one JSON record per line or raw bytes
+RECORDS_CONTENT_TYPES = (
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/jsonl",
+    "application/x-jsonlines",
+)
+BYTES_CONTENT_TYPES = ("application/octet-stream",)
+
 
 class HttpParameter(BaseModel):
     """Represents an OpenAPI parameter"""
@@ -37,6 +46,34 @@ class SchemaMetadata(BaseModel):
         return len(self.nested_json_schemas)
 
 
+class ResponseMetadata(BaseModel):
+    """Represents the body of the success response of an OpenAPI operation"""
+
+    status_code: str
+    content_type: str
+    type: str
+    type_is_schema: bool
+    is_array: bool = False
+    # Streamed media type of the response and the type of its records
+    stream_content_type: Optional[str] = None
+    stream_type: str = "any"
+    stream_type_is_schema: bool = False
+
+    @property
+    def is_json(self) -> bool:
+        return self.content_type == "application/json" or self.content_type.endswith(
+            "+json"
+        )
+
+    @property
+    def stream_kind(self) -> Optional[Literal["records", "bytes"]]:
+        if self.stream_content_type in RECORDS_CONTENT_TYPES:
+            return "records"
+        if self.stream_content_type in BYTES_CONTENT_TYPES:
+            return "bytes"
+        return None
+
+
 class Operation(BaseModel):
     """Represents an OpenAPI operation"""
 
@@ -48,6 +85,9 @@ class Operation(BaseModel):
     description: str = ""
     parameters: List[HttpParameter] = Field(default_factory=list)
     request_body: Optional[SchemaMetadata] = None
+    response: Optional[ResponseMetadata] = None
+    # Hash of the spec fragment of the operation and the components it references
+    spec_hash: str = ""
 
 
 class Info(BaseModel):
@@ -29,3 +29,4 @@ class SdkClassPyJinja(BaseModel):
     http_headers: List[HttpHeader] = Field(default_factory=list)
     tags: List[OpenAPITagMetadata] = Field(default_factory=list)
     operation_metadata: List[OperationMetadata] = Field(default_factory=list)
+    is_async: bool = False
@@ -7,6 +7,7 @@ class OperationMetadata(BaseModel):
     handler_dir: str
     handler_filename: str
     handler_class_name: str
+    has_stream: bool = False
 
 
 class TagClassPyJinja(BaseModel):
@@ -19,3 +20,4 @@ class TagClassPyJinja(BaseModel):
     class_name: str
     description: str
     operation_metadata: List[OperationMetadata]
+    is_async: bool = False
@@ -1,16 +1,28 @@
+import copy
 import json
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import click
 
-from .content_loader import ContentLoader
+from .content_loader import ContentLoader, LoadedDocument
+from .metadata_cache import MetadataCache
 from .models.openapi_models import (
+    BYTES_CONTENT_TYPES,
+    RECORDS_CONTENT_TYPES,
     HttpHeader,
     HttpParameter,
     OpenAPIMetadata,
     Operation,
+    ResponseMetadata,
     SchemaMetadata,
 )
+from .ref_graph import RefGraph
+from .spec_pruner import OperationFilter
+from .spec_snapshot import SpecSnapshot
+
+# Keys of a schema node that is replaced by the metadata of the schema it refers to
+COMPOSITION_KEYS = ["$ref", "allOf", "oneOf", "anyOf", "not"]
+SCHEMA_REF_PREFIX = "#/components/schemas/"
 
 
 class OpenAPIParser:
@@ -18,49 +30,132 @@ class OpenAPIParser:
     A parser to extract relevant API operation details from an OpenAPI specification.
     """
 
-    def __init__(self, openapi_input: str, tag: str = "", operation_id: str = ""):
+    def __init__(
+        self,
+        openapi_input: str,
+        tags: Optional[List[str]] = None,
+        operation_ids: Optional[List[str]] = None,
+        include_paths: Optional[List[str]] = None,
+        document: Optional[LoadedDocument] = None,
+    ):
         """
         Initialize the parser by loading the OpenAPI specification.
+
+        An already loaded document can be passed to avoid loading it again.
         """
-        content_loader = ContentLoader()
-        self.openapi_spec = content_loader.load_structured_data(str(openapi_input))
-        self.paths = self.openapi_spec.get("paths", {})
+        if document is None:
+            content_loader = ContentLoader()
+            document = content_loader.load_document(str(openapi_input))
+        self.document = document
+        # Parsing resolves references in place, keep the loaded document intact.
+        # Operations are copied one at a time when they are parsed.
+        self.openapi_spec = copy.deepcopy(
+            {key: value for key, value in document.data.items() if key != "paths"}
+        )
+        self.paths = document.data.get("paths", {})
         self.parameters = self.openapi_spec.get("components", {}).get("parameters", {})
         self.schemas = self.openapi_spec.get("components", {}).get("schemas", {})
-        self.tag = tag
-        self.operation_id = operation_id
+        self.operation_filter = OperationFilter(tags, operation_ids, include_paths)
         self.openapi_input = openapi_input
-        self.visited_refs = (
-            set()
-        )  # Track visited references to prevent infinite recursion
+        self.ref_graph = RefGraph(self.schemas)
+        # Resolved nested types and schema metadata, memoized per referenced schema
+        self.nested_types_by_ref: Dict[str, List[Dict[str, Any]]] = {}
+        self.schema_metadata_by_ref: Dict[str, SchemaMetadata] = {}
+        self.reference_metadata_by_ref: Dict[str, SchemaMetadata] = {}
+        # Nested types within the component schemas with their references expanded,
+        # by id. The schemas live as long as the parser, so the ids are not reused.
+        self.expanded_component_types_by_id: Dict[int, Dict[str, Any]] = {}
+        # Schemas being resolved, a reference back to one of them is a cycle
+        self.resolving_refs = set()
+        # Unique parameters of the parsed operations, headers are taken from them
+        self.http_params: List[Dict[str, Any]] = []
+
+    @classmethod
+    def parse_with_cache(
+        cls,
+        document: LoadedDocument,
+        cache: Optional[MetadataCache],
+        operation_filter: Optional[OperationFilter] = None,
+    ) -> OpenAPIMetadata:
+        """
+        Parse a loaded document, reusing metadata cached by a previous run
+        of the same spec and generator version.
+        """
+        operation_filter = operation_filter or OperationFilter()
+
+        def parse() -> OpenAPIMetadata:
+            return cls(
+                document.source,
+                tags=operation_filter.tags,
+                operation_ids=operation_filter.operation_ids,
+                include_paths=operation_filter.include_paths,
+                document=document,
+            ).parse()
+
+        if cache is None:
+            return parse()
+
+        key = cache.cache_key(document, operation_filter.cache_key())
+        metadata = cache.load(key)
+        if metadata is not None:
+            metadata.openapi_input = document.source
+            return metadata
+
+        metadata = parse()
+        cache.store(key, metadata)
+        return metadata
 
     def parse(self) -> OpenAPIMetadata:
         """
         Parse the OpenAPI spec and return a list of operations filtered by criteria.
         """
-        operations = []
-        http_params = []
+        return self.metadata(list(self.iter_operations()))
+
+    def iter_operations(self) -> Iterator[Operation]:
+        """
+        Parse the operations filtered by criteria one at a time.
+
+        Only the operation being parsed is copied, so operations that are consumed
+        as they are yielded do not have to fit in memory at the same time.
+        Parameters of the yielded operations are collected, see headers.
+
+        Yields:
+            Operation: The parsed operations, in the order of the spec
+        """
+        self.http_params = []
         for path, methods in self.paths.items():
             for method, details in methods.items():
                 if "operationId" not in details:
                     continue
-                if self.operation_id != "" and self.operation_id != details.get(
-                    "operationId", ""
-                ):
-                    continue
-                if self.tag != "" and self.tag not in details.get("tags", [""]):
+                if not self.operation_filter.matches(path, details):
                     continue
-                operation = self._parse_operation(path, method, details)
+                operation = self._parse_operation(path, method, copy.deepcopy(details))
+                operation.spec_hash = self._operation_hash(path, method, details)
                 for http_param in operation.parameters:
                     self._add_unique_http_param(
-                        http_params, http_param.model_dump(by_alias=True)
+                        self.http_params, http_param.model_dump(by_alias=True)
                     )
-                operations.append(operation)
-        headers = [
+                yield operation
+
+    def headers(self) -> List[HttpHeader]:
+        """Return the header parameters of the operations parsed so far."""
+        return [
             HttpHeader(**http_param)
-            for http_param in http_params
+            for http_param in self.http_params
             if "header" in http_param["in"]
         ]
+
+    def metadata(self, operations: List[Operation]) -> OpenAPIMetadata:
+        """
+        Build the metadata of the spec.
+
+        Args:
+            operations: The parsed operations, empty when they are streamed
+
+        Returns:
+            OpenAPIMetadata: Metadata with the headers of the operations parsed so far
+        """
+        headers = self.headers()
         openapi = self.openapi_spec.get("openapi", "")
         info = self.openapi_spec.get("info", {})
         servers = self.openapi_spec.get("servers", [])
@@ -102,8 +197,39 @@ class OpenAPIParser:
             description=details.get("description", ""),
             parameters=self._parse_parameters(details.get("parameters", [])),
             request_body=self._parse_request_body(details.get("requestBody", {})),
+            response=self._parse_response(details.get("responses", {})),
         )
 
+    def _operation_hash(self, path: str, method: str, details: Dict[str, Any]) -> str:
+        """
+        Hash the spec fragment of an operation and the components it references.
+
+        Referenced schemas are hashed once, with the schemas they reference,
+        so the hash does not grow with the depth of the references.
+        """
+        refs = RefGraph.collect_ref_values(details)
+        components: Dict[str, Any] = {}
+        for ref in refs:
+            if ref in components:
+                continue
+            if ref.startswith(SCHEMA_REF_PREFIX):
+                components[ref] = self.ref_graph.closure_hash(
+                    self.ref_graph.ref_name(ref)
+                )
+                continue
+            # Parameters, request bodies and responses may reference schemas too
+            tokens = ref.split("/")
+            component = (
+                self.openapi_spec.get("components", {})
+                .get(tokens[2], {})
+                .get(tokens[3])
+                if len(tokens) == 4 and tokens[:2] == ["#", "components"]
+                else None
+            )
+            components[ref] = component
+            refs.extend(RefGraph.collect_ref_values(component))
+        return SpecSnapshot.hash_value([path, method, details, components])
+
     def _resolve_param_ref(self, param: str) -> Dict[str, Any]:
         """
         Resolve a reference to a component in the OpenAPI spec.
@@ -157,15 +283,110 @@ class OpenAPIParser:
         json_schema = content.get("application/json", {}).get("schema", {})
         return self._schema_metadata(json_schema)
 
-    def _schema_metadata(self, schema: Dict[str, Any]) -> SchemaMetadata:
+    def _parse_response(
+        self, responses: Dict[str, Any]
+    ) -> Union[ResponseMetadata, None]:
+        """
+        Extract the body of the first success response, None if it has no body.
+
+        A JSON media type is preferred when the response has several. A media type
+        that is streamed, like NDJSON, is recorded with the type of its records.
+        """
+        success_responses = sorted(
+            (
+                (str(status_code), response)
+                for status_code, response in responses.items()
+                if str(status_code).startswith("2")
+            ),
+            key=lambda item: item[0],
+        )
+        if not success_responses:
+            return None
+
+        status_code, response = success_responses[0]
+        if "$ref" in response:
+            response_name = response["$ref"].split("/")[-1]
+            response = (
+                self.openapi_spec.get("components", {})
+                .get("responses", {})
+                .get(response_name, {})
+            )
+        content = response.get("content", {})
+        if not content:
+            return None
+        content_type = next(
+            (
+                media_type
+                for media_type in content
+                if media_type == "application/json" or media_type.endswith("+json")
+            ),
+            next(iter(content)),
+        )
+        schema = content[content_type].get("schema", {})
+        is_array = schema.get("type") == "array"
+        item_schema = schema.get("items", {}) if is_array else schema
+        response_metadata = ResponseMetadata(
+            status_code=status_code,
+            content_type=content_type,
+            type=self._resolve_type(item_schema),
+            type_is_schema=list(item_schema) == ["$ref"],
+            is_array=is_array,
+        )
+
+        stream_content_type = next(
+            (
+                media_type
+                for media_type in content
+                if media_type in RECORDS_CONTENT_TYPES + BYTES_CONTENT_TYPES
+            ),
+            None,
+        )
+        if stream_content_type is not None:
+            response_metadata.stream_content_type = stream_content_type
+            if stream_content_type in RECORDS_CONTENT_TYPES:
+                # The schema describes one record, or the records as an array
+                record_schema = content[stream_content_type].get("schema", {})
+                if record_schema.get("type") == "array":
+                    record_schema = record_schema.get("items", {})
+                response_metadata.stream_type = self._resolve_type(record_schema)
+                response_metadata.stream_type_is_schema = list(record_schema) == [
+                    "$ref"
+                ]
+        return response_metadata
+
+    def _schema_metadata(
+        self, schema: Dict[str, Any], expand: bool = True
+    ) -> SchemaMetadata:
         """
         Extract relevant metadata from a given schema.
+
+        With expand, references are followed into the nested types of the schema,
+        and the references within those are replaced by metadata that is not
+        expanded: its nested types are '$ref's to the referenced schemas. Every
+        schema is so copied once into the metadata, however deep the references
+        are nested. Metadata of a plain reference is memoized per referenced schema.
         """
+        if list(schema) != ["$ref"]:
+            return self._build_schema_metadata(schema, expand)
+
+        ref_name = self.ref_graph.ref_name(schema["$ref"])
+        metadata_by_ref = (
+            self.schema_metadata_by_ref if expand else self.reference_metadata_by_ref
+        )
+        if ref_name not in metadata_by_ref:
+            metadata_by_ref[ref_name] = self._build_schema_metadata(schema, expand)
+        return metadata_by_ref[ref_name].model_copy()
+
+    def _build_schema_metadata(
+        self, schema: Dict[str, Any], expand: bool
+    ) -> SchemaMetadata:
         required = schema.get("required")
         nullable = schema.get("nullable")
         json_schema_type = self._resolve_type(schema)
-        nested_json_schema_refs = self._extract_refs(schema)
-        nested_json_schemas = self._resolve_nested_types(schema)
+        nested_json_schema_refs = self._extract_refs(schema, transitive=expand)
+        nested_json_schemas = self._resolve_nested_types(
+            schema, follow_refs=expand, expand=expand
+        )
         type_is_schema = len(nested_json_schema_refs) > 0
 
         return SchemaMetadata(
@@ -197,31 +418,43 @@ class OpenAPIParser:
             return f"Not[{self._resolve_type(schema['not'])}]"
         return schema.get("type", "any")
 
-    def _extract_refs(self, schema: Dict[str, Any]) -> List[str]:
+    def _extract_refs(
+        self, schema: Dict[str, Any], transitive: bool = True
+    ) -> List[str]:
         """
         Recursively extract referenced schema names.
+
+        Referenced schemas are not walked again, their transitive references
+        come from the precomputed reference graph.
         """
+        if not isinstance(schema, dict):
+            return []
         refs = []
         if "$ref" in schema:
-            ref_name = schema["$ref"].split("/")[-1]
+            ref_name = self.ref_graph.ref_name(schema["$ref"])
             refs.append(ref_name)
-            if ref_name in self.schemas:
-                refs.extend(self._extract_refs(self.schemas[ref_name]))
+            if transitive:
+                refs.extend(self.ref_graph.closure(ref_name))
         for key in ["allOf", "oneOf", "anyOf", "not", "properties", "items"]:
             if key in schema:
                 for sub_schema in (
                     schema[key] if isinstance(schema[key], list) else [schema[key]]
                 ):
-                    refs.extend(self._extract_refs(sub_schema))
-        return refs
+                    refs.extend(self._extract_refs(sub_schema, transitive))
+        return list(dict.fromkeys(refs))
 
-    def _resolve_nested_types(self, schema: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _resolve_nested_types(
+        self, schema: Dict[str, Any], follow_refs: bool = True, expand: bool = False
+    ) -> List[Dict[str, Any]]:
         """
         Recursively resolve nested types within a schema, including all properties and nested properties.
         Handles $ref, allOf, oneOf, anyOf, not, and properties within objects and arrays.
 
         Args:
             schema: The OpenAPI schema to resolve
+            follow_refs: Whether to resolve references, or keep them as '$ref's
+            expand: Whether to expand the references within the nested types, see
+                _expand_references
 
         Returns:
             List of resolved nested type schemas
@@ -231,60 +464,103 @@ class OpenAPIParser:
             return nested_types
 
         if "type" in schema:
-            self._traverse_dict(schema)
-            nested_types.append(schema)
+            nested_types.append(
+                self._expand_references(schema, is_root=True) if expand else schema
+            )
 
         if "$ref" in schema:
-            ref_name = schema["$ref"].split("/")[-1]
-            if ref_name in self.schemas and ref_name not in self.visited_refs:
-                self.visited_refs.add(ref_name)  # Mark as visited
-                nested_types.extend(self._resolve_nested_types(self.schemas[ref_name]))
+            ref_name = self.ref_graph.ref_name(schema["$ref"])
+            if follow_refs and expand:
+                nested_types.extend(self._expand_ref_nested_types(ref_name))
+            elif follow_refs:
+                nested_types.extend(self._resolve_ref_nested_types(ref_name))
+            else:
+                nested_types.append(self._ref_stub(schema["$ref"], ref_name))
 
         for key in ["allOf", "oneOf", "anyOf", "not"]:
             if key in schema:
                 for sub_schema in (
                     schema[key] if isinstance(schema[key], list) else [schema[key]]
                 ):
-                    nested_types.extend(self._resolve_nested_types(sub_schema))
+                    nested_types.extend(
+                        self._resolve_nested_types(sub_schema, follow_refs, expand)
+                    )
 
         return nested_types
 
-    def _traverse_dict(
-        self,
-        d: Dict[str, Any],
-        key: Union[str, int] = None,
-        parent: Union[Dict[str, Any], List[Any]] = None,
-    ):
+    def _resolve_ref_nested_types(self, ref_name: str) -> List[Dict[str, Any]]:
         """
-        Traverses a dictionary, resolving any '$ref' values.
-        :param d: The dictionary to traverse.
-        :param resolve_ref: A function that resolves '$ref' values.
+        Resolve the nested types of a referenced schema once and memoize them.
+
+        A reference to a schema that is being resolved is a cycle and resolves to
+        nothing. Cycles are always entered at the same schema, so the result does
+        not depend on the order in which operations are parsed.
         """
-        for k, value in d.items():
-            if k in ["$ref", "allOf", "oneOf", "anyOf", "not"]:
-                schema_metadata = self._schema_metadata(d)
-                parent[key] = schema_metadata
-            elif isinstance(value, dict):
-                self._traverse_dict(d=value, key=k, parent=d)
-            elif isinstance(value, list):
-                self._traverse_array(arr=value, key=k, parent=d)
+        if ref_name in self.nested_types_by_ref:
+            return list(self.nested_types_by_ref[ref_name])
+        if ref_name not in self.schemas or ref_name in self.resolving_refs:
+            return []
 
-    def _traverse_array(
-        self,
-        arr: List[Any],
-        key: Union[str, int] = None,
-        parent: Union[Dict[str, Any], List[Any]] = None,
-    ):
+        cycle_entry = self.ref_graph.cycle_entry(ref_name)
+        if cycle_entry != ref_name and cycle_entry not in self.resolving_refs:
+            self._resolve_ref_nested_types(cycle_entry)
+            if ref_name in self.nested_types_by_ref:
+                return list(self.nested_types_by_ref[ref_name])
+
+        self.resolving_refs.add(ref_name)
+        try:
+            nested_types = self._resolve_nested_types(self.schemas[ref_name])
+        finally:
+            self.resolving_refs.discard(ref_name)
+        self.nested_types_by_ref[ref_name] = nested_types
+        return list(nested_types)
+
+    def _ref_stub(self, ref: str, ref_name: str) -> Dict[str, Any]:
+        """Return a '$ref' to a schema, with the description of the schema."""
+        stub = {"$ref": ref}
+        description = self.schemas.get(ref_name, {}).get("description")
+        if description is not None:
+            stub["description"] = description
+        return stub
+
+    def _expand_ref_nested_types(self, ref_name: str) -> List[Dict[str, Any]]:
+        """
+        Return the nested types of a referenced schema with their references expanded.
+
+        Nested types are parts of the component schemas, each is expanded once and
+        shared by all schemas and operations using it. The inline schemas of an
+        operation are expanded every time, so nothing of an operation is kept once
+        it is parsed.
+        """
+        expanded_nested_types = []
+        for nested_type in self._resolve_ref_nested_types(ref_name):
+            key = id(nested_type)
+            if key not in self.expanded_component_types_by_id:
+                self.expanded_component_types_by_id[key] = self._expand_references(
+                    nested_type, is_root=True
+                )
+            expanded_nested_types.append(self.expanded_component_types_by_id[key])
+        return expanded_nested_types
+
+    def _expand_references(self, node: Any, is_root: bool = False) -> Any:
         """
-        Traverses an array (list), resolving any '$ref' values inside the array.
-        :param arr: The array (list) to traverse.
-        :param resolve_ref: A function that resolves '$ref' values.
+        Copy a schema node, replacing the references and compositions within it
+        by their schema metadata. The schemas of the spec are left intact.
+
+        Args:
+            node: The schema node, or a list or value within a schema
+            is_root: Whether the node is the schema itself, which is never replaced
+
+        Returns:
+            Any: The copied node
         """
-        for i, item in enumerate(arr):
-            if isinstance(item, dict):
-                self._traverse_dict(d=item, key=i, parent=arr)
-            elif isinstance(item, list):
-                self._traverse_array(arr=item, key=i, parent=arr)
+        if isinstance(node, dict):
+            if not is_root and any(key in node for key in COMPOSITION_KEYS):
+                return self._schema_metadata(node, expand=False)
+            return {key: self._expand_references(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self._expand_references(item) for item in node]
+        return node
 
 
 @click.command()
@@ -296,18 +572,57 @@ class OpenAPIParser:
 )
 @click.option(
     "--tag",
-    default="",
+    help="Only parse operations with this tag, can be repeated",
+    multiple=True,
     type=str,
 )
 @click.option(
     "--operation_id",
-    default="",
+    help="Only parse the operation with this ID, can be repeated",
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--include-paths",
+    help="Only parse operations whose path matches this glob pattern, can be repeated",
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--ir-input",
+    help="Read parsed metadata (IR) written by --ir-output instead of parsing a spec",
     type=str,
 )
-def main(openapi_input: str, tag: str, operation_id: str):
-    parser = OpenAPIParser(openapi_input, tag=tag, operation_id=operation_id)
-    operations = parser.parse()
-    click.echo(json.dumps(operations.model_dump(), indent=2))
+@click.option(
+    "--ir-output",
+    help="Write the parsed metadata (IR) to this file instead of printing it",
+    type=str,
+)
+def main(
+    openapi_input: str,
+    tag: Tuple[str, ...],
+    operation_id: Tuple[str, ...],
+    include_paths: Tuple[str, ...],
+    ir_input: Optional[str],
+    ir_output: Optional[str],
+):
+    if ir_input:
+        with open(ir_input, "r", encoding="utf-8") as f:
+            operations = MetadataCache.loads(f.read())
+    else:
+        parser = OpenAPIParser(
+            openapi_input,
+            tags=list(tag),
+            operation_ids=list(operation_id),
+            include_paths=list(include_paths),
+        )
+        operations = parser.parse()
+
+    if ir_output:
+        with open(ir_output, "w", encoding="utf-8") as f:
+            f.write(MetadataCache.dumps(operations))
+    else:
+        click.echo(json.dumps(operations.model_dump(), indent=2))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,215 @@
+"""Module for caching complete generated SDK trees."""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List
+
+import click
+
+from .file_writer import MANIFEST_DIR, ConfigurableFileWriter
+from .helpers import Helpers
+from .spec_snapshot import SNAPSHOT_FILE
+
+ENTRY_FILE = "entry.json"
+FILES_DIR = "files"
+# Cached files are read-only, so outputs hard linked to them can not change them
+READ_ONLY = 0o444
+
+
+@lru_cache(maxsize=None)
+def _package_version(name: str) -> str:
+    """Return the installed version of a package, or an empty string if it is missing."""
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return ""
+
+
+class OutputCache:
+    """
+    Content addressed cache of generated SDK trees.
+
+    An entry is keyed on everything the output is generated from: the spec, the
+    generator settings, the templates and the versions of the generator,
+    datamodel-code-generator and ruff. Entries are written to a temporary
+    directory and renamed into place, so the cache directory can be shared by
+    concurrent runs, for example on a network volume. Cached files are made
+    read-only and verified against their hashes before they are restored.
+    """
+
+    def __init__(self, cache_dir: str, link: bool = False):
+        """
+        Initialize the OutputCache.
+
+        Args:
+            cache_dir: Directory of the cache
+            link: Restore files as hard links instead of copies, where possible
+        """
+        self.cache_dir = Path(cache_dir) / "outputs"
+        self.link = link
+
+    @staticmethod
+    def template_hash(template_dir: Path) -> str:
+        """Hash the names and contents of all templates."""
+        digest = hashlib.sha256()
+        for path in sorted(template_dir.rglob("*.jinja")):
+            digest.update(path.relative_to(template_dir).as_posix().encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def cache_key(
+        spec_content: str, settings: List[Any], template_dir: Path, format_code: bool
+    ) -> str:
+        """
+        Compute the key of the output generated from a spec.
+
+        Args:
+            spec_content: Content of the (pruned) spec
+            settings: Generator settings that affect the output
+            template_dir: Directory of the templates
+            format_code: Whether the output is formatted with ruff
+
+        Returns:
+            str: Hex digest identifying the output
+        """
+        versions = [
+            Helpers.generator_version(),
+            _package_version("datamodel-code-generator"),
+            _package_version("ruff") if format_code else "",
+        ]
+        digest = hashlib.sha256()
+        for part in (
+            json.dumps([versions, settings], sort_keys=True),
+            OutputCache.template_hash(template_dir),
+            spec_content,
+        ):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    @staticmethod
+    def _file_hash(path: Path) -> str:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+
+    def _verify(self, files_dir: Path, sha256: Dict[str, str]) -> bool:
+        """Check that the cached files still have the content they were stored with."""
+        for file, digest in sha256.items():
+            try:
+                if self._file_hash(files_dir / file) != digest:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def restore(
+        self, key: str, file_writer: ConfigurableFileWriter, output_dir: Path
+    ) -> bool:
+        """
+        Restore a cached output tree into the output directory.
+
+        Files are placed through the file writer, so ignored paths are skipped,
+        unchanged files are left alone and the manifest is updated. An entry
+        whose files were modified is removed and counts as a miss.
+
+        Args:
+            key: Cache key returned by cache_key
+            file_writer: File writer of the run
+            output_dir: Output directory of the SDK
+
+        Returns:
+            bool: False on a cache miss
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(entry_dir / ENTRY_FILE, "r") as f:
+                entry = json.load(f)
+            files: Dict[str, str] = entry["files"]
+            # Entries stored without hashes can not be verified, they are replaced
+            sha256: Dict[str, str] = entry.get("sha256", {})
+        except (OSError, ValueError, KeyError):
+            return False
+
+        files_dir = entry_dir / FILES_DIR
+        if not set(files) <= set(sha256) or not self._verify(files_dir, sha256):
+            click.echo(f"Removing modified output cache entry {entry_dir}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return False
+        for file, content_hash in files.items():
+            file_writer.restore(
+                str(output_dir / file), files_dir / file, content_hash, self.link
+            )
+        snapshot = files_dir / MANIFEST_DIR / SNAPSHOT_FILE
+        if snapshot.is_file():
+            (output_dir / MANIFEST_DIR).mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(snapshot, output_dir / MANIFEST_DIR / SNAPSHOT_FILE)
+        return True
+
+    def store(
+        self, key: str, file_writer: ConfigurableFileWriter, output_dir: Path
+    ) -> bool:
+        """
+        Store the output tree of a finished run.
+
+        Args:
+            key: Cache key returned by cache_key
+            file_writer: File writer of the finished run
+            output_dir: Output directory of the SDK
+
+        Returns:
+            bool: False if the entry could not be stored
+        """
+        entry_dir = self._entry_dir(key)
+        if entry_dir.exists():
+            return True
+        # Files outside of the output directory, like models elsewhere, are not cached
+        files = {
+            file: content_hash
+            for file, content_hash in file_writer.manifest.items()
+            if not Path(file).is_absolute() and (output_dir / file).is_file()
+        }
+        sha256: Dict[str, str] = {}
+        try:
+            entry_dir.parent.mkdir(parents=True, exist_ok=True)
+            temp_dir = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=entry_dir.parent))
+            try:
+                for file in list(files) + [f"{MANIFEST_DIR}/{SNAPSHOT_FILE}"]:
+                    source = output_dir / file
+                    if not source.is_file():
+                        continue
+                    target = temp_dir / FILES_DIR / file
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(source, target)
+                    os.chmod(target, READ_ONLY)
+                    sha256[file] = self._file_hash(target)
+                with open(temp_dir / ENTRY_FILE, "w") as f:
+                    json.dump(
+                        {
+                            "files": dict(sorted(files.items())),
+                            "sha256": dict(sorted(sha256.items())),
+                        },
+                        f,
+                        indent=2,
+                    )
+                os.rename(temp_dir, entry_dir)
+            except OSError:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                # Another run stored the same entry first
+                if entry_dir.exists():
+                    return True
+                raise
+        except OSError as e:
+            click.echo(f"Could not store output in cache {self.cache_dir}: {e}")
+            return False
+        return True
@@ -2,21 +2,26 @@
 
 import os
 from typing import Tuple, Union
-from urllib.error import URLError
+from urllib.error import HTTPError, URLError
 from urllib.parse import urlparse
-from urllib.request import urlopen
+from urllib.request import Request, urlopen
 
 
 class PathValidator:
     """Class to validate if a string is a valid URL or file path."""
 
     @staticmethod
-    def validate(path: str) -> Tuple[bool, str, Union[str, None]]:
+    def validate(
+        path: str, check_reachable: bool = True, timeout: float = 5.0
+    ) -> Tuple[bool, str, Union[str, None]]:
         """
         Validate if the input string is a valid URL or file path.
 
         Args:
             path: String to validate
+            check_reachable: Whether to check that a URL is reachable with a HEAD
+                request. Callers that fetch the URL right away should skip this.
+            timeout: Seconds to wait for the HEAD request
 
         Returns:
             Tuple containing:
@@ -31,9 +36,13 @@ class PathValidator:
         try:
             result = urlparse(path)
             if all([result.scheme, result.netloc]):
-                # Valid URL format, now check if it's accessible
+                if not check_reachable:
+                    return True, "url", None
+                # Valid URL format, now check if it's accessible without downloading it
                 try:
-                    with urlopen(path, timeout=5) as response:
+                    with urlopen(
+                        Request(path, method="HEAD"), timeout=timeout
+                    ) as response:
                         if response.status == 200:
                             return True, "url", None
                         return (
@@ -41,6 +50,11 @@ class PathValidator:
                             "url",
                             f"URL returned status code: {response.status}",
                         )
+                except HTTPError as e:
+                    # Some servers do not implement HEAD, the URL itself is reachable
+                    if e.code in (405, 501):
+                        return True, "url", None
+                    return False, "url", f"URL is not accessible: {str(e)}"
                 except URLError as e:
                     return False, "url", f"URL is not accessible: {str(e)}"
                 except TimeoutError:
@@ -0,0 +1,173 @@
+"""Module for running the phases of a generation run concurrently."""
+
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class PhaseError(Exception):
+    """Exception raised for invalid phase graphs."""
+
+    pass
+
+
+class Phase:
+    """A named unit of work that runs after the phases it depends on."""
+
+    def __init__(self, name: str, func: Callable[[], None], depends_on: List[str]):
+        self.name = name
+        self.func = func
+        self.depends_on = depends_on
+
+
+class PhaseTiming:
+    """Wall time of a phase, relative to the start of the run."""
+
+    def __init__(self, name: str, start: float, end: float):
+        self.name = name
+        self.start = start
+        self.end = end
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class PhaseScheduler:
+    """
+    Runs a DAG of phases on a thread pool.
+
+    A phase starts as soon as all phases it depends on have finished, so the
+    wall time of a run is bounded by its longest chain of dependent phases.
+    Phases do their work in threads, CPU heavy phases are expected to spend
+    their time in subprocesses, process pools or I/O.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize the PhaseScheduler.
+
+        Args:
+            max_workers: Maximum number of phases running at the same time,
+                defaults to the number of phases
+        """
+        self.max_workers = max_workers
+        self.phases: Dict[str, Phase] = {}
+        self.timings: Dict[str, PhaseTiming] = {}
+
+    def add(
+        self, name: str, func: Callable[[], None], depends_on: Iterable[str] = ()
+    ) -> None:
+        """
+        Add a phase.
+
+        Args:
+            name: Unique name of the phase
+            func: Function doing the work of the phase
+            depends_on: Names of the phases that have to finish first
+
+        Raises:
+            PhaseError: If a phase with the same name was already added
+        """
+        if name in self.phases:
+            raise PhaseError(f"Duplicate phase: {name}")
+        self.phases[name] = Phase(name, func, list(depends_on))
+
+    def _validate(self) -> None:
+        """Check that all dependencies exist and that there are no cycles."""
+        for phase in self.phases.values():
+            for dependency in phase.depends_on:
+                if dependency not in self.phases:
+                    raise PhaseError(
+                        f"Phase {phase.name} depends on unknown phase {dependency}"
+                    )
+
+        visited: Dict[str, bool] = {}
+
+        def visit(name: str, path: List[str]) -> None:
+            if visited.get(name):
+                return
+            if name in path:
+                cycle = " -> ".join(path[path.index(name) :] + [name])
+                raise PhaseError(f"Phase dependency cycle: {cycle}")
+            for dependency in self.phases[name].depends_on:
+                visit(dependency, path + [name])
+            visited[name] = True
+
+        for name in self.phases:
+            visit(name, [])
+
+    def run(self) -> Dict[str, PhaseTiming]:
+        """
+        Run all phases, respecting their dependencies.
+
+        If a phase fails, no new phases are started. Running phases are waited
+        for and the first error is raised. Phases run in a copy of the context of
+        the caller, so context variables set by the caller are visible in them.
+
+        Returns:
+            Dict[str, PhaseTiming]: Timing of every phase, in order of completion
+
+        Raises:
+            PhaseError: If the phase graph is invalid
+        """
+        self._validate()
+        self.timings = {}
+        run_start = time.perf_counter()
+        pending = dict(self.phases)
+        running: Dict[Future, str] = {}
+        error: Optional[BaseException] = None
+
+        def run_phase(phase: Phase) -> PhaseTiming:
+            start = time.perf_counter() - run_start
+            phase.func()
+            return PhaseTiming(phase.name, start, time.perf_counter() - run_start)
+
+        max_workers = self.max_workers or max(1, len(self.phases))
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="borea-phase"
+        ) as executor:
+            while pending or running:
+                if error is None:
+                    ready = [
+                        phase
+                        for phase in pending.values()
+                        if all(name in self.timings for name in phase.depends_on)
+                    ]
+                    for phase in ready:
+                        del pending[phase.name]
+                        context = contextvars.copy_context()
+                        running[
+                            executor.submit(context.run, run_phase, phase)
+                        ] = phase.name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    try:
+                        timing = future.result()
+                    except BaseException as e:
+                        error = error or e
+                        continue
+                    self.timings[timing.name] = timing
+
+        if error is not None:
+            raise error
+        return self.timings
+
+    def summary(self) -> str:
+        """
+        Summarize the wall time of the last run.
+
+        Returns:
+            str: Duration of every phase and of the whole run
+        """
+        if not self.timings:
+            return ""
+        total = max(timing.end for timing in self.timings.values())
+        phases = ", ".join(
+            f"{timing.name} {timing.duration:.2f}s" for timing in self.timings.values()
+        )
+        return f"{phases} (total {total:.2f}s)"
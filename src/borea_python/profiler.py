@@ -0,0 +1,215 @@
+"""Module for profiling the phases of a generation run."""
+
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .helpers import Helpers
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_rss_kb() -> Optional[int]:
+    """Return the peak resident set size of the process in KiB, if available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class PhaseProfile:
+    """Measurements of a single phase."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.peak_rss_delta_kb: Optional[int] = None
+        self.files_written = 0
+        self.files_unchanged = 0
+        self.bytes_written = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_s": round(self.wall_time, 6),
+            "cpu_s": round(self.cpu_time, 6),
+            "peak_rss_delta_kb": self.peak_rss_delta_kb,
+            "files_written": self.files_written,
+            "files_unchanged": self.files_unchanged,
+            "bytes_written": self.bytes_written,
+        }
+
+
+class GenerationProfiler:
+    """
+    Collects wall time, CPU time, peak RSS and written files per phase of a run.
+
+    CPU time is measured for the thread running a phase, work done in child
+    processes (handler workers, ruff, datamodel-codegen) is only part of the
+    wall time. Files are attributed to the phase of the thread writing them, files
+    written outside of a phase are counted in the "other" phase.
+    """
+
+    def __init__(self, top_n: int = 10, collect_stats: bool = False):
+        """
+        Initialize the profiler.
+
+        Args:
+            top_n: Number of slowest operations to report
+            collect_stats: Run cProfile in every phase, see dump_stats
+        """
+        self.top_n = top_n
+        self.collect_stats = collect_stats
+        self.phases: Dict[str, PhaseProfile] = {}
+        self.operation_render_times: Dict[str, float] = {}
+        self.profiles: List[cProfile.Profile] = []
+        self.start_time = time.perf_counter()
+        self.start_cpu_time = time.process_time()
+        self.start_peak_rss_kb = _peak_rss_kb()
+        self._current = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[PhaseProfile]:
+        """
+        Measure the code run in the with block as a phase.
+
+        Args:
+            name: Name of the phase, measurements of phases with the same name add up
+
+        Yields:
+            PhaseProfile: The measurements of the phase
+        """
+        with self._lock:
+            profile = self.phases.setdefault(name, PhaseProfile(name))
+        previous = getattr(self._current, "phase", None)
+        self._current.phase = profile
+        profiler = cProfile.Profile() if self.collect_stats else None
+        rss_before = _peak_rss_kb()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield profile
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            cpu_time = time.thread_time() - cpu_start
+            wall_time = time.perf_counter() - wall_start
+            rss_after = _peak_rss_kb()
+            self._current.phase = previous
+            with self._lock:
+                profile.wall_time += wall_time
+                profile.cpu_time += cpu_time
+                if rss_before is not None and rss_after is not None:
+                    profile.peak_rss_delta_kb = (profile.peak_rss_delta_kb or 0) + (
+                        rss_after - rss_before
+                    )
+                if profiler is not None:
+                    self.profiles.append(profiler)
+
+    def wrap(self, name: str, func: Callable[[], None]) -> Callable[[], None]:
+        """Return a function running func as a phase."""
+
+        def run_phase() -> None:
+            with self.phase(name):
+                func()
+
+        return run_phase
+
+    def record_write(self, path: str, size: int, written: bool) -> None:
+        """
+        Attribute a file to the phase of the current thread.
+
+        Args:
+            path: Path of the file
+            size: Size of the content in bytes
+            written: False if the file was unchanged and not rewritten
+        """
+        profile: Optional[PhaseProfile] = getattr(self._current, "phase", None)
+        with self._lock:
+            if profile is None:
+                profile = self.phases.setdefault("other", PhaseProfile("other"))
+            if written:
+                profile.files_written += 1
+                profile.bytes_written += size
+            else:
+                profile.files_unchanged += 1
+
+    def record_operation(self, operation_id: str, render_time: float) -> None:
+        """
+        Record the time it took to render a handler of an operation.
+
+        The times of the sync and the async handler of an operation add up.
+        """
+        with self._lock:
+            self.operation_render_times[operation_id] = (
+                self.operation_render_times.get(operation_id, 0.0) + render_time
+            )
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Build the profile report of the run.
+
+        Returns:
+            Dict[str, Any]: JSON serializable report
+        """
+        peak_rss_kb = _peak_rss_kb()
+        slowest = sorted(
+            self.operation_render_times.items(), key=lambda item: item[1], reverse=True
+        )[: self.top_n]
+        return {
+            "generator_version": Helpers.generator_version(),
+            "total": {
+                "wall_s": round(time.perf_counter() - self.start_time, 6),
+                "cpu_s": round(time.process_time() - self.start_cpu_time, 6),
+                "peak_rss_kb": peak_rss_kb,
+                "peak_rss_delta_kb": (
+                    peak_rss_kb - self.start_peak_rss_kb
+                    if peak_rss_kb is not None and self.start_peak_rss_kb is not None
+                    else None
+                ),
+                "files_written": sum(p.files_written for p in self.phases.values()),
+                "files_unchanged": sum(p.files_unchanged for p in self.phases.values()),
+                "bytes_written": sum(p.bytes_written for p in self.phases.values()),
+                "operations": len(self.operation_render_times),
+            },
+            "phases": {name: p.to_dict() for name, p in self.phases.items()},
+            "slowest_operations": [
+                {"operation_id": operation_id, "render_s": round(render_time, 6)}
+                for operation_id, render_time in slowest
+            ],
+        }
+
+    def write_report(self, path: str) -> None:
+        """Write the profile report as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def dump_stats(self, path: str) -> bool:
+        """
+        Write the combined cProfile statistics of all phases in pstats format.
+
+        Args:
+            path: Path of the stats file
+
+        Returns:
+            bool: False if no statistics were collected
+        """
+        if not self.profiles:
+            return False
+        stats = pstats.Stats(self.profiles[0])
+        for profile in self.profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return True
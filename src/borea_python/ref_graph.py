@@ -0,0 +1,231 @@
+"""Module for analysing references between OpenAPI component schemas."""
+
+import hashlib
+import json
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional
+
+
+class RefGraph:
+    """
+    Dependency graph of the component schemas of an OpenAPI spec.
+
+    The graph is computed once. Strongly connected components (SCCs) are used to
+    detect cycles and to compute the transitive references of every schema in
+    time linear in the size of the graph.
+    """
+
+    def __init__(self, schemas: Dict[str, Any]):
+        """
+        Build the graph of the given component schemas.
+
+        Args:
+            schemas: The component schemas by name
+        """
+        self.schemas = schemas
+        self.order: Dict[str, int] = {name: i for i, name in enumerate(schemas)}
+        self.edges: Dict[str, List[str]] = {
+            name: [ref for ref in self.collect_refs(schema) if ref in schemas]
+            for name, schema in schemas.items()
+        }
+        self.sccs: List[List[str]] = self._strongly_connected_components()
+        self.scc_index: Dict[str, int] = {
+            name: i for i, scc in enumerate(self.sccs) for name in scc
+        }
+        self.closures: List[FrozenSet[str]] = self._scc_closures()
+        # Hashes of the SCCs, computed when the first one is needed
+        self.scc_hashes: Optional[List[str]] = None
+
+    @staticmethod
+    def ref_name(ref: str) -> str:
+        """Return the component name a '$ref' points to."""
+        return ref.split("/")[-1]
+
+    @staticmethod
+    def collect_ref_values(node: Any) -> List[str]:
+        """
+        Collect all '$ref' values anywhere inside a node, in order of appearance.
+
+        Args:
+            node: A schema or any other part of a spec
+
+        Returns:
+            List[str]: Unique '$ref' values
+        """
+        refs: Dict[str, None] = {}
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, dict):
+                ref = current.get("$ref")
+                if isinstance(ref, str):
+                    refs[ref] = None
+                stack.extend(reversed(list(current.values())))
+            elif isinstance(current, list):
+                stack.extend(reversed(current))
+        return list(refs)
+
+    @classmethod
+    def collect_refs(cls, node: Any) -> List[str]:
+        """
+        Collect the names of all '$ref' values anywhere inside a node, in order of appearance.
+
+        Args:
+            node: A schema or any other part of a spec
+
+        Returns:
+            List[str]: Unique referenced names
+        """
+        names = (cls.ref_name(ref) for ref in cls.collect_ref_values(node))
+        return list(dict.fromkeys(names))
+
+    def _strongly_connected_components(self) -> List[List[str]]:
+        """
+        Compute the SCCs with an iterative version of Tarjan's algorithm.
+
+        SCCs are returned in reverse topological order, every SCC comes after
+        the SCCs it references. Members of an SCC are in spec order.
+        """
+        index_of: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: Dict[str, bool] = {}
+        stack: List[str] = []
+        sccs: List[List[str]] = []
+
+        for root in self.schemas:
+            if root in index_of:
+                continue
+            work: List[Iterator[str]] = []
+            index_of[root] = lowlink[root] = len(index_of)
+            stack.append(root)
+            on_stack[root] = True
+            path = [root]
+            work.append(iter(self.edges[root]))
+            while work:
+                node = path[-1]
+                for child in work[-1]:
+                    if child not in index_of:
+                        index_of[child] = lowlink[child] = len(index_of)
+                        stack.append(child)
+                        on_stack[child] = True
+                        path.append(child)
+                        work.append(iter(self.edges[child]))
+                        break
+                    if on_stack.get(child):
+                        lowlink[node] = min(lowlink[node], index_of[child])
+                else:
+                    work.pop()
+                    path.pop()
+                    if path:
+                        parent = path[-1]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index_of[node]:
+                        scc = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = False
+                            scc.append(member)
+                            if member == node:
+                                break
+                        sccs.append(sorted(scc, key=self.order.__getitem__))
+        return sccs
+
+    def _scc_closures(self) -> List[FrozenSet[str]]:
+        """Compute the names reachable from each SCC, in reverse topological order."""
+        closures: List[FrozenSet[str]] = []
+        for i, scc in enumerate(self.sccs):
+            reachable = set(scc) if self._is_cyclic_scc(scc) else set()
+            for name in scc:
+                for child in self.edges[name]:
+                    child_index = self.scc_index[child]
+                    if child_index != i:
+                        reachable.add(child)
+                        reachable.update(closures[child_index])
+            closures.append(frozenset(reachable))
+        return closures
+
+    def _scc_content_hashes(self) -> List[str]:
+        """
+        Hash every SCC together with the hashes of the SCCs it references,
+        in reverse topological order.
+        """
+        hashes: List[str] = []
+        for i, scc in enumerate(self.sccs):
+            referenced = sorted(
+                {
+                    hashes[self.scc_index[child]]
+                    for name in scc
+                    for child in self.edges[name]
+                    if self.scc_index[child] != i
+                }
+            )
+            content = json.dumps(
+                [{name: self.schemas[name] for name in scc}, referenced],
+                sort_keys=True,
+                default=str,
+            )
+            hashes.append(hashlib.sha256(content.encode("utf-8")).hexdigest())
+        return hashes
+
+    def _is_cyclic_scc(self, scc: List[str]) -> bool:
+        return len(scc) > 1 or scc[0] in self.edges[scc[0]]
+
+    def is_cyclic(self, name: str) -> bool:
+        """Return True if a schema (indirectly) references itself."""
+        return self._is_cyclic_scc(self.sccs[self.scc_index[name]])
+
+    def cycle_entry(self, name: str) -> str:
+        """
+        Return the schema at which a cycle is entered.
+
+        Resolving every cycle from the same member makes the result independent
+        of the order in which schemas are first referenced.
+        """
+        return self.sccs[self.scc_index[name]][0]
+
+    def closure(self, name: str) -> List[str]:
+        """
+        Return the names of all schemas transitively referenced by a schema, in spec order.
+
+        Args:
+            name: Name of the component schema
+
+        Returns:
+            List[str]: Referenced schema names, including name itself if it is cyclic
+        """
+        if name not in self.scc_index:
+            return []
+        reachable = self.closures[self.scc_index[name]]
+        return sorted(reachable, key=self.order.__getitem__)
+
+    def closure_hash(self, name: str) -> str:
+        """
+        Return a hash of a schema and of all schemas it transitively references.
+
+        Args:
+            name: Name of the component schema
+
+        Returns:
+            str: Hex digest, empty if there is no such schema
+        """
+        if name not in self.scc_index:
+            return ""
+        if self.scc_hashes is None:
+            self.scc_hashes = self._scc_content_hashes()
+        return self.scc_hashes[self.scc_index[name]]
+
+    def reachable(self, names: List[str]) -> List[str]:
+        """
+        Return the given schemas and all schemas they transitively reference, in spec order.
+
+        Args:
+            names: Names of component schemas
+
+        Returns:
+            List[str]: Reachable schema names
+        """
+        reachable = set()
+        for name in names:
+            if name in self.scc_index:
+                reachable.add(name)
+                reachable.update(self.closures[self.scc_index[name]])
+        return sorted(reachable, key=self.order.__getitem__)
@@ -0,0 +1,183 @@
+"""Module for splitting handler generation into shards and merging them."""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .file_writer import MANIFEST_DIR
+
+SHARD_FILE = "shard.json"
+
+
+class ShardError(Exception):
+    """Exception raised for invalid or inconsistent shards."""
+
+    pass
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Parse a shard of the form i/N, with 1 <= i <= N.
+
+    Args:
+        value: The shard, for example "2/4"
+
+    Returns:
+        Tuple[int, int]: Index and count of the shard
+
+    Raises:
+        ShardError: If the value is not a valid shard
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ShardError(f"Invalid shard {value!r}, expected i/N, for example 1/4")
+    if count < 1 or not 1 <= index <= count:
+        raise ShardError(f"Invalid shard {value!r}, expected 1 <= i <= N")
+    return index, count
+
+
+def shard_of(operation_id: str, count: int) -> int:
+    """
+    Return the shard rendering the handler of an operation.
+
+    A stable hash of the operation ID spreads operations evenly over the shards,
+    independent of the order of the spec and of the machine.
+
+    Args:
+        operation_id: The ID of the operation
+        count: Number of shards
+
+    Returns:
+        int: Index of the shard, starting at 1
+    """
+    digest = hashlib.sha256(operation_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+class ShardManifest:
+    """
+    Describes the handler files generated by one shard.
+
+    The fingerprint covers the generator settings and all operations of the
+    spec, shards are only merged if they were generated from the same inputs.
+    """
+
+    def __init__(self, index: int, count: int, fingerprint: str, files: List[str]):
+        """
+        Initialize the ShardManifest.
+
+        Args:
+            index: Index of the shard, starting at 1
+            count: Number of shards
+            fingerprint: Hash of the inputs of the shard
+            files: Paths of the generated files, relative to the output directory
+        """
+        self.index = index
+        self.count = count
+        self.fingerprint = fingerprint
+        self.files = files
+
+    @staticmethod
+    def path(output_dir: Path) -> Path:
+        return output_dir / MANIFEST_DIR / SHARD_FILE
+
+    def save(self, output_dir: Path) -> None:
+        """Store the manifest in the output directory of the shard."""
+        path = self.path(output_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "index": self.index,
+                    "count": self.count,
+                    "fingerprint": self.fingerprint,
+                    "files": sorted(self.files),
+                },
+                f,
+                indent=2,
+            )
+
+    @classmethod
+    def load(cls, output_dir: Path) -> "ShardManifest":
+        """
+        Load the manifest of a shard.
+
+        Args:
+            output_dir: Output directory of the shard
+
+        Returns:
+            ShardManifest: The manifest
+
+        Raises:
+            ShardError: If the directory has no readable shard manifest
+        """
+        path = cls.path(output_dir)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            return cls(data["index"], data["count"], data["fingerprint"], data["files"])
+        except (OSError, ValueError, KeyError) as e:
+            raise ShardError(f"No shard found in {output_dir}: {e}")
+
+
+class ShardSet:
+    """The complete set of shards of a sharded generation run."""
+
+    def __init__(self, shard_dirs: List[str]):
+        """
+        Load and validate the shards.
+
+        Args:
+            shard_dirs: Output directories of all shards
+
+        Raises:
+            ShardError: If shards are missing, duplicated or from different inputs
+        """
+        self.manifests: Dict[int, ShardManifest] = {}
+        # Absolute paths of the generated files, by path relative to the output
+        self.files: Dict[str, Path] = {}
+        self.fingerprint: Optional[str] = None
+        if not shard_dirs:
+            raise ShardError("No shards to merge")
+
+        counts = set()
+        for shard_dir in shard_dirs:
+            manifest = ShardManifest.load(Path(shard_dir))
+            counts.add(manifest.count)
+            if self.fingerprint not in (None, manifest.fingerprint):
+                raise ShardError(
+                    f"Shard {shard_dir} was generated from a different spec or settings"
+                )
+            self.fingerprint = manifest.fingerprint
+            if manifest.index in self.manifests:
+                raise ShardError(f"Shard {manifest.index} is given more than once")
+            self.manifests[manifest.index] = manifest
+            for file in manifest.files:
+                self.files[file] = Path(shard_dir) / file
+
+        if len(counts) != 1:
+            raise ShardError("Shards of different shard counts can not be merged")
+        count = counts.pop()
+        missing = [str(i) for i in range(1, count + 1) if i not in self.manifests]
+        if missing:
+            raise ShardError(f"Missing shards {', '.join(missing)} of {count}")
+
+    def read(self, file: str) -> str:
+        """
+        Read a file generated by one of the shards.
+
+        Args:
+            file: Path of the file, relative to the output directory
+
+        Returns:
+            str: Content of the file
+
+        Raises:
+            ShardError: If no shard generated the file
+        """
+        path = self.files.get(file)
+        if path is None or not path.is_file():
+            raise ShardError(f"No shard generated {file}")
+        return path.read_text(encoding="utf-8")
@@ -0,0 +1,326 @@
+"""Module for bundling an OpenAPI spec split over several documents."""
+
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote, urljoin, urlparse
+
+from .content_loader import ContentLoader, ContentLoadError, LoadedDocument
+from .ref_graph import RefGraph
+from .spec_pruner import HTTP_METHODS
+
+DEFAULT_WORKERS = 8
+
+# Kind of the children of a node, by the kind of the node and the key of the child.
+# "*" matches every key, children of unlisted keys and kinds are of kind "other".
+CHILD_KINDS: Dict[str, Dict[str, str]] = {
+    "document": {"paths": "paths", "components": "components"},
+    "paths": {"*": "pathItem"},
+    "pathItem": {
+        "parameters": "parameters",
+        **{method: "operation" for method in HTTP_METHODS},
+    },
+    "operation": {
+        "parameters": "parameters",
+        "requestBody": "requestBody",
+        "responses": "responses",
+    },
+    "parameters": {"*": "parameter"},
+    "parameter": {"schema": "schema", "content": "content"},
+    "requestBody": {"content": "content"},
+    "responses": {"*": "response"},
+    "response": {"headers": "headers", "content": "content"},
+    "headers": {"*": "header"},
+    "header": {"schema": "schema", "content": "content"},
+    "content": {"*": "mediaType"},
+    "mediaType": {"schema": "schema"},
+    "components": {
+        "schemas": "schemas",
+        "parameters": "parameterMap",
+        "requestBodies": "requestBodies",
+        "responses": "responses",
+        "headers": "headers",
+    },
+    "schemas": {"*": "schema"},
+    "parameterMap": {"*": "parameter"},
+    "requestBodies": {"*": "requestBody"},
+    "schema": {"*": "schema"},
+}
+
+# Component section external references of a kind are moved to, other kinds
+# of references, like path items, are inlined
+COMPONENT_SECTIONS = {
+    "schema": "schemas",
+    "parameter": "parameters",
+    "requestBody": "requestBodies",
+    "response": "responses",
+    "header": "headers",
+}
+COMPONENT_KINDS = {section: kind for kind, section in COMPONENT_SECTIONS.items()}
+
+
+class BundleError(Exception):
+    """Exception raised when an external reference can not be bundled."""
+
+    pass
+
+
+class SpecBundler:
+    """
+    Bundles a spec whose '$ref's point into other files or URLs into one document.
+
+    Referenced documents are loaded concurrently and only once each, keyed by
+    their absolute path or URL. External references to schemas, parameters,
+    request bodies, responses and headers are moved into the components of the
+    bundled document, under the name of the referenced component, and rewritten
+    to local '#/components/...' references. Other external references, like
+    path items, are inlined.
+    """
+
+    def __init__(
+        self,
+        content_loader: Optional[ContentLoader] = None,
+        max_workers: int = DEFAULT_WORKERS,
+    ):
+        """
+        Initialize the SpecBundler.
+
+        Args:
+            content_loader: Loader of the referenced documents
+            max_workers: Maximum number of documents loaded at the same time
+        """
+        self.content_loader = content_loader or ContentLoader()
+        self.max_workers = max(1, max_workers)
+        # Loaded documents by absolute path or URL
+        self.documents: Dict[str, Any] = {}
+        self.root_uri = ""
+        # Local reference of every moved component, by document and JSON pointer
+        self.moved: Dict[Tuple[str, str], str] = {}
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self.root_components: Dict[str, Any] = {}
+        self.inlining: List[Tuple[str, str]] = []
+
+    @property
+    def sources(self) -> List[str]:
+        """Paths and URLs of the referenced documents, without the root document."""
+        return [uri for uri in self.documents if uri != self.root_uri]
+
+    @staticmethod
+    def resolve_uri(base: str, ref_uri: str) -> str:
+        """
+        Resolve the document part of a reference against the referencing document.
+
+        Args:
+            base: Absolute path or URL of the referencing document
+            ref_uri: The part of the reference before '#'
+
+        Returns:
+            str: Absolute path or URL of the referenced document
+        """
+        if urlparse(ref_uri).scheme in ("http", "https"):
+            return ref_uri
+        if urlparse(base).scheme in ("http", "https"):
+            return urljoin(base, ref_uri)
+        return os.path.normpath(os.path.join(os.path.dirname(base), unquote(ref_uri)))
+
+    @classmethod
+    def _referenced_uris(cls, data: Any, base: str) -> List[str]:
+        uris = (ref.partition("#")[0] for ref in RefGraph.collect_ref_values(data))
+        return list(dict.fromkeys(cls.resolve_uri(base, uri) for uri in uris if uri))
+
+    def _load(self, uri: str, referenced_from: str) -> Any:
+        try:
+            return self.content_loader.load_document(uri).data
+        except ContentLoadError as e:
+            raise BundleError(
+                f"Could not load {uri} referenced from {referenced_from}: {e}"
+            )
+
+    def _load_documents(self, root_data: Any) -> None:
+        """Load all documents referenced directly or indirectly by the root document."""
+        self.documents = {self.root_uri: root_data}
+        requested: Set[str] = {self.root_uri}
+        running: Dict[Future, str] = {}
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="borea-ref"
+        ) as executor:
+
+            def submit_references(data: Any, base: str) -> None:
+                for uri in self._referenced_uris(data, base):
+                    if uri not in requested:
+                        requested.add(uri)
+                        running[executor.submit(self._load, uri, base)] = uri
+
+            submit_references(root_data, self.root_uri)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    uri = running.pop(future)
+                    data = future.result()
+                    self.documents[uri] = data
+                    submit_references(data, uri)
+
+    @staticmethod
+    def _resolve_pointer(data: Any, pointer: str, uri: str) -> Any:
+        """Return the node a JSON pointer like '/components/schemas/Pet' points to."""
+        node = data
+        for token in unquote(pointer).split("/")[1:]:
+            token = token.replace("~1", "/").replace("~0", "~")
+            try:
+                node = node[int(token)] if isinstance(node, list) else node[token]
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise BundleError(f"{uri}#{pointer} does not exist")
+        return node
+
+    def _component_name(self, section: str, uri: str, pointer: str) -> str:
+        """Choose a name for a moved component that does not clash with others."""
+        tokens = [token for token in pointer.split("/") if token]
+        if tokens:
+            base_name = unquote(tokens[-1]).replace("~1", "/").replace("~0", "~")
+        else:
+            base_name = Path(urlparse(uri).path).stem
+        names = self.components.setdefault(section, {})
+        taken = self.root_components.get(section, {})
+        name = base_name
+        suffix = 2
+        while name in names or name in taken:
+            name = f"{base_name}{suffix}"
+            suffix += 1
+        return name
+
+    def _move_component(self, kind: str, uri: str, pointer: str) -> str:
+        """Move a referenced component into the bundle and return its local reference."""
+        key = (uri, pointer)
+        if key in self.moved:
+            return self.moved[key]
+
+        section = COMPONENT_SECTIONS[kind]
+        tokens = pointer.split("/")
+        if len(tokens) == 4 and tokens[1] == "components":
+            # Keep the section of references to the components of another spec
+            if tokens[2] in COMPONENT_KINDS:
+                section = tokens[2]
+                kind = COMPONENT_KINDS[section]
+        name = self._component_name(section, uri, pointer)
+        local_ref = f"#/components/{section}/{name}"
+        # Reserve the name first, the component may reference itself
+        self.moved[key] = local_ref
+        self.components[section][name] = None
+        target = self._resolve_pointer(self.documents[uri], pointer, uri)
+        self.components[section][name] = self._rewrite(target, uri, kind)
+        return local_ref
+
+    def _rewrite_ref(self, node: Dict[str, Any], base: str, kind: str) -> Any:
+        ref_uri, _, pointer = node["$ref"].partition("#")
+        uri = self.resolve_uri(base, ref_uri) if ref_uri else base
+        if uri == self.root_uri:
+            # References into the root document are local references in the bundle
+            return {**node, "$ref": f"#{pointer}"}
+
+        if kind in COMPONENT_SECTIONS:
+            local_ref = self._move_component(kind, uri, pointer)
+            return {**node, "$ref": local_ref}
+
+        key = (uri, pointer)
+        if key in self.inlining:
+            raise BundleError(
+                f"{uri}#{pointer} references itself and can not be inlined"
+            )
+        self.inlining.append(key)
+        target = self._resolve_pointer(self.documents[uri], pointer, uri)
+        inlined = self._rewrite(target, uri, kind)
+        self.inlining.pop()
+        return inlined
+
+    def _rewrite(self, node: Any, base: str, kind: str) -> Any:
+        """
+        Copy a node of a document, rewriting its references for the bundle.
+
+        Args:
+            node: The node
+            base: Absolute path or URL of the document of the node
+            kind: Kind of the node, see CHILD_KINDS
+
+        Returns:
+            Any: The rewritten copy
+        """
+        child_kinds = CHILD_KINDS.get(kind, {})
+        if isinstance(node, dict):
+            if isinstance(node.get("$ref"), str):
+                return self._rewrite_ref(node, base, kind)
+            return {
+                key: self._rewrite(
+                    value, base, child_kinds.get(key, child_kinds.get("*", "other"))
+                )
+                for key, value in node.items()
+            }
+        if isinstance(node, list):
+            item_kind = child_kinds.get("*", kind)
+            return [self._rewrite(item, base, item_kind) for item in node]
+        return node
+
+    def bundle(self, document: LoadedDocument) -> LoadedDocument:
+        """
+        Bundle a document and the documents it references.
+
+        Args:
+            document: The loaded root document
+
+        Returns:
+            LoadedDocument: The document itself if it has no external references,
+                otherwise a document built in memory from the bundled spec
+
+        Raises:
+            BundleError: If a referenced document or component can not be loaded
+        """
+        self.root_uri = (
+            document.source
+            if document.source_type == "url"
+            else os.path.abspath(document.source)
+        )
+        if not self._referenced_uris(document.data, self.root_uri):
+            self.documents = {self.root_uri: document.data}
+            return document
+
+        self._load_documents(document.data)
+        self.moved = {}
+        self.components = {}
+        self.root_components = document.data.get("components", {})
+        # Components of the root document defined in another document keep their name
+        defined_elsewhere: List[Tuple[str, str, str, str, str]] = []
+        for section, section_components in self.root_components.items():
+            if section not in COMPONENT_KINDS or not isinstance(
+                section_components, dict
+            ):
+                continue
+            for name, component in section_components.items():
+                if not isinstance(component, dict) or list(component) != ["$ref"]:
+                    continue
+                ref_uri, _, pointer = component["$ref"].partition("#")
+                if not ref_uri:
+                    continue
+                uri = self.resolve_uri(self.root_uri, ref_uri)
+                self.moved[(uri, pointer)] = f"#/components/{section}/{name}"
+                defined_elsewhere.append(
+                    (section, name, COMPONENT_KINDS[section], uri, pointer)
+                )
+
+        bundled = self._rewrite(document.data, self.root_uri, "document")
+        for section, name, kind, uri, pointer in defined_elsewhere:
+            target = self._resolve_pointer(self.documents[uri], pointer, uri)
+            bundled["components"][section][name] = self._rewrite(target, uri, kind)
+        if self.components:
+            components = bundled.setdefault("components", {})
+            for section, moved_components in self.components.items():
+                components.setdefault(section, {}).update(moved_components)
+        return LoadedDocument(
+            source=document.source,
+            source_type="memory",
+            content=json.dumps(bundled, indent=2),
+            data=bundled,
+            content_format=document.content_format,
+            load_seconds=document.load_seconds,
+            parse_seconds=document.parse_seconds,
+        )
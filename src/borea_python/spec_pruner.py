@@ -0,0 +1,171 @@
+"""Module for pruning an OpenAPI spec down to selected operations."""
+
+import fnmatch
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .content_loader import LoadedDocument
+from .ref_graph import RefGraph
+
+HTTP_METHODS = ["get", "put", "post", "delete", "options", "head", "patch", "trace"]
+
+
+class OperationFilter:
+    """Selects operations by tag, operation ID and path glob pattern."""
+
+    def __init__(
+        self,
+        tags: Optional[List[str]] = None,
+        operation_ids: Optional[List[str]] = None,
+        include_paths: Optional[List[str]] = None,
+    ):
+        """
+        Initialize the filter. Empty criteria match every operation.
+
+        Args:
+            tags: Select operations with any of these tags
+            operation_ids: Select operations with any of these operation IDs
+            include_paths: Select operations whose path matches any of these glob patterns
+        """
+        self.tags: List[str] = list(tags or [])
+        self.operation_ids: List[str] = list(operation_ids or [])
+        self.include_paths: List[str] = list(include_paths or [])
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.tags or self.operation_ids or self.include_paths)
+
+    def matches(self, path: str, details: Dict[str, Any]) -> bool:
+        """
+        Check if an operation matches all criteria.
+
+        Args:
+            path: Path of the operation
+            details: The OpenAPI operation object
+
+        Returns:
+            bool: True if the operation is selected
+        """
+        if (
+            self.operation_ids
+            and details.get("operationId", "") not in self.operation_ids
+        ):
+            return False
+        if self.tags and not any(tag in self.tags for tag in details.get("tags", [""])):
+            return False
+        if self.include_paths and not any(
+            fnmatch.fnmatch(path, pattern) for pattern in self.include_paths
+        ):
+            return False
+        return True
+
+    def cache_key(self) -> str:
+        """Return a string identifying the filter criteria."""
+        return json.dumps([self.tags, self.operation_ids, self.include_paths])
+
+
+class SpecPruner:
+    """
+    Prunes an OpenAPI spec to the selected operations and the component schemas
+    they transitively reference, so only those are parsed and generated.
+    """
+
+    def __init__(self, spec: Dict[str, Any], operation_filter: OperationFilter):
+        """
+        Initialize the pruner.
+
+        Args:
+            spec: The parsed OpenAPI spec, it is not modified
+            operation_filter: Filter selecting the operations to keep
+        """
+        self.spec = spec
+        self.operation_filter = operation_filter
+        self.components: Dict[str, Any] = spec.get("components", {})
+        self.schemas: Dict[str, Any] = self.components.get("schemas", {})
+        self.ref_graph = RefGraph(self.schemas)
+
+    def selected_operations(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Yield path, method and details of every selected operation."""
+        for path, path_item in self.spec.get("paths", {}).items():
+            for method, details in path_item.items():
+                if method.lower() not in HTTP_METHODS or not isinstance(details, dict):
+                    continue
+                if self.operation_filter.matches(path, details):
+                    yield path, method, details
+
+    def reachable_schemas(self) -> List[str]:
+        """
+        Compute the component schemas reachable from the selected operations.
+
+        References to other components (parameters, request bodies, responses, ...)
+        are followed into those components.
+
+        Returns:
+            List[str]: Names of reachable schemas, in spec order
+        """
+        pending: List[Any] = []
+        for path, _, details in self.selected_operations():
+            pending.append(details)
+            pending.append(self.spec["paths"][path].get("parameters", []))
+
+        schema_names: List[str] = []
+        visited_components = set()
+        while pending:
+            for ref in RefGraph.collect_ref_values(pending.pop()):
+                parts = ref.split("/")
+                if ref.startswith("#/components/") and len(parts) == 4:
+                    section, name = parts[2], parts[3]
+                    if section != "schemas":
+                        if (section, name) not in visited_components:
+                            visited_components.add((section, name))
+                            pending.append(self.components.get(section, {}).get(name))
+                        continue
+                schema_names.append(RefGraph.ref_name(ref))
+        return self.ref_graph.reachable(schema_names)
+
+    def prune(self) -> Dict[str, Any]:
+        """
+        Build a spec with only the selected operations and reachable schemas.
+
+        Returns:
+            Dict[str, Any]: The pruned spec, sharing unchanged parts with the original
+        """
+        paths: Dict[str, Any] = {}
+        for path, method, details in self.selected_operations():
+            if path not in paths:
+                # Keep path level fields such as shared parameters
+                paths[path] = {
+                    key: value
+                    for key, value in self.spec["paths"][path].items()
+                    if key.lower() not in HTTP_METHODS
+                }
+            paths[path][method] = details
+
+        pruned = dict(self.spec)
+        pruned["paths"] = paths
+        if self.components:
+            pruned["components"] = {
+                **self.components,
+                "schemas": {
+                    name: self.schemas[name] for name in self.reachable_schemas()
+                },
+            }
+        return pruned
+
+    def prune_document(self, document: LoadedDocument) -> LoadedDocument:
+        """
+        Prune a loaded document.
+
+        Args:
+            document: The loaded OpenAPI document
+
+        Returns:
+            LoadedDocument: A document built in memory from the pruned spec
+        """
+        pruned = self.prune()
+        return LoadedDocument(
+            source=document.source,
+            source_type="memory",
+            content=json.dumps(pruned, indent=2),
+            data=pruned,
+        )
@@ -0,0 +1,186 @@
+"""Module for comparing the inputs of a generation run with the previous run."""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import click
+from pydantic import BaseModel
+
+SNAPSHOT_FILE = "snapshot.json"
+
+# Sections of a snapshot, the generator settings affect every generated file
+SETTINGS = "settings"
+OPERATIONS = "operations"
+TAGS = "tags"
+SDK = "sdk"
+COMPONENTS = "components"
+
+
+class SpecSnapshot:
+    """
+    Hashes of everything the generated files are rendered from, by section and key.
+
+    Operations are keyed by their handler file, tags by their name. The SDK class
+    and the components (models and schema files) have a single key each.
+    """
+
+    def __init__(self, sections: Optional[Dict[str, Dict[str, str]]] = None):
+        """
+        Initialize the SpecSnapshot.
+
+        Args:
+            sections: Hashes by key, by section
+        """
+        self.sections: Dict[str, Dict[str, str]] = sections or {}
+
+    @staticmethod
+    def hash_value(value: Any) -> str:
+        """
+        Hash a JSON serializable value, pydantic models included.
+
+        Args:
+            value: The value to hash
+
+        Returns:
+            str: Hex digest of the value
+        """
+
+        def default(o: Any) -> Any:
+            if isinstance(o, BaseModel):
+                return o.model_dump(by_alias=True)
+            return str(o)
+
+        content = json.dumps(value, sort_keys=True, default=default)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def add(self, section: str, key: str, value: Any) -> None:
+        """Record the hash of a value."""
+        self.sections.setdefault(section, {})[key] = self.hash_value(value)
+
+    def get(self, section: str, key: str) -> Optional[str]:
+        return self.sections.get(section, {}).get(key)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["SpecSnapshot"]:
+        """
+        Load the snapshot of a previous run.
+
+        Args:
+            path: Path of the snapshot file
+
+        Returns:
+            Optional[SpecSnapshot]: The snapshot, or None if there is no readable snapshot
+        """
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r") as f:
+                return cls(json.load(f)["sections"])
+        except (OSError, ValueError, KeyError) as e:
+            click.echo(f"Ignoring unreadable snapshot {path}: {e}")
+            return None
+
+    def save(self, path: Path) -> None:
+        """Store the snapshot for the next run."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        sections = {
+            section: dict(sorted(hashes.items()))
+            for section, hashes in sorted(self.sections.items())
+        }
+        with open(path, "w") as f:
+            json.dump({"sections": sections}, f, indent=2)
+
+
+class SnapshotDiff:
+    """
+    Differences between the snapshot of the previous run and the current one.
+
+    Everything counts as changed when there is no previous snapshot or when the
+    generator settings changed. The current snapshot may still be filled in
+    after the diff is created.
+    """
+
+    def __init__(
+        self,
+        previous: Optional[SpecSnapshot],
+        current: SpecSnapshot,
+        full: bool = False,
+    ):
+        """
+        Initialize the SnapshotDiff.
+
+        Args:
+            previous: Snapshot of the previous run, if there is one
+            current: Snapshot of the current run
+            full: Treat everything as changed, regardless of the previous snapshot
+        """
+        self.previous = previous
+        self.current = current
+        self.full = full
+
+    @property
+    def is_full(self) -> bool:
+        """True if all files have to be generated."""
+        return (
+            self.full
+            or self.previous is None
+            or self.previous.sections.get(SETTINGS)
+            != self.current.sections.get(SETTINGS)
+        )
+
+    def is_changed(self, section: str, key: str) -> bool:
+        """
+        Check if a value differs from the previous run.
+
+        Args:
+            section: Section of the value
+            key: Key of the value
+
+        Returns:
+            bool: True if the value is new or changed
+        """
+        if self.is_full:
+            return True
+        previous_hash = self.previous.get(section, key)
+        return previous_hash is None or previous_hash != self.current.get(section, key)
+
+    def _count(self, section: str) -> Dict[str, List[str]]:
+        previous = self.previous.sections.get(section, {})
+        current = self.current.sections.get(section, {})
+        return {
+            "added": [key for key in current if key not in previous],
+            "changed": [
+                key
+                for key in current
+                if key in previous and previous[key] != current[key]
+            ],
+            "removed": [key for key in previous if key not in current],
+        }
+
+    def summary(self) -> str:
+        """
+        Summarize the changes.
+
+        Returns:
+            str: Human readable summary
+        """
+        if self.full:
+            return "full regeneration requested, all files generated"
+        if self.previous is None:
+            return "no snapshot of a previous run, all files generated"
+        if self.is_full:
+            return "generator settings changed, all files generated"
+
+        parts = []
+        for section, name in ((OPERATIONS, "operations"), (TAGS, "tags")):
+            counts = self._count(section)
+            parts.append(
+                f"{name} {len(counts['changed'])} changed, "
+                f"{len(counts['added'])} added, {len(counts['removed'])} removed"
+            )
+        for section, name in ((SDK, "SDK class"), (COMPONENTS, "components")):
+            changed = any(self._count(section).values())
+            parts.append(f"{name} {'changed' if changed else 'unchanged'}")
+        return "; ".join(parts)
@@ -0,0 +1,38 @@
+from borea_python.file_writer import ConfigurableFileWriter
+
+
+def test_changed_hash_salt_writes_files_again(tmp_path):
+    path = str(tmp_path / "handler.py")
+
+    writer = ConfigurableFileWriter(manifest_root=str(tmp_path))
+    writer.write(path, "x = 1\n")
+    writer.finalize()
+
+    # The same content, to be formatted after it is written
+    writer = ConfigurableFileWriter(manifest_root=str(tmp_path), hash_salt="ruff")
+    writer.write(path, "x = 1\n")
+    assert writer.written == [path]
+    writer.finalize()
+
+    writer = ConfigurableFileWriter(manifest_root=str(tmp_path), hash_salt="ruff")
+    writer.write(path, "x = 1\n")
+    assert writer.skipped == [path]
+
+
+def test_edited_files_are_written_again(tmp_path):
+    path = tmp_path / "handler.py"
+
+    writer = ConfigurableFileWriter(manifest_root=str(tmp_path))
+    writer.write(str(path), "x = 1\n")
+    writer.write(str(tmp_path / "kept.py"), "y = 1\n")
+    writer.finalize()
+
+    with open(path, "a") as f:
+        f.write("BROKEN = 1\n")
+    (tmp_path / "kept.py").write_text("y = 2\n")
+
+    writer = ConfigurableFileWriter(manifest_root=str(tmp_path))
+    writer.write(str(path), "x = 1\n")
+    assert writer.written == [str(path)]
+    assert path.read_text() == "x = 1\n"
+    assert not writer.keep(str(tmp_path / "kept.py"))
@@ -0,0 +1,280 @@
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import sys
+from enum import Enum
+
+import httpx
+import pytest
+from pydantic import BaseModel
+
+from borea_python.content_loader import LoadedDocument
+from borea_python.generator import SDKGenerator
+from borea_python.models.borea_config_models import BoreaConfig
+from borea_python.openapi_parser import OpenAPIParser
+
+BASE_URL = "https://api.example.com"
+
+
+def json_response(schema_name, content_type="application/json"):
+    ref = {"$ref": f"#/components/schemas/{schema_name}"}
+    return {"200": {"description": "OK", "content": {content_type: {"schema": ref}}}}
+
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Shapes API", "version": "1.0.0"},
+    "servers": [{"url": BASE_URL}],
+    "tags": [{"name": "shapes", "description": "Shapes"}],
+    "paths": {
+        "/color": {
+            "get": {
+                "operationId": "get_color",
+                "tags": ["shapes"],
+                "responses": json_response("Color"),
+            }
+        },
+        "/ids": {
+            "get": {
+                "operationId": "get_ids",
+                "tags": ["shapes"],
+                "responses": json_response("Ids"),
+            }
+        },
+        "/pet": {
+            "get": {
+                "operationId": "get_pet",
+                "tags": ["shapes"],
+                "parameters": [
+                    {"name": "X-Trace", "in": "header", "schema": {"type": "string"}}
+                ],
+                "responses": json_response("Pet"),
+            }
+        },
+        "/colors": {
+            "get": {
+                "operationId": "list_colors",
+                "tags": ["shapes"],
+                "responses": json_response("Color", "application/x-ndjson"),
+            }
+        },
+    },
+    "components": {
+        "schemas": {
+            "Color": {"type": "string", "enum": ["red", "green"]},
+            "Ids": {"type": "array", "items": {"type": "integer"}},
+            "Pet": {"type": "object", "properties": {"name": {"type": "string"}}},
+        }
+    },
+}
+BODIES = {
+    "/color": b'"red"',
+    "/ids": b"[1, 2]",
+    "/pet": b'{"name": "Rex"}',
+    "/colors": b'"red"\n"green"\n',
+}
+
+
+def respond(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, content=BODIES[request.url.path])
+
+
+@pytest.fixture(scope="module")
+def sdk_package(tmp_path_factory):
+    temp_dir = tmp_path_factory.mktemp("generated")
+    output_dir = temp_dir / "shapes_sdk"
+    document = LoadedDocument("shapes.json", "memory", json.dumps(SPEC), SPEC)
+    generator = SDKGenerator(
+        metadata=OpenAPIParser(document.source, document=document).parse(),
+        output_dir=output_dir,
+        models_dir=output_dir / "models",
+        generate_tests=False,
+        generate_x_code_samples=False,
+        borea_config=BoreaConfig(),
+        document=document,
+        format_code=False,
+        incremental=False,
+        client="both",
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator.generate()
+
+    sys.path.insert(0, str(temp_dir))
+    try:
+        yield "shapes_sdk.src"
+    finally:
+        sys.path.remove(str(temp_dir))
+
+
+@pytest.fixture(scope="module")
+def sdk_module(sdk_package):
+    return importlib.import_module(f"{sdk_package}.shapes_api")
+
+
+@pytest.fixture(scope="module")
+def async_sdk_module(sdk_package):
+    return importlib.import_module(f"{sdk_package}.shapes_api_async")
+
+
+@pytest.fixture
+def sdk(sdk_module):
+    client = sdk_module.ShapesAPI(transport=httpx.MockTransport(respond))
+    yield client
+    client.close()
+
+
+def test_enum_response_is_parsed_into_the_enum(sdk):
+    color = sdk.shapes.get_color()
+    assert isinstance(color, Enum)
+    assert color.value == "red"
+
+
+def test_root_model_response_is_parsed_into_its_value(sdk):
+    assert sdk.shapes.get_ids() == [1, 2]
+
+
+def test_object_response_is_parsed_into_the_model(sdk):
+    pet = sdk.shapes.get_pet()
+    assert isinstance(pet, BaseModel)
+    assert pet.name == "Rex"
+
+
+def test_enum_records_are_parsed_into_the_enum(sdk):
+    colors = list(sdk.shapes.list_colors_stream())
+    assert all(isinstance(color, Enum) for color in colors)
+    assert [color.value for color in colors] == ["red", "green"]
+
+
+def test_requests_go_to_the_base_url_with_the_headers_of_the_sdk(sdk_module):
+    requests = []
+
+    def record(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return respond(request)
+
+    client = sdk_module.ShapesAPI(
+        base_url=BASE_URL + "/",
+        api_key="secret",
+        transport=httpx.MockTransport(record),
+    )
+    client.shapes.get_pet()
+    client.shapes.get_pet(x_trace="abc")
+    client.close()
+
+    assert [str(request.url) for request in requests] == [f"{BASE_URL}/pet"] * 2
+    assert all(
+        request.headers["Authorization"] == "Bearer secret" for request in requests
+    )
+    # Header parameters of the spec are default headers of the SDK, a call
+    # overrides them without changing them for later calls
+    assert requests[0].headers["X-Trace"] == ""
+    assert requests[1].headers["X-Trace"] == "abc"
+    assert client.headers["X-Trace"] == ""
+
+
+def test_client_options_are_passed_to_the_client(sdk_module, monkeypatch):
+    options = {}
+    client_class = httpx.Client
+
+    def create_client(**kwargs):
+        options.update(kwargs)
+        return client_class(transport=httpx.MockTransport(respond))
+
+    monkeypatch.setattr(httpx, "Client", create_client)
+    limits = httpx.Limits(max_connections=4)
+    client = sdk_module.ShapesAPI(timeout=3.0, limits=limits, http2=True)
+    assert client.shapes.get_ids() == [1, 2]
+    client.close()
+
+    assert options == {"timeout": 3.0, "http2": True, "limits": limits}
+
+
+def test_transport_is_used_for_requests(sdk_module):
+    transport = httpx.MockTransport(respond)
+    client = sdk_module.ShapesAPI(transport=transport)
+    assert client.client._transport is transport
+    assert client.shapes.get_ids() == [1, 2]
+    client.close()
+
+
+def test_shared_client_is_not_modified_or_closed(sdk_module):
+    shared = httpx.Client(
+        transport=httpx.MockTransport(respond), headers={"X-Shared": "yes"}
+    )
+    requests = []
+    client = sdk_module.ShapesAPI(
+        api_key="secret", client=shared, before_request=requests.append
+    )
+    assert client.shapes.get_pet().name == "Rex"
+    client.close()
+
+    assert not shared.is_closed
+    assert "Authorization" not in shared.headers
+    assert requests[0].headers["X-Shared"] == "yes"
+    assert requests[0].headers["Authorization"] == "Bearer secret"
+    shared.close()
+
+
+def test_own_client_is_closed(sdk_module):
+    client = sdk_module.ShapesAPI(transport=httpx.MockTransport(respond))
+    client.close()
+    assert client.client.is_closed
+
+
+def test_async_client_has_async_handlers(async_sdk_module):
+    async def run():
+        async with async_sdk_module.AsyncShapesAPI(
+            transport=httpx.MockTransport(respond)
+        ) as client:
+            assert type(client.shapes).__name__ == "AsyncShapes"
+            pet = await client.shapes.get_pet()
+            colors = [color async for color in client.shapes.list_colors_stream()]
+        return client, pet, colors
+
+    client, pet, colors = asyncio.run(run())
+    assert pet.name == "Rex"
+    assert [color.value for color in colors] == ["red", "green"]
+    # The client is closed when the context is left
+    assert client.client.is_closed
+
+
+def test_async_client_awaits_coroutine_callbacks(async_sdk_module):
+    events = []
+
+    async def before_request(request: httpx.Request) -> None:
+        events.append(("before", request.url.path))
+
+    async def after_request(response: httpx.Response) -> None:
+        events.append(("after", response.status_code))
+
+    async def run():
+        async with async_sdk_module.AsyncShapesAPI(
+            transport=httpx.MockTransport(respond),
+            before_request=before_request,
+            after_request=after_request,
+        ) as client:
+            await client.shapes.get_ids()
+            # Plain functions are called as well
+            client.before_request = lambda request: events.append("sync")
+            await client.shapes.get_ids()
+
+    asyncio.run(run())
+    assert events == [
+        ("before", "/ids"),
+        ("after", 200),
+        "sync",
+        ("after", 200),
+    ]
+
+
+def test_async_shared_client_is_not_closed(async_sdk_module):
+    async def run():
+        shared = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+        async with async_sdk_module.AsyncShapesAPI(client=shared) as client:
+            assert await client.shapes.get_ids() == [1, 2]
+        assert not shared.is_closed
+        await shared.aclose()
+
+    asyncio.run(run())
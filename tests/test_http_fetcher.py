@@ -0,0 +1,108 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+
+import pytest
+
+from borea_python.http_fetcher import FetchError, HttpFetcher
+
+SPEC = b'{"openapi": "3.0.0"}'
+
+
+class SpecHandler(BaseHTTPRequestHandler):
+    # Status code of the next responses, 200 serves SPEC with an ETag
+    status = 200
+
+    def do_GET(self):
+        status = type(self).status
+        if status == 200 and self.headers.get("If-None-Match") == '"v1"':
+            status = 304
+        # Recorded before the response is sent, the client may return right after
+        self.server.requests.append((status, self.headers.get("If-None-Match")))
+        self.send_response(status)
+        if status == 200:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(SPEC)))
+            self.end_headers()
+            self.wfile.write(SPEC)
+        else:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def http_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SpecHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def server(http_server):
+    SpecHandler.status = 200
+    http_server.requests = []
+    return http_server
+
+
+@pytest.fixture
+def url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/openapi.json"
+
+
+def fetcher(tmp_path, **kwargs):
+    return HttpFetcher(cache_dir=str(tmp_path), retries=0, **kwargs)
+
+
+def test_200_is_cached(tmp_path, url):
+    assert fetcher(tmp_path).fetch(url) == (SPEC, "application/json")
+    assert fetcher(tmp_path).is_cached(url)
+
+
+def test_304_returns_the_cached_copy(tmp_path, server, url):
+    fetcher(tmp_path).fetch(url)
+    assert fetcher(tmp_path).fetch(url) == (SPEC, "application/json")
+    assert server.requests == [(200, None), (304, '"v1"')]
+
+
+@pytest.mark.parametrize("status", [500, 503, 429])
+def test_server_errors_and_rate_limits_fall_back_to_the_cached_copy(
+    tmp_path, url, status
+):
+    fetcher(tmp_path).fetch(url)
+    SpecHandler.status = status
+    assert fetcher(tmp_path).fetch(url) == (SPEC, "application/json")
+
+
+@pytest.mark.parametrize("status", [500, 429])
+def test_server_errors_and_rate_limits_raise_without_a_cached_copy(
+    tmp_path, url, status
+):
+    SpecHandler.status = status
+    with pytest.raises(HTTPError):
+        fetcher(tmp_path).fetch(url)
+
+
+def test_client_errors_raise_with_a_cached_copy(tmp_path, url):
+    fetcher(tmp_path).fetch(url)
+    SpecHandler.status = 404
+    with pytest.raises(HTTPError):
+        fetcher(tmp_path).fetch(url)
+
+
+def test_offline_uses_the_cached_copy(tmp_path, server, url):
+    fetcher(tmp_path).fetch(url)
+    assert fetcher(tmp_path, offline=True).fetch(url) == (SPEC, "application/json")
+    assert len(server.requests) == 1
+
+
+def test_offline_raises_without_a_cached_copy(tmp_path, server, url):
+    with pytest.raises(FetchError):
+        fetcher(tmp_path, offline=True).fetch(url)
+    assert server.requests == []
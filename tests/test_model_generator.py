@@ -0,0 +1,48 @@
+import json
+
+from borea_python.content_loader import ContentLoader
+from borea_python.model_generator import ModelGenerator
+
+
+def write_spec(path, schemas):
+    spec = {
+        "openapi": "3.0.0",
+        "info": {"title": "Pets", "version": "1.0.0"},
+        "paths": {},
+        "components": {"schemas": schemas},
+    }
+    path.write_text(json.dumps(spec))
+
+
+def test_models_are_generated_from_the_loaded_document(tmp_path):
+    spec_path = tmp_path / "openapi.json"
+    write_spec(spec_path, {"Pet": {"type": "object"}})
+    document = ContentLoader().load_document(str(spec_path))
+    # Changes on disk after loading do not reach the models
+    write_spec(spec_path, {"Owner": {"type": "object"}})
+
+    models_code = ModelGenerator().generate(document)
+
+    assert "class Pet(" in models_code
+    assert "class Owner(" not in models_code
+    assert "#   filename:  openapi.json" in models_code
+
+
+def test_unbundled_specs_are_read_by_path(tmp_path):
+    (tmp_path / "owner.json").write_text(json.dumps({"type": "object"}))
+    spec_path = tmp_path / "openapi.json"
+    write_spec(
+        spec_path,
+        {
+            "Pet": {
+                "type": "object",
+                "properties": {"owner": {"$ref": "owner.json"}},
+            }
+        },
+    )
+    document = ContentLoader().load_document(str(spec_path))
+
+    models_code = ModelGenerator().generate(document)
+
+    assert "class Pet(" in models_code
+    assert "class Owner(" in models_code
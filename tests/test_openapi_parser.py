@@ -0,0 +1,157 @@
+import copy
+import json
+import time
+import tracemalloc
+
+import pytest
+
+from benchmarks.spec_synthesizer import SpecScale, SpecSynthesizer
+from borea_python.content_loader import LoadedDocument
+from borea_python.metadata_cache import MetadataCache
+from borea_python.openapi_parser import OpenAPIParser
+
+
+def parse(spec):
+    document = LoadedDocument("spec.json", "memory", json.dumps(spec), spec)
+    return OpenAPIParser(document.source, document=document).parse()
+
+
+def test_fan_out_metadata_grows_linearly():
+    # Every schema references fanOut others, expanding them all would not end
+    spec = SpecSynthesizer(SpecScale(fanOut=3)).synthesize()
+    components_size = len(json.dumps(spec["components"]))
+
+    start = time.perf_counter()
+    metadata = parse(spec)
+    sizes = [len(operation.model_dump_json()) for operation in metadata.operations]
+    elapsed = time.perf_counter() - start
+
+    assert max(sizes) < 2 * components_size
+    assert elapsed < 5
+
+
+def test_nested_references_are_not_expanded():
+    spec = {
+        "openapi": "3.0.0",
+        "info": {"title": "Pets", "version": "1.0.0"},
+        "paths": {
+            "/pets": {
+                "post": {
+                    "operationId": "create_pet",
+                    "requestBody": {
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": "#/components/schemas/Pet"}
+                            }
+                        }
+                    },
+                    "responses": {"204": {"description": "Created"}},
+                }
+            }
+        },
+        "components": {
+            "schemas": {
+                "Pet": {
+                    "type": "object",
+                    "description": "A pet",
+                    "properties": {
+                        "owner": {"$ref": "#/components/schemas/Owner"},
+                    },
+                },
+                "Owner": {
+                    "type": "object",
+                    "description": "An owner",
+                    "properties": {"pets": {"$ref": "#/components/schemas/Pet"}},
+                },
+            }
+        },
+    }
+    components = copy.deepcopy(spec["components"])
+
+    request_body = parse(spec).operations[0].request_body
+
+    assert request_body.nested_json_schema_refs == ["Pet", "Owner"]
+    (pet,) = request_body.nested_json_schemas
+    owner = pet["properties"]["owner"]
+    assert owner.type == "Owner"
+    assert owner.type_is_schema
+    assert owner.nested_json_schemas == [
+        {"$ref": "#/components/schemas/Owner", "description": "An owner"}
+    ]
+    # The components are left as they are in the spec
+    assert spec["components"] == components
+
+
+def test_operation_hash_covers_referenced_schemas():
+    spec = SpecSynthesizer(SpecScale(operations=5, schemas=12, fanOut=0)).synthesize()
+
+    def spec_hashes():
+        return {op.operation_id: op.spec_hash for op in parse(spec).operations}
+
+    hashes = spec_hashes()
+    # Schema0 -> Schema1 -> Schema2 -> Schema3, operation_4 references Schema4
+    spec["components"]["schemas"]["Schema3"]["description"] = "Changed"
+    changed = spec_hashes()
+
+    assert changed["operation_0"] != hashes["operation_0"]
+    assert changed["operation_4"] == hashes["operation_4"]
+
+
+def test_streaming_retains_nothing_per_operation():
+    def retained_memory(operations):
+        spec = SpecSynthesizer(
+            SpecScale(operations=operations, schemas=20, parameters=2)
+        ).synthesize()
+        # Inline request bodies referencing components, in every operation
+        for methods in spec["paths"].values():
+            for details in methods.values():
+                schema = details["responses"]["200"]["content"]["application/json"]
+                details["requestBody"] = {
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "type": "object",
+                                "properties": {"item": schema["schema"]},
+                            }
+                        }
+                    }
+                }
+        document = LoadedDocument("spec.json", "memory", json.dumps(spec), spec)
+        parser = OpenAPIParser(document.source, document=document)
+        tracemalloc.start()
+        try:
+            for _ in parser.iter_operations():
+                pass
+            retained, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        memos = (
+            parser.nested_types_by_ref,
+            parser.schema_metadata_by_ref,
+            parser.reference_metadata_by_ref,
+            parser.expanded_component_types_by_id,
+        )
+        return [len(memo) for memo in memos], retained
+
+    memo_sizes, retained = retained_memory(100)
+    memo_sizes_4x, retained_4x = retained_memory(400)
+
+    assert memo_sizes_4x == memo_sizes
+    # Headers of the parsed operations are kept, they do not grow either
+    assert retained_4x < 1.5 * retained
+
+
+def test_metadata_round_trips_through_json():
+    spec = SpecSynthesizer(SpecScale(operations=20, schemas=12)).synthesize()
+    metadata = parse(spec)
+
+    content = MetadataCache.dumps(metadata)
+    loaded = MetadataCache.loads(content)
+
+    assert loaded == metadata
+    # Shared nested types are stored once
+    assert len(content) < len(metadata.model_dump_json())
+    with pytest.raises(ValueError):
+        MetadataCache.loads(
+            '{"version": 1, "$defs": [], "metadata": {"$model": "Popen", "fields": {}}}'
+        )
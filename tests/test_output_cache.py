@@ -0,0 +1,43 @@
+import os
+import stat
+
+from borea_python.file_writer import ConfigurableFileWriter
+from borea_python.output_cache import OutputCache
+
+
+def store_output(tmp_path, cache):
+    output_dir = tmp_path / "sdk"
+    writer = ConfigurableFileWriter(manifest_root=str(output_dir))
+    writer.write(str(output_dir / "src" / "client.py"), "x = 1\n")
+    writer.finalize()
+    assert cache.store("key", writer, output_dir)
+    return cache._entry_dir("key") / "files" / "src" / "client.py"
+
+
+def restore_output(tmp_path, cache, name):
+    output_dir = tmp_path / name
+    writer = ConfigurableFileWriter(manifest_root=str(output_dir))
+    return cache.restore("key", writer, output_dir), output_dir / "src" / "client.py"
+
+
+def test_cached_files_are_read_only(tmp_path):
+    cache = OutputCache(str(tmp_path / "cache"), link=True)
+    blob = store_output(tmp_path, cache)
+    assert stat.S_IMODE(os.stat(blob).st_mode) == 0o444
+
+    restored, path = restore_output(tmp_path, cache, "restored")
+    assert restored
+    assert path.read_text() == "x = 1\n"
+
+
+def test_modified_entries_are_not_restored(tmp_path):
+    cache = OutputCache(str(tmp_path / "cache"), link=True)
+    blob = store_output(tmp_path, cache)
+    os.chmod(blob, 0o644)
+    with open(blob, "a") as f:
+        f.write("# edit\n")
+
+    restored, path = restore_output(tmp_path, cache, "restored")
+    assert not restored
+    assert not path.exists()
+    assert not cache._entry_dir("key").exists()
@@ -0,0 +1,149 @@
+"""The output of a run does not depend on how the run is executed."""
+
+import copy
+import json
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+from click.testing import CliRunner
+
+from borea_python.cli import cli
+from borea_python.file_writer import MANIFEST_DIR
+
+from benchmarks.spec_synthesizer import SpecScale, SpecSynthesizer
+
+SPEC = SpecSynthesizer(
+    SpecScale(operations=20, tags=3, schemas=16, refDepth=3, parameters=3)
+).synthesize()
+OPTIONS = ["--no-cache", "--no-format", "--client", "both"]
+
+
+def ndjson_operation(operation_id: str, schema_name: str) -> Dict[str, object]:
+    schema = {"$ref": f"#/components/schemas/{schema_name}"}
+    return {
+        "get": {
+            "operationId": operation_id,
+            "tags": ["records"],
+            "responses": {
+                "200": {
+                    "description": "OK",
+                    "content": {"application/x-ndjson": {"schema": schema}},
+                }
+            },
+        }
+    }
+
+
+# Streamed operations whose calls only fit on a line when wrapped
+NDJSON_SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Records API", "version": "1.0.0"},
+    "tags": [{"name": "records", "description": "Records"}],
+    "paths": {
+        "/colors": ndjson_operation("list_colors", "Color"),
+        "/measurements": ndjson_operation(
+            "list_measurements", "TemperatureMeasurementRecordWithCalibrationDetails"
+        ),
+    },
+    "components": {
+        "schemas": {
+            "Color": {"type": "string", "enum": ["red", "green"]},
+            "TemperatureMeasurementRecordWithCalibrationDetails": {
+                "type": "object",
+                "properties": {"value": {"type": "number"}},
+            },
+        }
+    },
+}
+
+
+def run(*args: str) -> None:
+    result = CliRunner().invoke(cli, list(args) + OPTIONS)
+    assert result.exit_code == 0, result.output
+
+
+def generate(output: str, *options: str, spec: str = "openapi.json") -> None:
+    run("generate", "-i", spec, "-o", output, *options)
+
+
+def read_tree(root: str) -> Dict[str, bytes]:
+    """Read the generated files, without the manifests of the generator."""
+    return {
+        path.relative_to(root).as_posix(): path.read_bytes()
+        for path in sorted(Path(root).rglob("*"))
+        if path.is_file() and MANIFEST_DIR not in path.relative_to(root).parts
+    }
+
+
+def assert_same_tree(expected: str, actual: str) -> None:
+    expected_tree = read_tree(expected)
+    actual_tree = read_tree(actual)
+    assert sorted(actual_tree) == sorted(expected_tree)
+    different: List[str] = [
+        path for path in expected_tree if actual_tree[path] != expected_tree[path]
+    ]
+    assert different == []
+
+
+@pytest.fixture
+def spec_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "openapi.json").write_text(json.dumps(SPEC))
+    generate("expected", "--full")
+    return tmp_path
+
+
+def test_jobs(spec_dir):
+    generate("jobs", "--jobs", "4")
+    assert_same_tree("expected", "jobs")
+
+
+def test_stream(spec_dir):
+    generate("streamed", "--stream")
+    assert_same_tree("expected", "streamed")
+
+
+def test_shards_and_merge(spec_dir):
+    for index in range(1, 4):
+        generate(f"shard-{index}", "--shard", f"{index}/3")
+    run(
+        "merge",
+        *(f"shard-{index}" for index in range(1, 4)),
+        "-i",
+        "openapi.json",
+        "-o",
+        "merged",
+    )
+    assert_same_tree("expected", "merged")
+
+
+def test_incremental(spec_dir):
+    # An earlier version of the spec with an operation added, one removed and
+    # changed schema and tag descriptions
+    old_spec = copy.deepcopy(SPEC)
+    first_path = next(iter(old_spec["paths"]))
+    removed = old_spec["paths"].pop(first_path)
+    old_spec["paths"]["/obsolete"] = {
+        "get": dict(removed[next(iter(removed))], operationId="obsolete")
+    }
+    old_spec["components"]["schemas"]["Schema3"]["description"] = "Old description"
+    old_spec["tags"][0]["description"] = "Old tag"
+    Path("old.json").write_text(json.dumps(old_spec))
+
+    generate("incremental", spec="old.json")
+    generate("incremental")
+    assert_same_tree("expected", "incremental")
+
+
+@pytest.mark.skipif(shutil.which("ruff") is None, reason="ruff is not installed")
+def test_unformatted_output_is_formatted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("records.json").write_text(json.dumps(NDJSON_SPEC))
+    generate("records", spec="records.json")
+    result = subprocess.run(
+        ["ruff", "format", "--check", "records"], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stdout
@@ -0,0 +1,15 @@
+from borea_python.profiler import GenerationProfiler
+
+
+def test_render_times_of_both_clients_add_up():
+    profiler = GenerationProfiler()
+    profiler.record_operation("get_pet", 0.25)
+    profiler.record_operation("get_pet", 0.5)
+    profiler.record_operation("list_pets", 0.5)
+
+    report = profiler.report()
+    assert report["total"]["operations"] == 2
+    assert report["slowest_operations"][0] == {
+        "operation_id": "get_pet",
+        "render_s": 0.75,
+    }
@@ -0,0 +1,39 @@
+import json
+
+from borea_python.content_loader import LoadedDocument
+from borea_python.generator import SDKGenerator
+from borea_python.models.borea_config_models import BoreaConfig
+from borea_python.openapi_parser import OpenAPIParser
+
+
+def test_shard_summary_counts_operations_of_both_clients(tmp_path, capsys):
+    spec = {
+        "openapi": "3.0.0",
+        "info": {"title": "Shard API", "version": "1.0.0"},
+        "paths": {
+            f"/items{i}": {
+                "get": {
+                    "operationId": f"get_items{i}",
+                    "responses": {"200": {"description": "OK"}},
+                }
+            }
+            for i in range(3)
+        },
+    }
+    document = LoadedDocument("shard.json", "memory", json.dumps(spec), spec)
+    output_dir = tmp_path / "shard_api"
+    SDKGenerator(
+        metadata=OpenAPIParser(document.source, document=document).parse(),
+        output_dir=output_dir,
+        models_dir=output_dir / "models",
+        generate_tests=False,
+        generate_x_code_samples=False,
+        borea_config=BoreaConfig(),
+        document=document,
+        format_code=False,
+        incremental=False,
+        client="both",
+        shard=(1, 1),
+    ).generate()
+
+    assert "Shard 1/1: 3 of 3 operations" in capsys.readouterr().out
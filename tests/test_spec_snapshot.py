@@ -0,0 +1,26 @@
+import json
+
+from click.testing import CliRunner
+
+from borea_python.cli import cli
+from borea_python.file_writer import MANIFEST_DIR
+from borea_python.spec_snapshot import COMPONENTS, SNAPSHOT_FILE, SpecSnapshot
+
+from benchmarks.spec_synthesizer import SpecScale, SpecSynthesizer
+
+
+def test_components_hash_is_the_same_when_streaming(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    spec = SpecSynthesizer(SpecScale(operations=10, schemas=12)).synthesize()
+    (tmp_path / "openapi.json").write_text(json.dumps(spec))
+
+    hashes = []
+    for output, options in (("normal", []), ("streamed", ["--stream"])):
+        args = ["generate", "-i", "openapi.json", "-o", output, "--no-cache"]
+        result = CliRunner().invoke(cli, args + ["--no-format"] + options)
+        assert result.exit_code == 0, result.output
+        snapshot = SpecSnapshot.load(tmp_path / output / MANIFEST_DIR / SNAPSHOT_FILE)
+        hashes.append(snapshot.get(COMPONENTS, "components"))
+
+    assert hashes[0] is not None
+    assert hashes[0] == hashes[1]